@@ -6,7 +6,7 @@ import tempfile
 import shutil
 import re
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from threading import Lock
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
@@ -16,6 +16,7 @@ from data_handlers.web_data_fetcher import RemoteFileFetcher
 from data_handlers.db_data_handler.db_abstract import AbstractDBHandler
 from logger.logger import ETLLogger
 from ETL.utils.utils import ETLUtils
+from ETL.universe.index_universe import IndexUniverse, previous_quarter, quarter_key
 
 
 class SECExtractionStrategy(ExtractionStrategy):
@@ -36,10 +37,13 @@ class SECExtractionStrategy(ExtractionStrategy):
         config_path: str = "data/quarterly_datasets.json",
         dal: Optional[DAL] = None,
         logger: Optional[ETLLogger] = None,
+        universe: Optional[IndexUniverse] = None,
     ):
         self.data_lock = Lock()
         self.output_dir = output_dir
         self.cik_filter = cik_filter
+        # infotable rows outside the universe are dropped per TSV, before the merge
+        self.universe = universe
         self.file_fetcher = RemoteFileFetcher()
         self.logger = logger or ETLLogger(name="SECExtractionStrategy")
         os.makedirs(self.output_dir, exist_ok=True)
@@ -61,7 +65,7 @@ class SECExtractionStrategy(ExtractionStrategy):
         all_quarters_data = []
 
         try:
-            ETLLogger().info(f"Extracting {len(self.quarters)} quarters...")
+            self.logger.info("Extracting %s quarters...", len(self.quarters))
 
             with ThreadPoolExecutor(max_workers=4) as executor:
                 futures = {
@@ -76,30 +80,30 @@ class SECExtractionStrategy(ExtractionStrategy):
                     try:
                         future.result()
                     except Exception as e:
-                        ETLLogger().error(f"Thread exception for {quarter}: {e}")
+                        self.logger.error("Thread exception for %s: %s", quarter, e)
 
             # Combine all quarters
             if not all_quarters_data:
-                ETLLogger().error("No quarters processed successfully")
+                self.logger.error("No quarters processed successfully")
                 raise ValueError("No quarters processed successfully")
 
             combined_df = pd.concat(all_quarters_data, ignore_index=True)
 
-            ETLLogger().info(f"Total holdings extracted: {len(combined_df)}")
+            self.logger.info("Total holdings extracted: %s", len(combined_df))
 
             return combined_df
 
         finally:
             if os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir)
-                ETLLogger().info("Cleaned up temp directory")
+                self.logger.info("Cleaned up temp directory")
 
     def extract_helper(
         self, quarter: str, temp_dir: str, all_quarters_data: List
     ) -> None:
         """Thread worker: process single quarter and append to results with lock."""
         if quarter not in self.quarterly_datasets:
-            ETLLogger().warning(f"Unknown quarter: {quarter}, skipping...")
+            self.logger.warning("Unknown quarter: %s, skipping...", quarter)
             return
 
         try:
@@ -107,30 +111,32 @@ class SECExtractionStrategy(ExtractionStrategy):
             with self.data_lock:
                 all_quarters_data.append(quarter_df)
         except Exception as e:
-            ETLLogger().error(f"Failed to process {quarter}: {e}")
-            ETLLogger().exception(f"Exception details for {quarter}:")
+            self.logger.error("Failed to process %s: %s", quarter, e)
+            self.logger.exception("Exception details for %s:", quarter)
 
     # ==================== DOWNLOAD FUNCTIONS ====================
 
     def _download_zip(self, url: str, output_path: str) -> None:
         """Download SEC quarterly ZIP file with streaming and progress tracking via dal."""
-        ETLLogger().info(f"Downloading from: {url}")
+        self.logger.info("Downloading from: %s", url)
 
         try:
             response = self.file_fetcher.fetch_stream(url)
+            logger = self.logger
 
             def on_progress(written: int, total: int):
                 if total:
-                    pct = (written / total) * 100
-                    ETLLogger().debug(f"{pct:.1f}% downloaded...")
+                    logger.progress(
+                        url, "%.1f%% downloaded...", written / total * 100, force=written >= total
+                    )
 
             with open(output_path, "wb") as f:
                 self.file_fetcher.write_chunks_to_file(response, f, on_progress)
 
-            ETLLogger().info(f"Downloaded: {output_path}")
+            self.logger.info("Downloaded: %s", output_path)
         except Exception as e:
-            ETLLogger().error(f"Download failed: {e}")
-            ETLLogger().exception("Download error details:")
+            self.logger.error("Download failed: %s", e)
+            self.logger.exception("Download error details:")
             raise
 
     def _ensure_zip_downloaded(self, quarter: str) -> str:
@@ -142,7 +148,7 @@ class SECExtractionStrategy(ExtractionStrategy):
         if not os.path.exists(zip_path):
             self._download_zip(zip_url, zip_path)
         else:
-            ETLLogger().info(f"Already downloaded: {zip_filename}")
+            self.logger.info("Already downloaded: %s", zip_filename)
 
         return zip_path
 
@@ -153,7 +159,7 @@ class SECExtractionStrategy(ExtractionStrategy):
         os.makedirs(extract_to, exist_ok=True)
         with zipfile.ZipFile(zip_path, "r") as z:
             z.extractall(extract_to)
-        ETLLogger().info(f"Extracted to: {extract_to}")
+        self.logger.info("Extracted to: %s", extract_to)
 
     # ==================== TSV PARSING FUNCTIONS ====================
 
@@ -185,7 +191,7 @@ class SECExtractionStrategy(ExtractionStrategy):
             )
             return df
         except Exception as e:
-            ETLLogger().error(f"Error reading {tsv_file}: {e}")
+            self.logger.error("Error reading %s: %s", tsv_file, e)
             return None
 
     def _parse_tsv_file(self, tsv_file: str) -> Optional[pd.DataFrame]:
@@ -206,18 +212,22 @@ class SECExtractionStrategy(ExtractionStrategy):
         return matching_files
 
     def _read_specific_tsv_files(
-        self, folder: str, pattern: re.Pattern
+        self,
+        folder: str,
+        pattern: re.Pattern,
+        row_filter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
     ) -> List[pd.DataFrame]:
-        """Read all TSV files matching pattern from folder."""
+        """Read all TSV files matching pattern from folder, applying row_filter to each."""
         tsv_files = self._find_tsv_files(folder, pattern)
-        ETLLogger().info(f"Found {len(tsv_files)} TSV files")
+        self.logger.info("Found %s TSV files", len(tsv_files))
 
         dataframes = []
         for i, tsv_file in enumerate(tsv_files, 1):
-            if i % 10 == 0:
-                ETLLogger().debug(f"Parsed {i}/{len(tsv_files)} files...")
+            self.logger.progress(folder, "Parsed %d/%d files...", i, len(tsv_files))
 
             df = self._parse_tsv_file(tsv_file)
+            if df is not None and row_filter is not None:
+                df = row_filter(df)
             if df is not None:
                 dataframes.append(df)
 
@@ -230,7 +240,7 @@ class SECExtractionStrategy(ExtractionStrategy):
     ) -> pd.DataFrame:
         """Merge infotable with submission data on ACCESSION_NUMBER."""
         if not info_dfs or not submission_dfs:
-            ETLLogger().error("Missing infotable or submission data")
+            self.logger.error("Missing infotable or submission data")
             raise ValueError("Missing infotable or submission data")
 
         infotable = pd.concat(info_dfs, ignore_index=True)
@@ -246,8 +256,8 @@ class SECExtractionStrategy(ExtractionStrategy):
             original_count = len(df)
             df = df[df["CIK"] == cik]
             filtered_count = len(df)
-            ETLLogger().info(
-                f"CIK filter: {original_count} → {filtered_count} rows (CIK: {cik})"
+            self.logger.info(
+                "CIK filter: %s → %s rows (CIK: %s)", original_count, filtered_count, cik
             )
         return df
 
@@ -258,15 +268,34 @@ class SECExtractionStrategy(ExtractionStrategy):
             df["cusip"] = df["cusip"].str.strip()
             df = df[df["cusip"] == cusip]
             filtered_count = len(df)
-            ETLLogger().info(
-                f"CUSIP filter: {original_count} → {filtered_count} rows (CUSIP: {cusip})"
+            self.logger.info(
+                "CUSIP filter: %s → %s rows (CUSIP: %s)", original_count, filtered_count, cusip
             )
         return df
+
+    def _apply_universe_filter(self, df: pd.DataFrame, quarter: str) -> pd.DataFrame:
+        """
+        Semi-join infotable rows with the universe CUSIPs of the quarter.
+
+        A dataset quarter holds filings that mostly report on the previous
+        quarter, so a row is kept when its CUSIP is in the report quarter's or
+        the filing quarter's snapshot. The exact per-row point-in-time filter
+        runs in DataManipulation.filter_by_universe.
+        """
+        original_count = len(df)
+        df = self.universe.filter_any(
+            df, stage="extract", as_ofs=[previous_quarter(quarter), quarter_key(quarter)], cusip_col="cusip"
+        )
+        self.logger.info(
+            "Universe filter: %s → %s rows (universe: %s)", original_count, len(df), self.universe.name
+        )
+        return df
+
     # ==================== QUARTER PROCESSING ====================
 
     def _process_quarter(self, quarter: str, temp_dir: str) -> pd.DataFrame:
         """Process single quarter: download, extract, merge, filter."""
-        ETLLogger().info(f"Processing {quarter}...")
+        self.logger.info("Processing %s...", quarter)
 
         # Download if needed
         zip_path = self._ensure_zip_downloaded(quarter)
@@ -276,11 +305,16 @@ class SECExtractionStrategy(ExtractionStrategy):
         self._extract_zip(zip_path, extract_dir)
 
         # Parse infotable
-        ETLLogger().info("Parsing infotable files...")
-        info_dfs = self._read_specific_tsv_files(extract_dir, self.INFOTABLE_PATTERN)
+        self.logger.info("Parsing infotable files...")
+        universe_filter = None
+        if self.universe is not None:
+            universe_filter = lambda df: self._apply_universe_filter(df, quarter)
+        info_dfs = self._read_specific_tsv_files(
+            extract_dir, self.INFOTABLE_PATTERN, row_filter=universe_filter
+        )
 
         # Parse submission
-        ETLLogger().info("Parsing submission files...")
+        self.logger.info("Parsing submission files...")
         submission_dfs = self._read_specific_tsv_files(
             extract_dir, self.SUBMISSION_PATTERN
         )
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingest throughput benchmark: PostgreSQL COPY path vs. embedded SQLite loader.
+
+Generates synthetic holdings shaped like DataManipulation output and times
+insert_dataframe + refresh_edge_aggregates on each backend. SQLite runs as
+a backfill: the insert is index-free and post_load_s is finalize_load()
+(indexes, ANALYZE, edge aggregates). The PostgreSQL run uses the DB_*
+settings from .env and is skipped if no server is reachable.
+
+Runs from any directory (ETL/ and the repository root are put on sys.path).
+
+Usage:
+    python ETL/benchmarks/ingest_benchmark.py --rows 1000000 --quarters 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+ETL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ETL_DIR, os.path.dirname(ETL_DIR)]
+
+from data_handlers.db_data_handler.postgres_handler import PostgresHandler
+from data_handlers.db_data_handler.sql_db_handler import SQLDBHandler
+
+BENCH_TABLE = "holdings_bench"
+
+
+def make_holdings(rows: int, quarters: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic holdings with ~10k filers and ~30k CUSIPs."""
+    rng = np.random.default_rng(seed)
+    periods = [(2024 + q // 4, q % 4 + 1) for q in range(quarters)]
+    period_idx = rng.integers(0, len(periods), rows)
+    shares = rng.integers(1, 1_000_000, rows)
+    value = shares * rng.uniform(1, 500, rows)
+
+    return pd.DataFrame(
+        {
+            "accessionnumber": np.char.add("0001-", rng.integers(0, 50_000, rows).astype(str)),
+            "infotablesk": np.arange(rows).astype(str),
+            "nameofissuer": np.char.add("ISSUER ", rng.integers(0, 30_000, rows).astype(str)),
+            "cusip": np.char.zfill(rng.integers(0, 30_000, rows).astype(str), 9),
+            "value": value,
+            "sshprnamt": shares,
+            "filingdate": "2024-05-15",
+            "cik": np.char.zfill(rng.integers(0, 10_000, rows).astype(str), 10),
+            "value_per_share": value / shares,
+            "year": np.array([p[0] for p in periods])[period_idx],
+            "quarter": np.array([p[1] for p in periods])[period_idx],
+        }
+    )
+
+
+def time_backend(handler, df: pd.DataFrame) -> Dict[str, float]:
+    quarters = set(zip(df["year"], df["quarter"]))
+
+    start = time.perf_counter()
+    inserted = handler.insert_dataframe(df.copy(), BENCH_TABLE)
+    insert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    handler.refresh_edge_aggregates(BENCH_TABLE, quarters)
+    if getattr(handler, "bulk_load", False):
+        handler.finalize_load()
+    post_load_seconds = time.perf_counter() - start
+
+    return {
+        "rows": inserted,
+        "insert_s": round(insert_seconds, 3),
+        "rows_per_s": round(inserted / insert_seconds) if insert_seconds else 0,
+        "post_load_s": round(post_load_seconds, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--quarters", type=int, default=4)
+    args = parser.parse_args()
+
+    df = make_holdings(args.rows, args.quarters)
+    results: List[Dict] = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLDBHandler(os.path.join(tmp, "bench.sqlite"))
+        sqlite.connect()
+        sqlite.begin_bulk_load()
+        results.append({"backend": "sqlite (executemany)", **time_backend(sqlite, df)})
+        sqlite.disconnect()
+
+    postgres = PostgresHandler()
+    if postgres.connect():
+        with postgres.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE} CASCADE;")
+            cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}{postgres.EDGE_TABLE_SUFFIX} CASCADE;")
+        postgres.connection.commit()
+        postgres.invalidate_schema_cache()
+        try:
+            results.append({"backend": "postgres (COPY)", **time_backend(postgres, df)})
+        finally:
+            with postgres.connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE} CASCADE;")
+                cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}{postgres.EDGE_TABLE_SUFFIX} CASCADE;")
+            postgres.connection.commit()
+            postgres.disconnect()
+    else:
+        print("PostgreSQL not reachable - skipping COPY benchmark")
+
+    print(pd.DataFrame(results).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
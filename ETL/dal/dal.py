@@ -1,4 +1,9 @@
+import os
+from typing import Iterable, Iterator, Optional, Sequence
+import pandas as pd
 from data_handlers.web_data_fetcher import RemoteFileFetcher
+from dal.query_cache import QueryResultCache
+from data_handlers.db_data_handler.db_abstract import AbstractDBHandler
 from load.load import DataLoader
 
 
@@ -8,13 +13,162 @@ class DAL:
     Wraps a DB handler that implements AbstractDBHandler.
     """
     db_handler = DataLoader()
+    # Set QUERY_CACHE=0 to disable the on-disk result cache.
+    query_cache = QueryResultCache() if os.getenv("QUERY_CACHE", "1") != "0" else None
 
     @staticmethod
     def load_data(df):
         """Load data into the database using the DataLoader"""
         DAL.db_handler.load_to_db(df)
 
+        if DAL.query_cache is not None and {"year", "quarter"} <= set(df.columns):
+            written = set(zip(df["year"].astype(int), df["quarter"].astype(int)))
+            DAL.query_cache.invalidate(
+                ["holdings", f"holdings{AbstractDBHandler.EDGE_TABLE_SUFFIX}"], written
+            )
 
+    @staticmethod
+    def begin_bulk_load() -> None:
+        """Start a multi-quarter backfill; call finalize_load() once after the last load_data."""
+        DAL.db_handler.begin_bulk_load()
+
+    @staticmethod
+    def finalize_load() -> bool:
+        """Build the indexes and edge aggregates deferred during the backfill."""
+        finalized = DAL.db_handler.finalize_load()
+        if DAL.query_cache is not None:
+            DAL.query_cache.invalidate([f"holdings{AbstractDBHandler.EDGE_TABLE_SUFFIX}"])
+        return finalized
+
+    @staticmethod
+    def read_holdings(
+        quarters: Optional[Iterable] = None,
+        ciks: Optional[Iterable[str]] = None,
+        cusips: Optional[Iterable[str]] = None,
+        columns: Optional[Sequence[str]] = None,
+        issuer_pattern: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream holdings as bounded-size DataFrame batches.
+
+        Args:
+            quarters: Quarters to read, e.g. ["2025_Q2"] or [(2025, 2)].
+                Filtering is done on the partition key, so only the
+                matching partitions are scanned.
+            ciks: Restrict to these filer CIKs.
+            cusips: Restrict to these CUSIPs.
+            columns: Columns to project (default: all).
+            issuer_pattern: Case-insensitive LIKE pattern on nameofissuer,
+                e.g. "%APPLE%".
+            batch_size: Maximum rows per batch.
+            use_cache: Serve/store the result in the on-disk query cache.
+
+        Example:
+            for batch in DAL.read_holdings(["2025_Q2"], columns=["cik", "cusip", "value"]):
+                ...
+        """
+        return DAL._read(
+            "holdings",
+            dict(
+                quarters=quarters,
+                ciks=ciks,
+                cusips=cusips,
+                columns=columns,
+                issuer_pattern=issuer_pattern,
+            ),
+            batch_size,
+            use_cache,
+        )
+
+    @staticmethod
+    def read_edges(
+        quarters: Optional[Iterable] = None,
+        ciks: Optional[Iterable[str]] = None,
+        cusips: Optional[Iterable[str]] = None,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream per-quarter fund-stock edge aggregates (holdings_edges).
+
+        One row per (cik, cusip, quarter) with total_value, total_shares and
+        line_count; same filters as read_holdings.
+        """
+        return DAL._read(
+            f"holdings{AbstractDBHandler.EDGE_TABLE_SUFFIX}",
+            dict(quarters=quarters, ciks=ciks, cusips=cusips, columns=columns),
+            batch_size,
+            use_cache,
+        )
+
+    @staticmethod
+    def read_holdings_df(**kwargs) -> pd.DataFrame:
+        """Read holdings into a single DataFrame (same filters as read_holdings)."""
+        batches = list(DAL.read_holdings(**kwargs))
+        if not batches:
+            return pd.DataFrame(columns=kwargs.get("columns") or None)
+        return pd.concat(batches, ignore_index=True)
+
+    @staticmethod
+    def write_fund_features(df: pd.DataFrame) -> bool:
+        """
+        Publish fund graph features (one row per cik and quarter).
+
+        Every quarter present in df replaces the stored rows of that quarter,
+        so the graph stage can write each quarter as soon as it is built.
+        """
+        return DAL.db_handler.load_fund_features(df)
+
+    @staticmethod
+    def read_fund_features(
+        ciks: Optional[Iterable[str]] = None,
+        as_of=None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Point-in-time fund graph features.
+
+        Each fund gets its latest features at or before as_of, so scoring and
+        backtests can read features of any cutoff without rebuilding the graph.
+        Not served from the query cache (results are at most one row per fund).
+
+        Args:
+            ciks: Funds to look up (default: all funds).
+            as_of: Quarter, e.g. "2025_Q2" or (2025, 2), or one quarter per
+                cik (default: latest available).
+            columns: Feature columns to return (default: all).
+
+        Example:
+            features = DAL.read_fund_features(ciks, as_of="2025_Q2")
+        """
+        return DAL.db_handler.read_fund_features(ciks=ciks, as_of=as_of, columns=columns)
+
+    @staticmethod
+    def _read(table_name: str, filters: dict, batch_size: Optional[int], use_cache: bool) -> Iterator[pd.DataFrame]:
+        """Route a read through the query cache (when enabled) to the DataLoader."""
+        # one-shot iterables (generators) must survive both the cache key and the read
+        filters = {
+            name: list(value) if QueryResultCache.is_collection(value) else value
+            for name, value in filters.items()
+            if value is not None
+        }
+        if "quarters" in filters:
+            filters["quarters"] = sorted(
+                {AbstractDBHandler._parse_quarter(q) for q in filters["quarters"]}
+            )
+        batch_size = batch_size or AbstractDBHandler.DEFAULT_BATCH_SIZE
 
+        cache = DAL.query_cache if use_cache else None
+        if cache is None:
+            return DAL.db_handler.read_from_db(table_name, batch_size=batch_size, **filters)
 
+        key = cache.make_key(f"{DAL.db_handler.backend}:{table_name}", filters)
+        cached = cache.get(key, batch_size)
+        if cached is not None:
+            return cached
 
+        batches = DAL.db_handler.read_from_db(table_name, batch_size=batch_size, **filters)
+        return cache.cache_stream(key, batches, [table_name], filters.get("quarters"))
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from threading import RLock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from logger.logger import ETLLogger
+
+
+class QueryResultCache:
+    """
+    On-disk cache of DAL query results stored as zstd-compressed Parquet.
+
+    Entries are keyed by a hash of the normalized query (table + filters +
+    projection) and tracked in a small JSON index with their size, last
+    access time and the (year, quarter) partitions they read. The cache is
+    size-capped with LRU eviction, and the load stage invalidates every
+    entry that touched a partition it wrote to.
+    """
+
+    INDEX_FILE = "index.json"
+    COMPRESSION = "zstd"
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            cache_dir: Cache directory (default: $QUERY_CACHE_DIR or 13f_outputs/query_cache).
+            max_bytes: Size cap (default: $QUERY_CACHE_MAX_MB MB, 2048 MB).
+        """
+        self.cache_dir = cache_dir or os.getenv("QUERY_CACHE_DIR", os.path.join("13f_outputs", "query_cache"))
+        self.max_bytes = max_bytes or int(os.getenv("QUERY_CACHE_MAX_MB", 2048)) * 1024 * 1024
+        self.index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        self._lock = RLock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # ==================== KEYS ====================
+
+    @staticmethod
+    def is_collection(value: Any) -> bool:
+        """Non-string iterable filter value (list, set, ndarray, Series, Index, generator, ...)."""
+        return isinstance(value, Iterable) and not isinstance(value, (str, bytes, dict))
+
+    @staticmethod
+    def make_key(table_name: str, params: Dict[str, Any]) -> str:
+        """
+        Hash a normalized (table, params) description of a query.
+
+        Collection values are hashed element by element as str (sorted, except
+        for the column projection), never through their truncated repr.
+        Generators are consumed, so callers materialize them first.
+        """
+        normalized = {"table": table_name}
+        for name, value in sorted(params.items()):
+            if value is None:
+                continue
+            if QueryResultCache.is_collection(value):
+                value = [str(v) for v in value]
+                if name != "columns":
+                    value = sorted(value)
+            normalized[name] = value
+        payload = json.dumps(normalized, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ==================== READ / WRITE ====================
+
+    def get(self, key: str, batch_size: int) -> Optional[Iterator[pd.DataFrame]]:
+        """Return an iterator of cached batches, or None on a cache miss."""
+        with self._lock:
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+
+            path = os.path.join(self.cache_dir, entry["file"])
+            if not os.path.exists(path):
+                index.pop(key)
+                self._write_index(index)
+                return None
+
+            entry["last_access"] = time.time()
+            self._write_index(index)
+
+        ETLLogger().debug(f"Query cache hit: {key[:12]}")
+        return self._iter_file(path, batch_size)
+
+    def cache_stream(
+        self,
+        key: str,
+        batches: Iterable[pd.DataFrame],
+        table_names: List[str],
+        periods: Optional[List[Tuple[int, int]]],
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Pass batches through while writing them to a new cache entry.
+
+        The entry is only published once the stream has been fully consumed;
+        a partially read stream leaves no entry behind.
+        """
+        file_name = f"{key}.parquet"
+        tmp_path = os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex}.tmp")
+        writer: Optional[pq.ParquetWriter] = None
+        failed = False
+
+        try:
+            for batch in batches:
+                if not failed:
+                    try:
+                        table = pa.Table.from_pandas(batch, preserve_index=False)
+                        if writer is None:
+                            writer = pq.ParquetWriter(tmp_path, table.schema, compression=self.COMPRESSION)
+                        writer.write_table(table.cast(writer.schema))
+                    except (pa.ArrowException, ValueError, TypeError) as e:
+                        ETLLogger().warning(f"Query cache write skipped: {str(e)}")
+                        failed = True
+                yield batch
+
+            if writer is not None and not failed:
+                writer.close()
+                writer = None
+                self._publish(key, tmp_path, file_name, table_names, periods)
+        finally:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # ==================== INVALIDATION ====================
+
+    def invalidate(self, table_names: Iterable[str], periods: Optional[Iterable[Tuple[int, int]]] = None) -> int:
+        """
+        Drop entries that read from the given tables/partitions.
+
+        Args:
+            table_names: Tables that were written.
+            periods: (year, quarter) partitions written; None means all.
+
+        Returns:
+            Number of entries removed.
+        """
+        tables = set(table_names)
+        written = None if periods is None else {(int(y), int(q)) for y, q in periods}
+
+        with self._lock:
+            index = self._read_index()
+            stale = []
+            for key, entry in index.items():
+                if not tables & set(entry["tables"]):
+                    continue
+                entry_periods = entry.get("periods")
+                if written is None or entry_periods is None or written & {tuple(p) for p in entry_periods}:
+                    stale.append(key)
+
+            for key in stale:
+                self._remove_file(index.pop(key)["file"])
+            if stale:
+                self._write_index(index)
+
+        if stale:
+            ETLLogger().info(f"Query cache: invalidated {len(stale)} entries for {sorted(tables)}")
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            index = self._read_index()
+            for entry in index.values():
+                self._remove_file(entry["file"])
+            self._write_index({})
+
+    # ==================== INTERNALS ====================
+
+    def _publish(
+        self,
+        key: str,
+        tmp_path: str,
+        file_name: str,
+        table_names: List[str],
+        periods: Optional[List[Tuple[int, int]]],
+    ) -> None:
+        with self._lock:
+            os.replace(tmp_path, os.path.join(self.cache_dir, file_name))
+            index = self._read_index()
+            index[key] = {
+                "file": file_name,
+                "bytes": os.path.getsize(os.path.join(self.cache_dir, file_name)),
+                "last_access": time.time(),
+                "tables": table_names,
+                "periods": None if periods is None else [list(p) for p in periods],
+            }
+            self._evict(index)
+            self._write_index(index)
+
+    def _evict(self, index: Dict[str, Dict[str, Any]]) -> None:
+        """Evict least-recently-used entries until the cache fits max_bytes."""
+        total = sum(entry["bytes"] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            entry = index.pop(key)
+            self._remove_file(entry["file"])
+            total -= entry["bytes"]
+
+    def _iter_file(self, path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+        parquet_file = pq.ParquetFile(path)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield record_batch.to_pandas()
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        tmp_path = f"{self.index_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove_file(self, file_name: str) -> None:
+        try:
+            os.remove(os.path.join(self.cache_dir, file_name))
+        except FileNotFoundError:
+            pass
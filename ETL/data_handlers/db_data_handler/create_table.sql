@@ -34,3 +34,24 @@ CREATE INDEX ON holdings (cusip);
 CREATE INDEX ON holdings (cik);
 CREATE INDEX ON holdings (filingdate);
 
+
+-- Fund graph features (written by the network pipeline, read point-in-time)
+CREATE TABLE fund_graph_features (
+    cik TEXT NOT NULL,
+    degree NUMERIC,
+    pagerank NUMERIC,
+    hub NUMERIC,
+    authority NUMERIC,
+    closeness NUMERIC,
+    community INT,
+    cutoff DATE,
+    year INT,
+    quarter INT,
+    period_start DATE NOT NULL,
+    PRIMARY KEY (period_start, cik)
+)
+PARTITION BY RANGE (period_start);
+
+GRANT INSERT, DELETE, SELECT, UPDATE, TRUNCATE ON TABLE public.fund_graph_features TO asaf_user;
+
+CREATE INDEX ON fund_graph_features (cik, year, quarter);
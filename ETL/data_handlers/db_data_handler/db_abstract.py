@@ -1,9 +1,157 @@
 from abc import abstractmethod
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+QuarterSpec = Union[str, Tuple[int, int]]
 
 
 class AbstractDBHandler():
+    """Base class for holdings database handlers (schema and shared helpers)."""
+
+    # Column name -> SQL type of the partitioned holdings tables.
+    HOLDINGS_COLUMNS: Dict[str, str] = {
+        "accessionnumber": "TEXT",
+        "infotablesk": "TEXT",
+        "nameofissuer": "TEXT",
+        "cusip": "TEXT",
+        "value": "NUMERIC",
+        "sshprnamt": "BIGINT",
+        "filingdate": "DATE",
+        "cik": "TEXT",
+        "value_per_share": "NUMERIC",
+        "year": "INT",
+        "quarter": "INT",
+        "period_start": "DATE NOT NULL",
+    }
+
+    # Per-quarter (cik, cusip) aggregates of a holdings table, stored in a
+    # sibling table "<table>_edges" with the same quarterly partitioning.
+    EDGE_TABLE_SUFFIX = "_edges"
+    EDGE_COLUMNS: Dict[str, str] = {
+        "cik": "TEXT NOT NULL",
+        "cusip": "TEXT NOT NULL",
+        "total_value": "NUMERIC",
+        "total_shares": "BIGINT",
+        "line_count": "INT",
+        "year": "INT",
+        "quarter": "INT",
+        "period_start": "DATE NOT NULL",
+    }
+
+    # Fund graph features (network-pipeline snapshots), one row per fund and
+    # quarter, quarterly partitioned; read point-in-time by (cik, year, quarter).
+    FUND_FEATURE_TABLE = "fund_graph_features"
+    # Lookup key of point-in-time reads without as_of (latest available)
+    LATEST_QUARTER = (9999, 4)
+    FUND_FEATURE_COLUMNS: Dict[str, str] = {
+        "cik": "TEXT NOT NULL",
+        "degree": "NUMERIC",
+        "pagerank": "NUMERIC",
+        "hub": "NUMERIC",
+        "authority": "NUMERIC",
+        "closeness": "NUMERIC",
+        "community": "INT",
+        "cutoff": "DATE",
+        "year": "INT",
+        "quarter": "INT",
+        "period_start": "DATE NOT NULL",
+    }
+
+    DEFAULT_BATCH_SIZE = 250_000
 
     @abstractmethod
     def connect(self) -> None:
         pass
+
+    # ==================== SCHEMA HELPERS ====================
+
+    def _columns_for(self, table_name: str) -> Dict[str, str]:
+        """Return the column/type map of a managed table."""
+        if table_name.endswith(self.EDGE_TABLE_SUFFIX):
+            return self.EDGE_COLUMNS
+        if table_name == self.FUND_FEATURE_TABLE:
+            return self.FUND_FEATURE_COLUMNS
+        return self.HOLDINGS_COLUMNS
+
+    def _resolve_columns(
+        self, table_name: str, columns: Optional[Sequence[str]]
+    ) -> Dict[str, str]:
+        """Validate a column projection against the table schema."""
+        schema = self._columns_for(table_name)
+        if not columns:
+            return dict(schema)
+
+        unknown = [c for c in columns if c not in schema]
+        if unknown:
+            raise ValueError(f"Unknown columns for '{table_name}': {unknown}")
+        return {c: schema[c] for c in columns}
+
+    @staticmethod
+    def _parse_quarter(quarter: QuarterSpec) -> Tuple[int, int]:
+        """Accept "2024_Q1" (as in data/run.json) or a (year, quarter) tuple."""
+        if isinstance(quarter, str):
+            year, q = quarter.upper().split("_Q")
+            return int(year), int(q)
+        year, q = quarter
+        return int(year), int(q)
+
+    @classmethod
+    def _mark_latest(cls, result: pd.DataFrame, as_of) -> pd.DataFrame:
+        """Report an omitted as_of as NA (not the LATEST_QUARTER lookup key)."""
+        if as_of is None:
+            result["as_of_year"] = pd.NA
+            result["as_of_quarter"] = pd.NA
+        return result.astype({"as_of_year": "Int64", "as_of_quarter": "Int64"})
+
+    @classmethod
+    def _as_of_keys(
+        cls, ciks: Sequence[str], as_of: Union[QuarterSpec, Sequence[QuarterSpec]]
+    ) -> pd.DataFrame:
+        """
+        (cik, as_of_year, as_of_quarter) rows of a point-in-time lookup.
+
+        as_of is one quarter for all ciks or one quarter per cik.
+        """
+        ciks = [str(c) for c in ciks]
+        if isinstance(as_of, str) or (
+            isinstance(as_of, tuple) and len(as_of) == 2 and all(isinstance(v, (int, np.integer)) for v in as_of)
+        ):
+            periods = [cls._parse_quarter(as_of)] * len(ciks)
+        else:
+            periods = [cls._parse_quarter(q) for q in as_of]
+            if len(periods) != len(ciks):
+                raise ValueError(f"Got {len(periods)} as_of quarters for {len(ciks)} ciks")
+
+        keys = pd.DataFrame(periods, columns=["as_of_year", "as_of_quarter"], dtype="int64")
+        keys.insert(0, "cik", ciks)
+        return keys
+
+    @staticmethod
+    def _quarter_bounds(year: int, quarter: int) -> Tuple[str, str]:
+        """Return the [start, end) period_start range of a quarterly partition."""
+        start_month = {1: 1, 2: 4, 3: 7, 4: 10}[quarter]
+        start_date = f"{year}-{start_month:02d}-01"
+
+        if quarter == 4:
+            end_date = f"{year + 1}-01-01"
+        else:
+            end_date = f"{year}-{start_month + 3:02d}-01"
+
+        return start_date, end_date
+
+    @staticmethod
+    def _add_period_start(df: pd.DataFrame) -> pd.DataFrame:
+        if "year" not in df.columns or "quarter" not in df.columns:
+            raise ValueError("DataFrame must include 'year' and 'quarter'")
+
+        quarter_to_month = {1: 1, 2: 4, 3: 7, 4: 10}
+
+        df["period_start"] = pd.to_datetime(
+            df["year"].astype(str)
+            + "-"
+            + df["quarter"].map(quarter_to_month).astype(str)
+            + "-01"
+        )
+
+        return df
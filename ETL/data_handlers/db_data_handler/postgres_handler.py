@@ -1,11 +1,14 @@
 import io
 import os
+import re
+import threading
+import uuid
 from dotenv import load_dotenv
 import psycopg2
 from psycopg2.extras import execute_batch
-from typing import Optional, Set, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 import pandas as pd
-from data_handlers.db_data_handler.db_abstract import AbstractDBHandler
+from data_handlers.db_data_handler.db_abstract import AbstractDBHandler, QuarterSpec
 from logger.logger import ETLLogger
 
 load_dotenv()
@@ -14,6 +17,14 @@ load_dotenv()
 class PostgresHandler(AbstractDBHandler):
     """PostgreSQL database handler with automatic partition management."""
 
+    # SQL type -> pandas dtype used when decoding COPY output.
+    SQL_TO_PANDAS_DTYPE = {
+        "TEXT": "string",
+        "NUMERIC": "float64",
+        "BIGINT": "Int64",
+        "INT": "Int64",
+    }
+
     def __init__(self,):
         self.host = os.getenv("DB_HOST", "localhost")
         self.port = int(os.getenv("DB_PORT", 5432))
@@ -21,6 +32,9 @@ class PostgresHandler(AbstractDBHandler):
         self.user = os.getenv("DB_USER")
         self.password = os.getenv("DB_PASSWORD")
         self.connection: Optional[psycopg2.extensions.connection] = None
+        # table_name -> {partition_name: (start_date, end_date)}; a table is
+        # only present once it is known to exist as a partitioned parent.
+        self._schema_cache: Dict[str, Dict[str, Tuple[str, str]]] = {}
 
     # ==================== CONNECTION ====================
 
@@ -47,6 +61,7 @@ class PostgresHandler(AbstractDBHandler):
         if self.connection:
             self.connection.close()
             self.connection = None
+            self.invalidate_schema_cache()
             ETLLogger().info("Disconnected from PostgreSQL")
 
     # ==================== PUBLIC API ====================
@@ -78,53 +93,476 @@ class PostgresHandler(AbstractDBHandler):
         except Exception as e:
             ETLLogger().error(f"Insert failed: {str(e)}")
             self.connection.rollback()
+            self.invalidate_schema_cache(table_name)
             return 0
 
-    # ==================== SCHEMA MANAGEMENT ====================
+    def fetch_batches(
+        self,
+        table_name: str,
+        columns: Optional[Sequence[str]] = None,
+        quarters: Optional[Iterable[QuarterSpec]] = None,
+        ciks: Optional[Iterable[str]] = None,
+        cusips: Optional[Iterable[str]] = None,
+        issuer_pattern: Optional[str] = None,
+        batch_size: int = AbstractDBHandler.DEFAULT_BATCH_SIZE,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream rows of a partitioned table as bounded-size DataFrames.
+
+        Rows are streamed with COPY ... TO STDOUT through a pipe and decoded by
+        the pandas C parser straight into column arrays, so no per-row Python
+        tuples are built and at most ~batch_size rows are held in memory.
+        Quarter filters are expressed on the partition key (period_start), so
+        PostgreSQL prunes untouched partitions at plan time.
+
+        Args:
+            table_name: Partitioned table to read (e.g. "holdings").
+            columns: Columns to project (default: all columns).
+            quarters: Quarters to read, as "2024_Q1" strings or (year, quarter).
+            ciks: Restrict to these filer CIKs.
+            cusips: Restrict to these CUSIPs.
+            issuer_pattern: Case-insensitive LIKE pattern on nameofissuer
+                (e.g. "%APPLE%").
+            batch_size: Maximum number of rows per yielded DataFrame.
+
+        Yields:
+            DataFrames with the requested columns.
+        """
+        if not self.connection and not self.connect():
+            raise ConnectionError("Failed to establish database connection")
 
-    def _ensure_parent_table_exists(self, table_name: str) -> None:
-        """Create partitioned parent table if it does not exist."""
-        cursor = self.connection.cursor()
+        column_types = self._resolve_columns(table_name, columns)
+        sql, params = self._build_select(
+            table_name, list(column_types), quarters, ciks, cusips, issuer_pattern
+        )
 
-        cursor.execute(
-            """
-            SELECT EXISTS (
-                SELECT 1
-                FROM information_schema.tables
-                WHERE table_schema = 'public'
-                  AND table_name = %s
-            );
-            """,
-            (table_name,),
+        with self.connection.cursor() as cursor:
+            copy_sql = f"COPY ({cursor.mogrify(sql, params).decode()}) TO STDOUT WITH (FORMAT CSV)"
+
+        read_fd, write_fd = os.pipe()
+        reader = os.fdopen(read_fd, "rb")
+        writer = os.fdopen(write_fd, "wb")
+        copy_error: List[BaseException] = []
+
+        def run_copy() -> None:
+            try:
+                with self.connection.cursor() as copy_cursor:
+                    copy_cursor.copy_expert(copy_sql, writer)
+            except BaseException as e:  # surfaced to the consumer below
+                copy_error.append(e)
+            finally:
+                try:
+                    writer.close()
+                except OSError:
+                    pass
+
+        copy_thread = threading.Thread(
+            target=run_copy, name=f"copy-{table_name}-{uuid.uuid4().hex[:8]}", daemon=True
         )
+        copy_thread.start()
+
+        dtypes, date_columns = self._pandas_dtypes(column_types)
+        try:
+            chunks = pd.read_csv(
+                reader,
+                header=None,
+                names=list(column_types),
+                dtype=dtypes,
+                parse_dates=date_columns,
+                chunksize=batch_size,
+                engine="c",
+            )
+            for chunk in chunks:
+                yield chunk
+        except pd.errors.EmptyDataError:
+            pass
+        finally:
+            reader.close()
+            copy_thread.join()
+            if copy_error:
+                try:
+                    self.connection.rollback()
+                except psycopg2.Error:
+                    # COPY aborted mid-stream (consumer stopped early)
+                    self.disconnect()
+            else:
+                self.connection.commit()
+
+        if copy_error and not isinstance(copy_error[0], BrokenPipeError):
+            raise copy_error[0]
+
+    # ==================== EDGE AGGREGATES ====================
+
+    def refresh_edge_aggregates(
+        self, table_name: str, quarters: Iterable[QuarterSpec]
+    ) -> int:
+        """
+        Rebuild the (cik, cusip) aggregate partitions for the given quarters.
 
-        exists = cursor.fetchone()[0]
+        Each quarter's partition of "<table_name>_edges" is truncated and
+        refilled from the matching holdings partition in one transaction, so
+        graph building and top-holder queries read one row per fund-stock
+        pair instead of every filing line item.
 
-        if not exists:
-            ETLLogger().info(f"Creating parent table '{table_name}'")
+        Args:
+            table_name: Source holdings table (e.g. "holdings").
+            quarters: Quarters just loaded, as "2024_Q1" or (year, quarter).
 
+        Returns:
+            Number of aggregate rows written.
+        """
+        if not self.connection and not self.connect():
+            ETLLogger().error("Failed to establish database connection")
+            return 0
+
+        periods = sorted({self._parse_quarter(q) for q in quarters})
+        if not periods:
+            return 0
+
+        edges_table = f"{table_name}{self.EDGE_TABLE_SUFFIX}"
+        self._ensure_parent_table_exists(edges_table)
+        self._ensure_partitions_exist(
+            edges_table, pd.DataFrame(periods, columns=["year", "quarter"])
+        )
+
+        total_rows = 0
+        try:
+            with self.connection.cursor() as cursor:
+                for year, quarter in periods:
+                    partition_name = f"{edges_table}_{year}_q{quarter}"
+                    period_start = self._quarter_bounds(year, quarter)[0]
+
+                    cursor.execute(f"TRUNCATE {partition_name};")
+                    cursor.execute(
+                        f"""
+                        INSERT INTO {edges_table} (
+                            cik, cusip, total_value, total_shares, line_count,
+                            year, quarter, period_start
+                        )
+                        SELECT cik,
+                               cusip,
+                               SUM(value),
+                               SUM(sshprnamt)::BIGINT,
+                               COUNT(*),
+                               %(year)s,
+                               %(quarter)s,
+                               %(period_start)s::date
+                        FROM {table_name}
+                        WHERE period_start = %(period_start)s::date
+                          AND cik IS NOT NULL
+                          AND cusip IS NOT NULL
+                        GROUP BY cik, cusip;
+                        """,
+                        {"year": year, "quarter": quarter, "period_start": period_start},
+                    )
+                    ETLLogger().info(
+                        f"Refreshed '{partition_name}' ({cursor.rowcount} fund-stock edges)"
+                    )
+                    total_rows += cursor.rowcount
+            self.connection.commit()
+        except psycopg2.Error as e:
+            ETLLogger().error(f"Edge aggregate refresh failed: {str(e)}")
+            self.connection.rollback()
+            self.invalidate_schema_cache(edges_table)
+            return 0
+
+        return total_rows
+
+    # ==================== FUND FEATURES ====================
+
+    def write_fund_features(
+        self, df: pd.DataFrame, table_name: str = AbstractDBHandler.FUND_FEATURE_TABLE
+    ) -> int:
+        """
+        Replace the fund graph features of every quarter present in df.
+
+        Each quarter's partition is truncated and refilled with COPY in one
+        transaction, so the graph stage can publish a quarter as soon as its
+        snapshot is computed and re-publishing a quarter is idempotent.
+
+        Args:
+            df: One row per (cik, year, quarter) with FUND_FEATURE_COLUMNS.
+            table_name: Feature table.
+
+        Returns:
+            Number of rows written.
+        """
+        if not self.connection and not self.connect():
+            ETLLogger().error("Failed to establish database connection")
+            return 0
+
+        df = self._add_period_start(df.copy())
+        columns = [c for c in self._columns_for(table_name) if c in df.columns]
+        self._ensure_parent_table_exists(table_name)
+        self._ensure_partitions_exist(table_name, df)
+
+        total_rows = 0
+        try:
+            with self.connection.cursor() as cursor:
+                for (year, quarter), chunk in df.groupby(["year", "quarter"]):
+                    partition_name = f"{table_name}_{year}_q{quarter}"
+                    buffer = io.StringIO()
+                    chunk[columns].to_csv(buffer, index=False, header=False, na_rep="\\N")
+                    buffer.seek(0)
+
+                    cursor.execute(f"TRUNCATE {partition_name};")
+                    cursor.copy_expert(
+                        f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')",
+                        buffer,
+                    )
+                    ETLLogger().info(f"Refreshed '{partition_name}' ({len(chunk)} funds)")
+                    total_rows += len(chunk)
+            self.connection.commit()
+        except psycopg2.Error as e:
+            ETLLogger().error(f"Fund feature write failed: {str(e)}")
+            self.connection.rollback()
+            self.invalidate_schema_cache(table_name)
+            return 0
+
+        return total_rows
+
+    def fetch_fund_features(
+        self,
+        ciks: Optional[Iterable[str]] = None,
+        as_of: Optional[QuarterSpec] = None,
+        columns: Optional[Sequence[str]] = None,
+        table_name: str = AbstractDBHandler.FUND_FEATURE_TABLE,
+    ) -> pd.DataFrame:
+        """
+        Point-in-time fund features: the latest row of each fund at or before
+        its as_of quarter.
+
+        With ciks, the keys are sent as arrays and every fund is resolved by a
+        LATERAL backward scan of the (cik, year, quarter) index (one probe per
+        fund). Without ciks, all funds are read with DISTINCT ON over the
+        partitions up to as_of.
+
+        Args:
+            ciks: Funds to look up (default: all funds).
+            as_of: Quarter of the lookup, as "2024_Q1" or (year, quarter), or
+                one quarter per cik (default: latest available).
+            columns: Feature columns to return (default: all).
+            table_name: Feature table.
+
+        Returns:
+            DataFrame with as_of_year, as_of_quarter (NA when as_of is
+            omitted) and the selected columns (cik, year and quarter always
+            included); funds without features up to their as_of quarter are
+            omitted.
+        """
+        if not self.connection and not self.connect():
+            raise ConnectionError("Failed to establish database connection")
+
+        keys = ["cik", "year", "quarter"]
+        column_types = self._resolve_columns(
+            table_name, None if columns is None else keys + [c for c in columns if c not in keys]
+        )
+        if self._load_schema_cache(table_name) is None:
+            ETLLogger().warning(f"Table '{table_name}' does not exist")
+            return pd.DataFrame(columns=["as_of_year", "as_of_quarter", *column_types])
+
+        selected = ", ".join(f"f.{c}" for c in column_types)
+
+        if ciks is not None:
+            key_frame = self._as_of_keys(list(ciks), as_of if as_of is not None else self.LATEST_QUARTER)
+            sql = f"""
+                SELECT k.as_of_year, k.as_of_quarter, {selected}
+                FROM unnest(%(ciks)s::text[], %(years)s::int[], %(quarters)s::int[])
+                     AS k(cik, as_of_year, as_of_quarter)
+                CROSS JOIN LATERAL (
+                    SELECT *
+                    FROM {table_name} t
+                    WHERE t.cik = k.cik
+                      AND (t.year, t.quarter) <= (k.as_of_year, k.as_of_quarter)
+                    ORDER BY t.year DESC, t.quarter DESC
+                    LIMIT 1
+                ) f;
+            """
+            params = {
+                "ciks": key_frame["cik"].tolist(),
+                "years": key_frame["as_of_year"].tolist(),
+                "quarters": key_frame["as_of_quarter"].tolist(),
+            }
+        else:
+            year, quarter = self._parse_quarter(as_of) if as_of is not None else (None, None)
+            sql = f"""
+                SELECT DISTINCT ON (f.cik) %(year)s::int AS as_of_year, %(quarter)s::int AS as_of_quarter, {selected}
+                FROM {table_name} f
+                {"WHERE f.period_start <= %(period_start)s::date" if as_of is not None else ""}
+                ORDER BY f.cik, f.period_start DESC;
+            """
+            params = {
+                "year": year,
+                "quarter": quarter,
+                "period_start": None if as_of is None else self._quarter_bounds(year, quarter)[0],
+            }
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        self.connection.commit()
+
+        result = pd.DataFrame(rows, columns=["as_of_year", "as_of_quarter", *column_types])
+        dtypes, date_columns = self._pandas_dtypes(column_types)
+        result = self._mark_latest(result.astype(dtypes), as_of)
+        for column in date_columns:
+            result[column] = pd.to_datetime(result[column])
+        return result
+
+    # ==================== READ HELPERS ====================
+
+    def _build_select(
+        self,
+        table_name: str,
+        columns: List[str],
+        quarters: Optional[Iterable[QuarterSpec]],
+        ciks: Optional[Iterable[str]],
+        cusips: Optional[Iterable[str]],
+        issuer_pattern: Optional[str] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build a parameterized SELECT with partition-prunable filters."""
+        conditions = []
+        params: Dict[str, Any] = {}
+
+        if quarters is not None:
+            params["period_starts"] = sorted(
+                {self._quarter_bounds(*self._parse_quarter(q))[0] for q in quarters}
+            )
+            conditions.append("period_start = ANY(%(period_starts)s::date[])")
+        if ciks is not None:
+            params["ciks"] = sorted({str(c) for c in ciks})
+            conditions.append("cik = ANY(%(ciks)s)")
+        if cusips is not None:
+            params["cusips"] = sorted({str(c) for c in cusips})
+            conditions.append("cusip = ANY(%(cusips)s)")
+        if issuer_pattern is not None:
+            params["issuer_pattern"] = issuer_pattern
+            conditions.append("nameofissuer ILIKE %(issuer_pattern)s")
+
+        sql = f"SELECT {', '.join(columns)} FROM {table_name}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql, params
+
+    def _pandas_dtypes(self, column_types: Dict[str, str]) -> Tuple[Dict[str, str], List[str]]:
+        """Map SQL column types to read_csv dtypes and date columns."""
+        dtypes: Dict[str, str] = {}
+        date_columns: List[str] = []
+        for name, sql_type in column_types.items():
+            base_type = sql_type.split()[0]
+            if base_type == "DATE":
+                date_columns.append(name)
+            else:
+                dtypes[name] = self.SQL_TO_PANDAS_DTYPE.get(base_type, "string")
+        return dtypes, date_columns
+
+    # ==================== SCHEMA CACHE ====================
+
+    def invalidate_schema_cache(self, table_name: Optional[str] = None) -> None:
+        """Drop cached catalog metadata for one table (or all tables)."""
+        if table_name is None:
+            self._schema_cache.clear()
+        else:
+            self._schema_cache.pop(table_name, None)
+
+    def _load_schema_cache(self, table_name: str) -> Optional[Dict[str, Tuple[str, str]]]:
+        """
+        Populate the cache for a table with a single catalog round trip.
+
+        Reads the parent table and the bounds of all its partitions from
+        pg_class/pg_inherits (much cheaper than information_schema on large
+        catalogs).
+
+        Returns:
+            Mapping partition_name -> (start_date, end_date), or None if the
+            parent table does not exist.
+        """
+        if table_name in self._schema_cache:
+            return self._schema_cache[table_name]
+
+        with self.connection.cursor() as cursor:
             cursor.execute(
-                f"""
-                CREATE TABLE {table_name} (
-                    accessionnumber TEXT,
-                    infotablesk TEXT,
-                    nameofissuer TEXT,
-                    cusip TEXT,
-                    value NUMERIC,
-                    sshprnamt BIGINT,
-                    filingdate DATE,
-                    cik TEXT,
-                    value_per_share NUMERIC,
-                    year INT,
-                    quarter INT,
-                    period_start DATE NOT NULL
-                )
-                PARTITION BY RANGE (period_start);
                 """
+                SELECT child.relname,
+                       pg_get_expr(child.relpartbound, child.oid)
+                FROM pg_class parent
+                JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+                LEFT JOIN pg_inherits inh ON inh.inhparent = parent.oid
+                LEFT JOIN pg_class child ON child.oid = inh.inhrelid
+                WHERE ns.nspname = 'public'
+                  AND parent.relkind IN ('r', 'p')
+                  AND parent.relname = %s;
+                """,
+                (table_name,),
             )
+            rows = cursor.fetchall()
+        self.connection.commit()
+
+        if not rows:
+            return None
+
+        partitions: Dict[str, Tuple[str, str]] = {}
+        for partition_name, bound in rows:
+            if partition_name is None:
+                continue
+            partitions[partition_name] = self._parse_partition_bound(bound)
+
+        self._schema_cache[table_name] = partitions
+        return partitions
+
+    @staticmethod
+    def _parse_partition_bound(bound: Optional[str]) -> Tuple[str, str]:
+        """Parse "FOR VALUES FROM ('2024-01-01') TO ('2024-04-01')" into dates."""
+        values = re.findall(r"'([^']*)'", bound or "")
+        if len(values) >= 2:
+            return values[0], values[1]
+        return "", ""
+
+    # ==================== SCHEMA MANAGEMENT ====================
+
+    def _ensure_parent_table_exists(self, table_name: str) -> None:
+        """Create partitioned parent table if it does not exist."""
+        if self._load_schema_cache(table_name) is not None:
+            return
+
+        ETLLogger().info(f"Creating parent table '{table_name}'")
+
+        try:
+            with self.connection.cursor() as cursor:
+                columns_sql = ",\n".join(
+                    f"{name} {sql_type}"
+                    for name, sql_type in self._columns_for(table_name).items()
+                )
+                if table_name.endswith(self.EDGE_TABLE_SUFFIX):
+                    columns_sql += ",\nPRIMARY KEY (period_start, cik, cusip)"
+                elif table_name == self.FUND_FEATURE_TABLE:
+                    columns_sql += ",\nPRIMARY KEY (period_start, cik)"
+                cursor.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table_name} (
+                        {columns_sql}
+                    )
+                    PARTITION BY RANGE (period_start);
+                    """
+                )
+                if table_name.endswith(self.EDGE_TABLE_SUFFIX):
+                    cursor.execute(
+                        f"CREATE INDEX IF NOT EXISTS {table_name}_cusip_idx "
+                        f"ON {table_name} (cusip);"
+                    )
+                elif table_name == self.FUND_FEATURE_TABLE:
+                    # point-in-time lookups: latest (year, quarter) per cik
+                    cursor.execute(
+                        f"CREATE INDEX IF NOT EXISTS {table_name}_cik_period_idx "
+                        f"ON {table_name} (cik, year, quarter);"
+                    )
             self.connection.commit()
+        except psycopg2.Error:
+            self.connection.rollback()
+            self.invalidate_schema_cache(table_name)
+            raise
 
-        cursor.close()
+        self._schema_cache[table_name] = {}
 
     # def _ensure_indexes_exist(self, table_name: str) -> None:
     #     """Create indexes on parent table (propagated to partitions)."""
@@ -158,76 +596,58 @@ class PostgresHandler(AbstractDBHandler):
     #     cursor.close()
 
     def _ensure_partitions_exist(self, table_name: str, df: pd.DataFrame) -> None:
-        """Create missing quarterly partitions based on DataFrame contents."""
+        """
+        Create missing quarterly partitions based on DataFrame contents.
 
-        cursor = self.connection.cursor()
+        Existence is answered from the schema cache; all missing partitions are
+        created in a single transaction. On a DDL error the transaction is
+        rolled back and the table's cache entry is dropped so the next call
+        re-reads the catalog.
+        """
+        known = self._load_schema_cache(table_name)
+        if known is None:
+            self._ensure_parent_table_exists(table_name)
+            known = self._schema_cache[table_name]
 
         partitions: Set[Tuple[int, int]] = set(
             zip(df["year"].astype(int), df["quarter"].astype(int))
         )
 
-        for year, quarter in partitions:
-            start_month = {1: 1, 2: 4, 3: 7, 4: 10}[quarter]
-            start_date = f"{year}-{start_month:02d}-01"
-
-            if quarter == 4:
-                end_date = f"{year + 1}-01-01"
-            else:
-                end_date = f"{year}-{start_month + 3:02d}-01"
-
+        missing: Dict[str, Tuple[str, str]] = {}
+        for year, quarter in sorted(partitions):
             partition_name = f"{table_name}_{year}_q{quarter}"
+            if partition_name in known:
+                ETLLogger().debug(f"Partition '{partition_name}' already exists")
+                continue
+            missing[partition_name] = self._quarter_bounds(year, quarter)
 
-            # Check if partition already exists
-            cursor.execute(
-                """
-                SELECT EXISTS (
-                    SELECT 1
-                    FROM information_schema.tables
-                    WHERE table_schema = 'public'
-                      AND table_name = %s
-                );
-                """,
-                (partition_name,),
-            )
+        if not missing:
+            return
 
-            if not cursor.fetchone()[0]:
-                try:
+        try:
+            with self.connection.cursor() as cursor:
+                for partition_name, (start_date, end_date) in missing.items():
                     ETLLogger().info(f"Creating partition '{partition_name}'")
                     cursor.execute(
                         f"""
-                        CREATE TABLE {partition_name}
+                        CREATE TABLE IF NOT EXISTS {partition_name}
                         PARTITION OF {table_name}
                         FOR VALUES FROM ('{start_date}') TO ('{end_date}');
                         """
                     )
-                except psycopg2.Error as e:
-                    ETLLogger().warning(f"Failed to create partition '{partition_name}': {str(e)}")
-                    self.connection.rollback()
-                    cursor = self.connection.cursor()
-            else:
-                ETLLogger().info(f"Partition '{partition_name}' already exists")
+            self.connection.commit()
+        except psycopg2.Error as e:
+            ETLLogger().warning(
+                f"Failed to create partitions {sorted(missing)} on '{table_name}': {str(e)}"
+            )
+            self.connection.rollback()
+            self.invalidate_schema_cache(table_name)
+            return
 
-        self.connection.commit()
-        cursor.close()
+        known.update(missing)
 
     # ==================== DATA INSERT ====================
 
-    @staticmethod
-    def _add_period_start(df: pd.DataFrame) -> pd.DataFrame:
-        if "year" not in df.columns or "quarter" not in df.columns:
-            raise ValueError("DataFrame must include 'year' and 'quarter'")
-
-        quarter_to_month = {1: 1, 2: 4, 3: 7, 4: 10}
-
-        df["period_start"] = pd.to_datetime(
-            df["year"].astype(str)
-            + "-"
-            + df["quarter"].map(quarter_to_month).astype(str)
-            + "-01"
-        )
-
-        return df
-
     # def _insert_data(self, table_name: str, df: pd.DataFrame) -> int:
     #     cursor = self.connection.cursor()
     #
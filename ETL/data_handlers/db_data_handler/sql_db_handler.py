@@ -1,27 +1,466 @@
+import json
+import os
 import sqlite3
-from typing import Any, List
-from data_handlers.db_data_handler.db_abstract import AbstractDBHandler
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import pandas as pd
+from data_handlers.db_data_handler.db_abstract import AbstractDBHandler, QuarterSpec
+from logger.logger import ETLLogger
 
 
 class SQLDBHandler(AbstractDBHandler):
+    """
+    Embedded SQLite handler with the same public API as PostgresHandler.
 
-    def __init__(self, conn_str: str):
-        self.conn_str = conn_str
-        self.conn = None
+    SQLite has no range partitioning, so each managed table is a single table
+    whose rows are inserted in (year, quarter) order and indexed on
+    (year, quarter, ...).
 
-    def connect(self) -> None:
-        self.conn = sqlite3.connect(self.conn_str)
+    A single load keeps the indexes (they are built, and the table analyzed,
+    only when missing). A backfill runs between begin_bulk_load() and
+    finalize_load(): the secondary indexes are dropped, edge refreshes are
+    queued, and finalize_load() builds the indexes, runs ANALYZE and
+    refreshes the queued edge quarters once.
+    """
 
-    def query(self, sql: str) -> List[Any]:
+    # SQL type (holdings schema) -> SQLite storage type.
+    SQLITE_TYPES = {
+        "TEXT": "TEXT",
+        "NUMERIC": "REAL",
+        "BIGINT": "INTEGER",
+        "INT": "INTEGER",
+        "DATE": "TEXT",
+    }
+
+    # Connection pragmas tuned for single-writer bulk loads.
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "cache_size": -262144,  # 256 MB
+        "mmap_size": 1 << 30,  # 1 GB
+    }
+
+    INSERT_CHUNK_SIZE = 100_000
+
+    def __init__(self, conn_str: Optional[str] = None):
+        self.conn_str = conn_str or os.getenv("SQLITE_PATH", "13f_outputs/holdings.sqlite")
+        self.conn: Optional[sqlite3.Connection] = None
+        self.bulk_load = False
+        # tables loaded during the bulk load, and quarters whose edge
+        # aggregates wait for finalize_load()
+        self._bulk_tables: set = set()
+        self._pending_edges: Dict[str, set] = {}
+
+    # ==================== CONNECTION ====================
+
+    def connect(self) -> bool:
+        try:
+            directory = os.path.dirname(self.conn_str)
+            if directory and self.conn_str != ":memory:":
+                os.makedirs(directory, exist_ok=True)
+
+            # autocommit mode: transactions are opened explicitly with BEGIN
+            self.conn = sqlite3.connect(self.conn_str, isolation_level=None)
+            for pragma, value in self.PRAGMAS.items():
+                self.conn.execute(f"PRAGMA {pragma}={value};")
+
+            ETLLogger().info(f"Connected to SQLite: {self.conn_str}")
+            return True
+        except sqlite3.Error as e:
+            ETLLogger().error(f"SQLite connection failed: {str(e)}")
+            self.conn = None
+            return False
+
+    def disconnect(self) -> None:
+        if self.conn:
+            self.conn.execute("PRAGMA optimize;")
+            self.conn.close()
+            self.conn = None
+            ETLLogger().info("Disconnected from SQLite")
+
+    def close(self):
+        self.disconnect()
+
+    # ==================== GENERIC SQL ====================
+
+    def query(self, sql: str, params: tuple | None = None) -> List[Any]:
         cursor = self.conn.cursor()
-        cursor.execute(sql)
+        cursor.execute(sql, params or ())
         return cursor.fetchall()
 
     def execute(self, sql: str, params: tuple | None = None):
-        cursor = self.conn.cursor()
-        cursor.execute(sql, params or ())
-        self.conn.commit()
+        self.conn.execute(sql, params or ())
 
-    def close(self):
-        if self.conn:
-            self.conn.close()
+    # ==================== PUBLIC API ====================
+
+    def insert_dataframe(self, df: pd.DataFrame, table_name: str) -> int:
+        """
+        Bulk insert a DataFrame with executemany in a single transaction.
+
+        Rows are sorted by (year, quarter) so each quarter is stored
+        contiguously. Outside a bulk load, missing indexes are created after
+        the rows are written; during one they are left to finalize_load().
+        """
+        if not self.conn and not self.connect():
+            ETLLogger().error("Failed to establish database connection")
+            return 0
+
+        try:
+            df = self._add_period_start(df)
+            self._ensure_table_exists(table_name)
+            if self.bulk_load and table_name not in self._bulk_tables:
+                self._drop_indexes(table_name)
+                self._bulk_tables.add(table_name)
+
+            columns = [c for c in self._columns_for(table_name) if c in df.columns]
+            df = df.sort_values(["year", "quarter"], kind="stable")
+            rows = self._to_rows(df[columns])
+
+            insert_sql = (
+                f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))});"
+            )
+
+            self.conn.execute("BEGIN;")
+            for start in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+                self.conn.executemany(insert_sql, rows[start : start + self.INSERT_CHUNK_SIZE])
+            self.conn.execute("COMMIT;")
+
+            for (year, quarter), count in df.groupby(["year", "quarter"]).size().items():
+                ETLLogger().info(f"Loaded {year} Q{quarter} ({count} rows)")
+
+            if not self.bulk_load:
+                self._ensure_indexes_exist(table_name)
+            ETLLogger().info(f"Loaded total {len(rows)} records into '{table_name}'")
+            return len(rows)
+
+        except Exception as e:
+            ETLLogger().error(f"Insert failed: {str(e)}")
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK;")
+            return 0
+
+    def refresh_edge_aggregates(
+        self, table_name: str, quarters: Iterable[QuarterSpec]
+    ) -> int:
+        """
+        Rebuild the (cik, cusip) aggregates of the given quarters (see PostgresHandler).
+
+        During a bulk load the quarters are queued for finalize_load(), since
+        each refresh would scan the unindexed table.
+        """
+        periods = sorted({self._parse_quarter(q) for q in quarters})
+        if not periods:
+            return 0
+
+        if self.bulk_load:
+            self._pending_edges.setdefault(table_name, set()).update(periods)
+            ETLLogger().info(f"Bulk load: edge refresh of {len(periods)} quarters of '{table_name}' deferred")
+            return 0
+
+        if not self.conn and not self.connect():
+            ETLLogger().error("Failed to establish database connection")
+            return 0
+
+        edges_table = f"{table_name}{self.EDGE_TABLE_SUFFIX}"
+        self._ensure_table_exists(edges_table)
+
+        total_rows = 0
+        try:
+            self.conn.execute("BEGIN;")
+            for year, quarter in periods:
+                self.conn.execute(
+                    f"DELETE FROM {edges_table} WHERE year = ? AND quarter = ?;",
+                    (year, quarter),
+                )
+                cursor = self.conn.execute(
+                    f"""
+                    INSERT INTO {edges_table} (
+                        cik, cusip, total_value, total_shares, line_count,
+                        year, quarter, period_start
+                    )
+                    SELECT cik, cusip, SUM(value), SUM(sshprnamt), COUNT(*),
+                           year, quarter, MIN(period_start)
+                    FROM {table_name}
+                    WHERE year = ? AND quarter = ?
+                      AND cik IS NOT NULL
+                      AND cusip IS NOT NULL
+                    GROUP BY cik, cusip, year, quarter;
+                    """,
+                    (year, quarter),
+                )
+                ETLLogger().info(
+                    f"Refreshed '{edges_table}' {year} Q{quarter} ({cursor.rowcount} fund-stock edges)"
+                )
+                total_rows += cursor.rowcount
+            self.conn.execute("COMMIT;")
+        except sqlite3.Error as e:
+            ETLLogger().error(f"Edge aggregate refresh failed: {str(e)}")
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK;")
+            return 0
+
+        return total_rows
+
+    # ==================== BULK LOAD ====================
+
+    def begin_bulk_load(self) -> None:
+        """
+        Start a backfill: the secondary indexes of each table are dropped on
+        its first insert, and index builds, ANALYZE and edge refreshes are
+        deferred to finalize_load().
+        """
+        self.bulk_load = True
+        ETLLogger().info("Bulk load started: index builds and edge refreshes deferred")
+
+    def finalize_load(self) -> int:
+        """
+        End a backfill: build the indexes of every table loaded since
+        begin_bulk_load(), ANALYZE them and refresh the queued edge quarters.
+
+        Returns:
+            Number of edge rows written.
+        """
+        if not self.conn and not self.connect():
+            ETLLogger().error("Failed to establish database connection")
+            return 0
+
+        self.bulk_load = False
+        tables, self._bulk_tables = sorted(self._bulk_tables), set()
+        for table_name in tables:
+            self._ensure_indexes_exist(table_name)
+
+        pending, self._pending_edges = self._pending_edges, {}
+        edge_rows = sum(self.refresh_edge_aggregates(table, quarters) for table, quarters in pending.items())
+        ETLLogger().info(f"Bulk load finalized: indexed {tables}, {edge_rows} edge rows refreshed")
+        return edge_rows
+
+    def write_fund_features(
+        self, df: pd.DataFrame, table_name: str = AbstractDBHandler.FUND_FEATURE_TABLE
+    ) -> int:
+        """Replace the fund graph features of every quarter in df (see PostgresHandler)."""
+        if not self.conn and not self.connect():
+            ETLLogger().error("Failed to establish database connection")
+            return 0
+
+        df = self._add_period_start(df.copy())
+        self._ensure_table_exists(table_name)
+        columns = [c for c in self._columns_for(table_name) if c in df.columns]
+        insert_sql = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))});"
+        )
+
+        total_rows = 0
+        try:
+            self.conn.execute("BEGIN;")
+            for (year, quarter), chunk in df.groupby(["year", "quarter"]):
+                self.conn.execute(
+                    f"DELETE FROM {table_name} WHERE year = ? AND quarter = ?;",
+                    (int(year), int(quarter)),
+                )
+                self.conn.executemany(insert_sql, self._to_rows(chunk[columns]))
+                ETLLogger().info(f"Refreshed '{table_name}' {year} Q{quarter} ({len(chunk)} funds)")
+                total_rows += len(chunk)
+            self.conn.execute("COMMIT;")
+        except sqlite3.Error as e:
+            ETLLogger().error(f"Fund feature write failed: {str(e)}")
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK;")
+            return 0
+
+        return total_rows
+
+    def fetch_fund_features(
+        self,
+        ciks: Optional[Iterable[str]] = None,
+        as_of: Optional[QuarterSpec] = None,
+        columns: Optional[Sequence[str]] = None,
+        table_name: str = AbstractDBHandler.FUND_FEATURE_TABLE,
+    ) -> pd.DataFrame:
+        """Point-in-time fund features (see PostgresHandler.fetch_fund_features)."""
+        if not self.conn and not self.connect():
+            raise ConnectionError("Failed to establish database connection")
+
+        keys = ["cik", "year", "quarter"]
+        column_types = self._resolve_columns(
+            table_name, None if columns is None else keys + [c for c in columns if c not in keys]
+        )
+        self._ensure_table_exists(table_name)
+        selected = ", ".join(f"f.{c}" for c in column_types)
+
+        if ciks is not None:
+            # one primary-key probe per fund
+            key_frame = self._as_of_keys(list(ciks), as_of if as_of is not None else self.LATEST_QUARTER)
+            sql = f"""
+                WITH k(cik, as_of_year, as_of_quarter) AS (
+                    SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]')
+                    FROM json_each(?)
+                )
+                SELECT k.as_of_year, k.as_of_quarter, {selected}
+                FROM k
+                JOIN {table_name} f
+                  ON f.cik = k.cik
+                 AND (f.year, f.quarter) = (
+                     SELECT year, quarter
+                     FROM {table_name}
+                     WHERE cik = k.cik
+                       AND (year, quarter) <= (k.as_of_year, k.as_of_quarter)
+                     ORDER BY year DESC, quarter DESC
+                     LIMIT 1
+                 );
+            """
+            params = [json.dumps([
+                [cik, int(year), int(quarter)] for cik, year, quarter in key_frame.itertuples(index=False)
+            ])]
+        else:
+            year, quarter = self._parse_quarter(as_of) if as_of is not None else (None, None)
+            sql = f"""
+                SELECT ? AS as_of_year, ? AS as_of_quarter, {selected}
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY cik ORDER BY year DESC, quarter DESC) AS rank
+                    FROM {table_name}
+                    {"WHERE (year, quarter) <= (?, ?)" if as_of is not None else ""}
+                ) f
+                WHERE f.rank = 1;
+            """
+            params = [year, quarter] + ([year, quarter] if as_of is not None else [])
+
+        date_columns = [c for c, t in column_types.items() if t.split()[0] == "DATE"]
+        result = pd.read_sql_query(sql, self.conn, params=params, parse_dates=date_columns)
+        return self._mark_latest(result, as_of)
+
+    def fetch_batches(
+        self,
+        table_name: str,
+        columns: Optional[Sequence[str]] = None,
+        quarters: Optional[Iterable[QuarterSpec]] = None,
+        ciks: Optional[Iterable[str]] = None,
+        cusips: Optional[Iterable[str]] = None,
+        issuer_pattern: Optional[str] = None,
+        batch_size: int = AbstractDBHandler.DEFAULT_BATCH_SIZE,
+    ) -> Iterator[pd.DataFrame]:
+        """Stream rows as bounded-size DataFrames (see PostgresHandler.fetch_batches)."""
+        if not self.conn and not self.connect():
+            raise ConnectionError("Failed to establish database connection")
+
+        column_types = self._resolve_columns(table_name, columns)
+        sql, params = self._build_select(
+            table_name, list(column_types), quarters, ciks, cusips, issuer_pattern
+        )
+        date_columns = [c for c, t in column_types.items() if t.split()[0] == "DATE"]
+
+        yield from pd.read_sql_query(
+            sql, self.conn, params=params, parse_dates=date_columns, chunksize=batch_size
+        )
+
+    # ==================== SCHEMA MANAGEMENT ====================
+
+    def _ensure_table_exists(self, table_name: str) -> None:
+        """Create a managed table (without secondary indexes) if missing."""
+        columns_sql = ",\n".join(
+            f"{name} {self._sqlite_type(sql_type)}"
+            for name, sql_type in self._columns_for(table_name).items()
+        )
+
+        if table_name.endswith(self.EDGE_TABLE_SUFFIX):
+            # clustered on the quarter: rows live in primary-key order
+            self.conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table_name} (
+                    {columns_sql},
+                    PRIMARY KEY (year, quarter, cik, cusip)
+                ) WITHOUT ROWID;
+                """
+            )
+        elif table_name == self.FUND_FEATURE_TABLE:
+            # clustered on the point-in-time lookup key
+            self.conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table_name} (
+                    {columns_sql},
+                    PRIMARY KEY (cik, year, quarter)
+                ) WITHOUT ROWID;
+                """
+            )
+        else:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({columns_sql});")
+
+    @staticmethod
+    def _index_definitions(table_name: str) -> Dict[str, str]:
+        """Secondary index name -> columns of a holdings table."""
+        return {
+            f"{table_name}_period_idx": "year, quarter, cik, cusip",
+            f"{table_name}_cusip_idx": "cusip, year, quarter",
+        }
+
+    def _drop_indexes(self, table_name: str) -> None:
+        for index_name in self._index_definitions(table_name):
+            self.conn.execute(f"DROP INDEX IF EXISTS {index_name};")
+
+    def _ensure_indexes_exist(self, table_name: str) -> None:
+        """Create the quarter-leading indexes if missing and ANALYZE the table when any was built."""
+        existing = {
+            name for (name,) in self.query(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?;", (table_name,)
+            )
+        }
+        missing = {name: cols for name, cols in self._index_definitions(table_name).items() if name not in existing}
+        for index_name, columns in missing.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns});")
+        if missing:
+            self.conn.execute(f"ANALYZE {table_name};")
+
+    def _sqlite_type(self, sql_type: str) -> str:
+        base_type, _, constraint = sql_type.partition(" ")
+        return f"{self.SQLITE_TYPES.get(base_type, 'TEXT')} {constraint}".strip()
+
+    # ==================== HELPERS ====================
+
+    def _build_select(
+        self,
+        table_name: str,
+        columns: List[str],
+        quarters: Optional[Iterable[QuarterSpec]],
+        ciks: Optional[Iterable[str]],
+        cusips: Optional[Iterable[str]],
+        issuer_pattern: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """Build a SELECT; value lists are bound as one JSON array each."""
+        conditions = []
+        params: List[Any] = []
+
+        if quarters is not None:
+            periods = sorted({self._parse_quarter(q) for q in quarters})
+            conditions.append(
+                "(" + " OR ".join("(year = ? AND quarter = ?)" for _ in periods) + ")"
+                if periods
+                else "0"
+            )
+            for year, quarter in periods:
+                params.extend([year, quarter])
+        if ciks is not None:
+            conditions.append("cik IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(sorted({str(c) for c in ciks})))
+        if cusips is not None:
+            conditions.append("cusip IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(sorted({str(c) for c in cusips})))
+        if issuer_pattern is not None:
+            # LIKE is case-insensitive for ASCII in SQLite
+            conditions.append("nameofissuer LIKE ?")
+            params.append(issuer_pattern)
+
+        sql = f"SELECT {', '.join(columns)} FROM {table_name}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql, params
+
+    @staticmethod
+    def _to_rows(df: pd.DataFrame) -> List[tuple]:
+        """Convert a DataFrame to sqlite3-bindable tuples (NaN -> NULL, dates -> ISO)."""
+        df = df.copy()
+        for col in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = df[col].dt.strftime("%Y-%m-%d")
+        df = df.astype(object).where(df.notna(), None)
+        return list(df.itertuples(index=False, name=None))
@@ -5,6 +5,8 @@ from ETL.dal.dal import DAL
 from manipulation.manipulation import DataManipulation
 from load.load import DataLoader
 from logger.logger import ETLLogger
+from profiler.profiler import StageProfiler
+from ETL.universe.index_universe import IndexUniverse
 from dotenv import load_dotenv
 import json
 from ETL.utils.utils import ETLUtils
@@ -35,8 +37,11 @@ def main():
     #QA
     # if debug_mode:
     # running_lst = [running_lst[0]]
+    # backfill: indexes, statistics and edge aggregates are built once at the end
+    DAL.begin_bulk_load()
     for quarter in running_lst:
         etl(quarter)
+    DAL.finalize_load()
     return 0
 
 def etl(quarter):
@@ -44,61 +49,72 @@ def etl(quarter):
 
     # ==================== INITIALIZATION ====================
     ETLLogger(name="ETL_Pipeline", console_output=True)
+    # opt-in via ETL_PROFILE=cprofile|sampling and/or ETL_PROFILE_MEMORY=1
+    profiler = StageProfiler(label="_".join(quarter) if isinstance(quarter, (list, tuple)) else str(quarter))
+    # opt-in via ETL_UNIVERSE=spy|russell3000: only rows of index constituents are loaded
+    universe = IndexUniverse.from_env()
+
+    # one profiling run per quarter: collapsed stacks and summary cover all stages
+    with profiler.run():
+        # ==================== EXTRACT ====================
+        ETLLogger().info("=" * 80)
+        ETLLogger().info("STAGE 1: EXTRACTION")
+        ETLLogger().info("=" * 80)
 
-    # ==================== EXTRACT ====================
-    ETLLogger().info("=" * 80)
-    ETLLogger().info("STAGE 1: EXTRACTION")
-    ETLLogger().info("=" * 80)
-
-    try:
-        context = ExtractorContext(extractor_type="sec", quarters=quarter)
-        df = context.execute()
-
-        ETLLogger().info(f"Extraction complete: {len(df)} records")
-    except Exception as e:
-        ETLLogger().error(f"Extraction failed: {str(e)}")
-        ETLLogger().exception("Extraction error details:")
-        return 1
-
-    if debug_mode:
-        df = df.head(20)
+        try:
+            with profiler.stage("EXTRACTION"):
+                context = ExtractorContext(extractor_type="sec", quarters=quarter, universe=universe)
+                df = context.execute()
 
-    # ==================== MANIPULATION ====================
-    ETLLogger().info("")
-    ETLLogger().info("=" * 80)
-    ETLLogger().info("STAGE 2: MANIPULATION")
-    ETLLogger().info("=" * 80)
+            ETLLogger().info(f"Extraction complete: {len(df)} records")
+        except Exception as e:
+            ETLLogger().error(f"Extraction failed: {str(e)}")
+            ETLLogger().exception("Extraction error details:")
+            return 1
 
-    try:
-        manipulator = DataManipulation()
-        df = manipulator.manipulate(df)
+        if debug_mode:
+            df = df.head(20)
 
-        ETLLogger().info(f"Manipulation complete: {len(df)} records")
-    except Exception as e:
-        ETLLogger().error(f"Manipulation failed: {str(e)}")
-        ETLLogger().exception("Manipulation error details:")
-        return 1
+        # ==================== MANIPULATION ====================
+        ETLLogger().info("")
+        ETLLogger().info("=" * 80)
+        ETLLogger().info("STAGE 2: MANIPULATION")
+        ETLLogger().info("=" * 80)
 
-    # ==================== LOAD WITH PARTITIONING ====================
-    ETLLogger().info("")
-    ETLLogger().info("=" * 80)
-    ETLLogger().info("STAGE 3: LOAD & PARTITIONING")
-    ETLLogger().info("=" * 80)
+        try:
+            with profiler.stage("MANIPULATION"):
+                manipulator = DataManipulation(profiler=profiler, universe=universe)
+                df = manipulator.manipulate(df)
+
+            ETLLogger().info(f"Manipulation complete: {len(df)} records")
+        except Exception as e:
+            ETLLogger().error(f"Manipulation failed: {str(e)}")
+            ETLLogger().exception("Manipulation error details:")
+            return 1
+
+        # ==================== LOAD WITH PARTITIONING ====================
+        ETLLogger().info("")
+        ETLLogger().info("=" * 80)
+        ETLLogger().info("STAGE 3: LOAD & PARTITIONING")
+        ETLLogger().info("=" * 80)
 
-    try:
-        DAL.load_data(df)
+        try:
+            with profiler.stage("LOAD"):
+                DAL.load_data(df)
 
-        ETLLogger().info("Load complete: data saved with medians and partitions in single operation")
-    except Exception as e:
-        ETLLogger().error(f"Load failed: {str(e)}")
-        ETLLogger().exception("Load error details:")
-        return 1
+            ETLLogger().info("Load complete: data saved with medians and partitions in single operation")
+        except Exception as e:
+            ETLLogger().error(f"Load failed: {str(e)}")
+            ETLLogger().exception("Load error details:")
+            return 1
 
     # ==================== COMPLETION ====================
     ETLLogger().info("")
     ETLLogger().info("=" * 80)
     ETLLogger().info("✓ ETL PIPELINE COMPLETED SUCCESSFULLY")
     ETLLogger().info("=" * 80)
+    if universe is not None:
+        universe.log_metrics()
     ETLLogger().info(f"Log file saved to: {ETLLogger().get_log_file()}")
 
     ETLLogger().close()
@@ -1,21 +1,79 @@
 import pandas as pd
 import os
-from ETL.load.postgres_loader import PostgresLoader
+from typing import Iterator, Optional
 from logger.logger import ETLLogger
 
 
 class DataLoader:
+    """
+    Loads DataFrames into the configured database backend.
 
-    def __init__(self, output_dir: str = "13f_outputs"):
+    The backend is chosen by the `backend` argument or the DB_BACKEND
+    environment variable: "postgres" (default) or "sqlite".
+    """
+
+    BACKENDS = ("postgres", "sqlite")
+
+    def __init__(self, output_dir: str = "13f_outputs", backend: Optional[str] = None):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
-        self.postgres = PostgresLoader()
+        self.backend = (backend or os.getenv("DB_BACKEND", "postgres")).lower()
+        self.db_loader = self._create_loader(self.backend)
+
+    def _create_loader(self, backend: str):
+        """Factory method to create the backend loader (imports are backend-local)."""
+        if backend == "postgres":
+            from ETL.load.postgres_loader import PostgresLoader
+
+            return PostgresLoader()
+        if backend == "sqlite":
+            from ETL.load.sqlite_loader import SQLiteLoader
+
+            return SQLiteLoader(os.getenv("SQLITE_PATH", os.path.join(self.output_dir, "holdings.sqlite")))
+
+        raise ValueError(f"Unknown DB backend: {backend}. Available: {list(self.BACKENDS)}")
 
     def load_to_db(self, df: pd.DataFrame) -> None:
         """
-        Load DataFrame to PostgreSQL holding table.
+        Load DataFrame to the holding table of the configured backend.
 
         Args:
             df: DataFrame to load
         """
-        self.postgres.load(df, table_name="holdings", if_exists="append")
\ No newline at end of file
+        self.db_loader.load(df, table_name="holdings", if_exists="append")
+
+    def begin_bulk_load(self) -> None:
+        """Start a multi-quarter backfill (see SQLDBHandler.begin_bulk_load)."""
+        self.db_loader.begin_bulk_load()
+
+    def finalize_load(self) -> bool:
+        """Post-load step of a backfill: deferred indexes, statistics and edges."""
+        return self.db_loader.finalize_load()
+
+    def read_from_db(self, table_name: str = "holdings", **filters) -> Iterator[pd.DataFrame]:
+        """
+        Read a table from the configured backend as an iterator of DataFrame batches.
+
+        Args:
+            table_name: Source table
+            **filters: columns, quarters, ciks, cusips, batch_size
+        """
+        return self.db_loader.read(table_name, **filters)
+
+    def load_fund_features(self, df: pd.DataFrame) -> bool:
+        """
+        Write per-quarter fund graph features to the configured backend.
+
+        Args:
+            df: One row per (cik, year, quarter) with the feature columns
+        """
+        return self.db_loader.load_fund_features(df)
+
+    def read_fund_features(self, **filters) -> pd.DataFrame:
+        """
+        Point-in-time fund graph features from the configured backend.
+
+        Args:
+            **filters: ciks, as_of, columns
+        """
+        return self.db_loader.read_fund_features(**filters)
@@ -1,5 +1,5 @@
 import pandas as pd
-from typing import Optional
+from typing import Iterator, Optional
 from data_handlers.db_data_handler.postgres_handler import PostgresHandler
 from logger.logger import ETLLogger
 
@@ -26,7 +26,50 @@ class PostgresLoader:
         """
         try:
             insert_count = self.handler.insert_dataframe(df, table_name)
+            if insert_count > 0:
+                loaded_quarters = set(
+                    zip(df["year"].astype(int), df["quarter"].astype(int))
+                )
+                self.handler.refresh_edge_aggregates(table_name, loaded_quarters)
             return insert_count > 0
         except Exception as e:
             ETLLogger().error(f"PostgreSQL load failed: {str(e)}")
             return False
+
+    def begin_bulk_load(self) -> None:
+        """No-op: partitions are loaded with COPY and indexed per partition."""
+
+    def finalize_load(self) -> bool:
+        """No-op (see begin_bulk_load)."""
+        return True
+
+    def read(self, table_name: str, **filters) -> Iterator[pd.DataFrame]:
+        """
+        Stream a PostgreSQL table in bounded-size batches.
+
+        Args:
+            table_name: Source table name
+            **filters: columns, quarters, ciks, cusips, batch_size
+                (see PostgresHandler.fetch_batches)
+
+        Returns:
+            Iterator of DataFrames
+        """
+        return self.handler.fetch_batches(table_name, **filters)
+
+    def load_fund_features(self, df: pd.DataFrame) -> bool:
+        """
+        Replace the fund graph features of the quarters in df.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            return self.handler.write_fund_features(df) > 0
+        except Exception as e:
+            ETLLogger().error(f"PostgreSQL fund feature load failed: {str(e)}")
+            return False
+
+    def read_fund_features(self, **filters) -> pd.DataFrame:
+        """Point-in-time fund features (see PostgresHandler.fetch_fund_features)."""
+        return self.handler.fetch_fund_features(**filters)
@@ -0,0 +1,80 @@
+import pandas as pd
+from typing import Iterator, Optional
+from data_handlers.db_data_handler.sql_db_handler import SQLDBHandler
+from logger.logger import ETLLogger
+
+
+class SQLiteLoader:
+    """Handles loading DataFrames to an embedded SQLite database using SQLDBHandler."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.handler = SQLDBHandler(db_path)
+
+    def load(
+        self, df: pd.DataFrame, table_name: str, if_exists: str = "append"
+    ) -> bool:
+        """
+        Load DataFrame to SQLite table.
+
+        Args:
+            df: DataFrame to load
+            table_name: Target table name
+            if_exists: 'fail', 'replace', or 'append'
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            insert_count = self.handler.insert_dataframe(df, table_name)
+            if insert_count > 0:
+                loaded_quarters = set(
+                    zip(df["year"].astype(int), df["quarter"].astype(int))
+                )
+                self.handler.refresh_edge_aggregates(table_name, loaded_quarters)
+            return insert_count > 0
+        except Exception as e:
+            ETLLogger().error(f"SQLite load failed: {str(e)}")
+            return False
+
+    def begin_bulk_load(self) -> None:
+        """Defer index builds and edge refreshes until finalize_load() (backfills)."""
+        self.handler.begin_bulk_load()
+
+    def finalize_load(self) -> bool:
+        """Build the deferred indexes, ANALYZE and refresh the queued edge quarters."""
+        try:
+            self.handler.finalize_load()
+            return True
+        except Exception as e:
+            ETLLogger().error(f"SQLite finalize failed: {str(e)}")
+            return False
+
+    def read(self, table_name: str, **filters) -> Iterator[pd.DataFrame]:
+        """
+        Stream a SQLite table in bounded-size batches.
+
+        Args:
+            table_name: Source table name
+            **filters: columns, quarters, ciks, cusips, batch_size
+
+        Returns:
+            Iterator of DataFrames
+        """
+        return self.handler.fetch_batches(table_name, **filters)
+
+    def load_fund_features(self, df: pd.DataFrame) -> bool:
+        """
+        Replace the fund graph features of the quarters in df.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            return self.handler.write_fund_features(df) > 0
+        except Exception as e:
+            ETLLogger().error(f"SQLite fund feature load failed: {str(e)}")
+            return False
+
+    def read_fund_features(self, **filters) -> pd.DataFrame:
+        """Point-in-time fund features (see SQLDBHandler.fetch_fund_features)."""
+        return self.handler.fetch_fund_features(**filters)
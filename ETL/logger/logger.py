@@ -1,7 +1,23 @@
 import logging
 import os
+import queue
+import time
 from datetime import datetime
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records unformatted.
+
+    The stdlib QueueHandler formats the message in the calling thread; here
+    %-style args are merged by the listener thread instead, so the producing
+    (worker) thread only pays for building the LogRecord.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 class ETLLogger:
@@ -10,6 +26,7 @@ class ETLLogger:
     LOG_DIR = "logs"
     LOG_LEVEL = logging.INFO
     MAX_LOG_FILES = 2  # Keep only 2 most recent log files
+    PROGRESS_INTERVAL = 2.0  # Seconds between progress lines per key
 
     _instance = None
     _initialized = False
@@ -19,6 +36,7 @@ class ETLLogger:
         name: str = "ETL_Pipeline",
         log_dir: Optional[str] = None,
         console_output: bool = True,
+        async_mode: Optional[bool] = None,
     ):
         """Implement singleton pattern - return same instance."""
         if cls._instance is None:
@@ -30,6 +48,7 @@ class ETLLogger:
         name: str = "ETL_Pipeline",
         log_dir: Optional[str] = None,
         console_output: bool = True,
+        async_mode: Optional[bool] = None,
     ):
         """
         Initialize logger instance (only once due to singleton).
@@ -38,6 +57,8 @@ class ETLLogger:
             name: Logger name.
             log_dir: Directory to save logs (default: logs/).
             console_output: Whether to also output to console/stdout (default: True).
+            async_mode: Low-overhead mode - records are queued and written by a
+                background listener thread (default: ETL_LOG_ASYNC env var, off).
         """
         # Only initialize once
         if ETLLogger._initialized:
@@ -46,6 +67,11 @@ class ETLLogger:
         self.name = name
         self.log_dir = log_dir or self.LOG_DIR
         self.console_output = console_output
+        if async_mode is None:
+            async_mode = os.getenv("ETL_LOG_ASYNC", "0") == "1"
+        self.async_mode = async_mode
+        self._listener: Optional[QueueListener] = None
+        self._progress_last: Dict[str, float] = {}
         os.makedirs(self.log_dir, exist_ok=True)
 
         # Clean up old logs before creating new one
@@ -70,6 +96,10 @@ class ETLLogger:
         if self.console_output:
             self._setup_console_handler(formatter)
 
+        # Async mode - move the real handlers behind a queue listener thread
+        if self.async_mode:
+            self._setup_queue_listener()
+
         ETLLogger._initialized = True
 
     def _cleanup_old_logs(self) -> None:
@@ -119,6 +149,17 @@ class ETLLogger:
 
         self.logger.addHandler(console_handler)
 
+    def _setup_queue_listener(self) -> None:
+        """Route records through a queue drained by a background listener."""
+        handlers = list(self.logger.handlers)
+        self.logger.handlers.clear()
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.logger.addHandler(_DeferredQueueHandler(log_queue))
+
+        self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+
     # ==================== SINGLETON UTILITY METHODS ====================
 
     @classmethod
@@ -137,37 +178,76 @@ class ETLLogger:
         cls._initialized = False
 
     # ==================== LOGGING METHODS ====================
+    # Messages may use %-style args (e.g. debug("Parsed %d files", n)); they
+    # are only formatted if the level is enabled.
 
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args) -> None:
         """Log info message."""
-        self.logger.info(message)
+        self.logger.info(message, *args)
 
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, *args) -> None:
         """Log debug message."""
-        self.logger.debug(message)
+        self.logger.debug(message, *args)
 
-    def warning(self, message: str) -> None:
+    def warning(self, message: str, *args) -> None:
         """Log warning message."""
-        self.logger.warning(message)
+        self.logger.warning(message, *args)
 
-    def error(self, message: str) -> None:
+    def error(self, message: str, *args) -> None:
         """Log error message."""
-        self.logger.error(message)
+        self.logger.error(message, *args)
 
-    def critical(self, message: str) -> None:
+    def critical(self, message: str, *args) -> None:
         """Log critical message."""
-        self.logger.critical(message)
+        self.logger.critical(message, *args)
 
-    def exception(self, message: str) -> None:
+    def exception(self, message: str, *args) -> None:
         """Log exception with traceback."""
-        self.logger.exception(message)
+        self.logger.exception(message, *args)
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Cheap level check for guarding expensive message construction."""
+        return self.logger.isEnabledFor(level)
+
+    def progress(
+        self,
+        key: str,
+        message: str,
+        *args,
+        level: int = logging.DEBUG,
+        force: bool = False,
+    ) -> None:
+        """
+        Log a progress line at most once per PROGRESS_INTERVAL seconds per key.
+
+        Args:
+            key: Progress stream identifier (e.g. the URL being downloaded).
+            message: %-style message, formatted only when emitted.
+            level: Log level (default: DEBUG).
+            force: Emit regardless of the interval (e.g. for the final update).
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+
+        now = time.monotonic()
+        if not force and now - self._progress_last.get(key, 0.0) < self.PROGRESS_INTERVAL:
+            return
+
+        self._progress_last[key] = now
+        self.logger.log(level, message, *args)
 
     def get_log_file(self) -> str:
         """Get path to current log file."""
         return self.log_file
 
     def close(self) -> None:
-        """Close all handlers."""
-        for handler in self.logger.handlers:
+        """Close all handlers (flushing the queue listener first in async mode)."""
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+
+        for handler in list(self.logger.handlers):
             handler.close()
             self.logger.removeHandler(handler)
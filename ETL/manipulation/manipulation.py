@@ -1,14 +1,24 @@
+import logging
 import pandas as pd
 import numpy as np
 from typing import Optional, List
 from logger.logger import ETLLogger
+from profiler.profiler import StageProfiler
+from ETL.universe.index_universe import IndexUniverse
 
 
 class DataManipulation:
     """Handles data transformation, cleaning, and enrichment."""
 
-    def __init__(self, logger: Optional[ETLLogger] = None):
+    def __init__(
+        self,
+        logger: Optional[ETLLogger] = None,
+        profiler: Optional[StageProfiler] = None,
+        universe: Optional[IndexUniverse] = None,
+    ):
         self.logger = logger or ETLLogger(name="DataManipulation")
+        self.profiler = profiler or StageProfiler(mode="off", memory=False)
+        self.universe = universe
 
     # ==================== MAIN ORCHESTRATION ====================
 
@@ -17,6 +27,7 @@ class DataManipulation:
         Execute all manipulation operations in fixed sequence:
         1. Drop irrelevant columns
         2. Lowercase column names
+        2.5. Keep rows in the index universe (if one is set)
         3. Clean data (strip cusip, remove duplicates, trim whitespace)
         4. Filter by period (2013_2Q and later)
         5. Add computed fields (value_per_share)
@@ -28,29 +39,42 @@ class DataManipulation:
         self.logger.info("MANIPULATION PIPELINE - EXECUTING ALL STEPS")
 
         self.logger.info("[1/8] Converting column names to lowercase")
-        df = self.lowercase_columns(df)
+        with self.profiler.stage("lowercase_columns"):
+            df = self.lowercase_columns(df)
 
         self.logger.info("[1.5/8] Converting column names to remove underscore")
-        df = self.remove_underscore(df)
+        with self.profiler.stage("remove_underscore"):
+            df = self.remove_underscore(df)
 
         self.logger.info("[2/8] Dropping irrelevant columns")
-        df = self.drop_irrelevant_columns(df)
+        with self.profiler.stage("drop_irrelevant_columns"):
+            df = self.drop_irrelevant_columns(df)
+
+        if self.universe is not None:
+            self.logger.info("[2.5/8] Filtering to universe %s", self.universe.name)
+            with self.profiler.stage("filter_by_universe"):
+                df = self.filter_by_universe(df)
 
         self.logger.info("[3/8] Cleaning data")
-        df = self.clean_data(df)
+        with self.profiler.stage("clean_data"):
+            df = self.clean_data(df)
 
         self.logger.info("[4/8] Filtering by period")
-        df = self.filter_by_period(df)
+        with self.profiler.stage("filter_by_period"):
+            df = self.filter_by_period(df)
 
         self.logger.info("[5/8] Adding computed fields")
-        df = self.add_computed_fields(df)
+        with self.profiler.stage("add_computed_fields"):
+            df = self.add_computed_fields(df)
 
-        df = self.change_period_of_report_format(df)
+        with self.profiler.stage("change_period_of_report_format"):
+            df = self.change_period_of_report_format(df)
 
-        df = self.fix_column_typing_issue_with_median(df)
+        with self.profiler.stage("fix_column_typing_issue_with_median"):
+            df = self.fix_column_typing_issue_with_median(df)
 
         df = df.drop(columns=['is_complete'])
-        self.logger.info(f"MANIPULATION COMPLETE: {len(df)} records")
+        self.logger.info("MANIPULATION COMPLETE: %s records", len(df))
         return df
 
     # ==================== COLUMN OPERATIONS ====================
@@ -73,19 +97,38 @@ class DataManipulation:
         ]
         cols_to_drop = [col for col in irrelevant_cols if col in df.columns]
         df = df.drop(columns=cols_to_drop)
-        self.logger.info(f"Dropped {len(cols_to_drop)} irrelevant columns")
+        self.logger.info("Dropped %s irrelevant columns", len(cols_to_drop))
         return df
 
     def lowercase_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """Convert all column names to lowercase."""
         df.columns = df.columns.str.lower()
-        self.logger.info(f"Lowercase: {df.shape[1]} columns standardized")
+        self.logger.info("Lowercase: %s columns standardized", df.shape[1])
         return df
 
     def remove_underscore(self, df: pd.DataFrame) -> pd.DataFrame:
         """Remove underscores from all column names."""
         df.columns = df.columns.str.replace("_", "")
-        self.logger.info(f"Underscores removed: {df.shape[1]} columns standardized")
+        self.logger.info("Underscores removed: %s columns standardized", df.shape[1])
+        return df
+
+    # ==================== UNIVERSE FILTERING ====================
+
+    def filter_by_universe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keep holdings whose cusip is in the universe at their period of report.
+
+        Runs before cleaning, so the remaining steps only see universe rows.
+
+        Args:
+            df: Input DataFrame (lowercase column names).
+
+        Returns:
+            Filtered DataFrame.
+        """
+        original_count = len(df)
+        df = self.universe.filter(df, stage="manipulation", period_col="periodofreport", cusip_col="cusip")
+        self.logger.info("Universe %s: removed %s records", self.universe.name, original_count - len(df))
         return df
 
     # ==================== DATA CLEANING ====================
@@ -108,7 +151,7 @@ class DataManipulation:
             df = df[df["putcall"].isna() | (df["putcall"].str.strip() == "")]
             removed_putcall = original_count - len(df)
             if removed_putcall > 0:
-                self.logger.info(f"Removed {removed_putcall} rows with putcall values")
+                self.logger.info("Removed %s rows with putcall values", removed_putcall)
 
             # Drop the put_call column
             df = df.drop(columns=["putcall"])
@@ -124,14 +167,14 @@ class DataManipulation:
         removed_dupes = original_count - len(df)
 
         if removed_dupes > 0:
-            self.logger.info(f"Removed {removed_dupes} duplicate rows")
+            self.logger.info("Removed %s duplicate rows", removed_dupes)
 
         key_fields = ["cusip", "value"]
         for field in key_fields:
             if field in df.columns:
                 df = df[df[field].notna()]
 
-        self.logger.info(f"Clean: {len(df)} records remaining")
+        self.logger.info("Clean: %s records remaining", len(df))
         return df
 
     # ==================== PERIOD FILTERING ====================
@@ -153,7 +196,7 @@ class DataManipulation:
             df = df[df["periodofreport"] >= min_period]
             filtered_count = original_count - len(df)
             self.logger.info(
-                f"Filtered: removed {filtered_count} records before {min_period}"
+                "Filtered: removed %s records before %s", filtered_count, min_period
             )
         return df
 
@@ -181,7 +224,7 @@ class DataManipulation:
             if col in df.columns:
                 df[col] = df[col].str.upper()
 
-        self.logger.info(f"Standardized: {df.shape[1]} columns")
+        self.logger.info("Standardized: %s columns", df.shape[1])
         return df
 
     # ==================== COMPUTED FIELDS ====================
@@ -210,7 +253,7 @@ class DataManipulation:
         # Add data quality flag
         df["is_complete"] = (df.notna().sum(axis=1) >= df.shape[1] * 0.8).astype(int)
 
-        self.logger.info(f"Added computed fields")
+        self.logger.info("Added computed fields")
         return df
 
 
@@ -231,13 +274,13 @@ class DataManipulation:
             if valid_periods.shape[1] >= 2:
                 df.loc[mask_valid, "year"] = valid_periods[0].astype(int)
                 df.loc[mask_valid, "quarter"] = valid_periods[1].str[1].astype(int)
-                self.logger.info(f"Extracted year/quarter for {mask_valid.sum()} records")
+                self.logger.info("Extracted year/quarter for %s records", mask_valid.sum())
             else:
                 raise ValueError("periodofreport format invalid (expected YYYY_QX)")
 
             invalid_count = (~mask_valid).sum()
             if invalid_count > 0:
-                self.logger.warning(f"Skipped {invalid_count} records with null/empty periodofreport")
+                self.logger.warning("Skipped %s records with null/empty periodofreport", invalid_count)
 
             df = df.drop(columns=["periodofreport"])
             return df
@@ -253,7 +296,7 @@ class DataManipulation:
         try:
             required_cols = ["year", "quarter", "value_per_share", "sshprnamt"]
             if not all(col in df.columns for col in required_cols):
-                self.logger.warning(f"Missing required columns for median fix: {required_cols}")
+                self.logger.warning("Missing required columns for median fix: %s", required_cols)
                 return df
             
             if df.empty:
@@ -265,14 +308,16 @@ class DataManipulation:
 
             df["value"] = df["value_per_share"] * df["sshprnamt"]
             
-            self.logger.info(
-                f"Fixed column typing: Applied median value_per_share for "
-                f"{df.groupby(['year', 'quarter']).ngroups} (year, quarter) groups")
+            if self.logger.is_enabled_for(logging.INFO):
+                self.logger.info(
+                    "Fixed column typing: Applied median value_per_share for %s (year, quarter) groups",
+                    df.groupby(['year', 'quarter']).ngroups,
+                )
             
             return df
             
         except Exception as e:
-            self.logger.error(f"Error in fix_column_typing_issue_with_median: {str(e)}")
+            self.logger.error("Error in fix_column_typing_issue_with_median: %s", e)
             raise
 
     # ==================== GROUPING & AGGREGATION ====================
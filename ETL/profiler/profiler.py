@@ -0,0 +1,247 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+from logger.logger import ETLLogger
+
+
+class _StackSampler(threading.Thread):
+    """
+    Background thread that samples every other thread's Python stack.
+
+    Samples are aggregated as collapsed stacks ("root;...;leaf count"), with
+    the active stage path and the thread name as the root frames, which is
+    the input format of flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, profiler: "StageProfiler", interval: float):
+        super().__init__(name="etl-stack-sampler", daemon=True)
+        self.profiler = profiler
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            stage_path = self.profiler.current_stage_path()
+            if not stage_path:
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or names.get(thread_id, "").startswith("etl-"):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                root = stage_path + [names.get(thread_id, str(thread_id))]
+                self.samples[";".join(root + stack)] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class StageProfiler:
+    """
+    Opt-in profiling of pipeline stages and manipulation steps.
+
+    Controlled by environment variables:
+        ETL_PROFILE: "off" (default), "cprofile" or "sampling".
+        ETL_PROFILE_MEMORY: "1" to record tracemalloc allocation reports
+            (traces every allocation, expect a large slowdown on object
+            columns; combine with "off" for a memory-only run).
+        ETL_PROFILE_INTERVAL: sampling interval in seconds (default 0.005).
+
+    Reports are written next to the ETLLogger log file, per run label
+    (quarter):
+        profile_<label>.collapsed           sampling mode, all stages
+        profile_<label>_<stage>.prof/.txt   cProfile mode, top-level stages
+        alloc_<label>_<stage>.txt           top allocations per stage
+        profile_<label>_summary.txt         wall time / peak memory per stage
+
+    Wrap the stages of a quarter in run() so the sampler and tracemalloc run
+    once and the collapsed stacks and summary cover every stage. A top-level
+    stage outside run() is a run of its own and its collapsed/summary files
+    carry the stage name.
+    """
+
+    MODES = ("off", "cprofile", "sampling")
+    TOP_N = 40
+
+    def __init__(
+        self,
+        label: str = "run",
+        mode: Optional[str] = None,
+        memory: Optional[bool] = None,
+        output_dir: Optional[str] = None,
+    ):
+        """
+        Args:
+            label: Run label used in report file names (e.g. "2024_Q1").
+            mode: Profiling mode (default: ETL_PROFILE env var).
+            memory: Enable tracemalloc (default: ETL_PROFILE_MEMORY env var).
+            output_dir: Report directory (default: directory of the log file).
+        """
+        self.label = label
+        self.mode = (mode or os.getenv("ETL_PROFILE", "off")).lower()
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown profiling mode: {self.mode}. Available: {list(self.MODES)}")
+        self.memory = memory if memory is not None else os.getenv("ETL_PROFILE_MEMORY", "0") == "1"
+        self.interval = float(os.getenv("ETL_PROFILE_INTERVAL", 0.005))
+        self.output_dir = output_dir
+
+        self._stack: List[Dict] = []
+        self._timings: List[Dict] = []
+        self._sampler: Optional[_StackSampler] = None
+        self._started_tracemalloc = False
+        self._in_run = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off" or self.memory
+
+    def current_stage_path(self) -> List[str]:
+        return [entry["name"] for entry in self._stack]
+
+    # ==================== STAGES ====================
+
+    def run(self):
+        """Context manager around all stages of one run; reports are written on exit."""
+        if not self.enabled:
+            return nullcontext()
+        return self._profile_run()
+
+    @contextmanager
+    def _profile_run(self):
+        self._start_run()
+        self._in_run = True
+        try:
+            yield
+        finally:
+            self._in_run = False
+            self._finish_run()
+
+    def stage(self, name: str):
+        """Context manager profiling one stage (nestable); no-op when disabled."""
+        if not self.enabled:
+            return nullcontext()
+        return self._profile_stage(name)
+
+    @contextmanager
+    def _profile_stage(self, name: str):
+        entry = {"name": name, "peak": 0, "profile": None, "snapshot": None}
+        is_top_level = not self._stack
+        owns_run = is_top_level and not self._in_run
+
+        if owns_run:
+            self._start_run()
+        if self.memory:
+            entry["snapshot"] = tracemalloc.take_snapshot()
+            # keep the parent's peak so far before the nested stage resets it
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        if self.mode == "cprofile" and is_top_level:
+            entry["profile"] = cProfile.Profile()
+            entry["profile"].enable()
+
+        self._stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            stage_name = "/".join(self.current_stage_path() + [name])
+
+            if entry["profile"] is not None:
+                entry["profile"].disable()
+                self._write_cprofile(stage_name, entry["profile"])
+
+            peak = 0
+            if self.memory:
+                peak = max(entry["peak"], tracemalloc.get_traced_memory()[1])
+                self._write_allocations(stage_name, entry["snapshot"])
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+
+            self._timings.append({"stage": stage_name, "seconds": elapsed, "peak_bytes": peak})
+
+            if owns_run:
+                self._finish_run(stage_name)
+
+    # ==================== RUN LIFECYCLE ====================
+
+    def _start_run(self) -> None:
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            self._started_tracemalloc = True
+        if self.mode == "sampling" and self._sampler is None:
+            self._sampler = _StackSampler(self, self.interval)
+            self._sampler.start()
+
+    def _finish_run(self, stage: Optional[str] = None) -> None:
+        """Stop collectors and write the run reports (stage: implicit single-stage run)."""
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._write_collapsed(self._sampler.samples, stage)
+            self._sampler = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._write_summary(stage)
+
+    # ==================== REPORTS ====================
+
+    def _report_path(self, kind: str, stage: Optional[str], ext: str) -> str:
+        directory = self.output_dir or os.path.dirname(ETLLogger().get_log_file()) or "."
+        os.makedirs(directory, exist_ok=True)
+        parts = [kind, self.label] + ([stage.replace("/", "_")] if stage else [])
+        return os.path.join(directory, "_".join(parts) + ext)
+
+    def _write_cprofile(self, stage: str, profile: cProfile.Profile) -> None:
+        path = self._report_path("profile", stage, ".prof")
+        profile.dump_stats(path)
+
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(self.TOP_N)
+        with open(self._report_path("profile", stage, ".txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+        ETLLogger().info(f"Profile for {stage} written to {path}")
+
+    def _write_collapsed(self, samples: Counter, stage: Optional[str] = None) -> None:
+        path = self._report_path("profile", stage, ".collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        ETLLogger().info(f"Sampled stacks ({sum(samples.values())} samples) written to {path}")
+
+    def _write_allocations(self, stage: str, before: tracemalloc.Snapshot) -> None:
+        stats = tracemalloc.take_snapshot().compare_to(before, "lineno")
+
+        with open(self._report_path("alloc", stage, ".txt"), "w", encoding="utf-8") as f:
+            f.write(f"Top {self.TOP_N} allocation deltas for {stage}\n")
+            for stat in stats[: self.TOP_N]:
+                f.write(f"{stat}\n")
+
+    def _write_summary(self, stage: Optional[str] = None) -> None:
+        path = self._report_path("profile", f"{stage}/summary" if stage else "summary", ".txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"{'stage':<60} {'seconds':>10} {'peak_MB':>10}\n")
+            for timing in self._timings:
+                f.write(
+                    f"{timing['stage']:<60} {timing['seconds']:>10.3f} "
+                    f"{timing['peak_bytes'] / 1024 ** 2:>10.1f}\n"
+                )
+        self._timings = []
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+ETL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ETL_DIR, os.path.dirname(ETL_DIR)]
+
+
+@pytest.fixture(autouse=True)
+def _run_in_tmp_path(tmp_path, monkeypatch):
+    """ETLLogger writes logs/ under the working directory."""
+    monkeypatch.chdir(tmp_path)
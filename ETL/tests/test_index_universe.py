@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from Extractors.External.sec_extraction_strategy import SECExtractionStrategy
+from logger.logger import ETLLogger
+from ETL.manipulation.manipulation import DataManipulation
+from ETL.universe.index_universe import IndexUniverse, previous_quarter
+
+
+def _universe() -> IndexUniverse:
+    # LEFT left the index in 2025 Q1, JOINED joined it then
+    return (
+        IndexUniverse("test")
+        .add(["STAY", "LEFT"], "2024_Q4")
+        .add(["STAY", "JOINED"], "2025_Q1")
+    )
+
+
+def _filed_2025_q1() -> pd.DataFrame:
+    """Infotable rows of the 2025_Q1 dataset: mostly Q4 2024 reports, one late Q1 2025 report."""
+    return pd.DataFrame({
+        "cusip": ["STAY", "LEFT", "JOINED", "OTHER", "LEFT"],
+        "periodofreport": ["31-DEC-2024", "31-DEC-2024", "31-MAR-2025", "31-DEC-2024", "31-MAR-2025"],
+    })
+
+
+def test_previous_quarter():
+    assert previous_quarter("2025_Q1") == (2024, 4)
+    assert previous_quarter((2025, 3)) == (2025, 2)
+
+
+def test_extraction_keeps_every_row_the_point_in_time_filter_keeps():
+    universe = _universe()
+    rows = _filed_2025_q1()
+
+    extracted = SECExtractionStrategy._apply_universe_filter(
+        SimpleNamespace(universe=universe, logger=ETLLogger()), rows, "2025_Q1"
+    )
+    manipulated = DataManipulation(universe=universe).filter_by_universe(extracted)
+    point_in_time = DataManipulation(universe=_universe()).filter_by_universe(rows)
+
+    assert manipulated.index.tolist() == point_in_time.index.tolist() == [0, 1, 2]
+    assert set(extracted["cusip"]) == {"STAY", "LEFT", "JOINED"}
+
+
+def test_filter_any_records_metrics():
+    universe = _universe()
+    universe.filter_any(_filed_2025_q1(), stage="extract", as_ofs=["2024_Q4", "2025_Q1"])
+    metrics = universe.metrics().set_index("stage")
+    assert metrics.loc["extract", "rows_in"] == 5
+    assert metrics.loc["extract", "rows_out"] == 4
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from dal.query_cache import QueryResultCache
+
+
+def _ciks(changed: bool = False) -> np.ndarray:
+    ciks = np.char.zfill(np.arange(2000).astype(str), 10)
+    if changed:
+        ciks[1000] = "9999999999"
+    return ciks
+
+
+def test_large_arrays_differing_in_one_element_get_different_keys():
+    key = QueryResultCache.make_key("holdings", {"ciks": _ciks()})
+    assert key != QueryResultCache.make_key("holdings", {"ciks": _ciks(changed=True)})
+
+
+def test_large_series_differing_in_one_element_get_different_keys():
+    key = QueryResultCache.make_key("holdings", {"ciks": pd.Series(_ciks())})
+    assert key != QueryResultCache.make_key("holdings", {"ciks": pd.Series(_ciks(changed=True))})
+
+
+def test_collection_types_and_order_share_a_key():
+    ciks = _ciks()
+    key = QueryResultCache.make_key("holdings", {"ciks": list(ciks)})
+    assert QueryResultCache.make_key("holdings", {"ciks": ciks[::-1]}) == key
+    assert QueryResultCache.make_key("holdings", {"ciks": pd.Index(ciks)}) == key
+    assert QueryResultCache.make_key("holdings", {"ciks": set(ciks)}) == key
+    assert QueryResultCache.make_key("holdings", {"ciks": (c for c in ciks)}) == key
+
+
+def test_column_order_is_part_of_the_key():
+    key = QueryResultCache.make_key("holdings", {"columns": ["cik", "cusip"]})
+    assert key != QueryResultCache.make_key("holdings", {"columns": ["cusip", "cik"]})
@@ -0,0 +1,246 @@
+import glob
+import os
+import re
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from logger.logger import ETLLogger
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RUSSELL_DIR = os.path.join(REPO_ROOT, "Social Network", "russell")
+
+# Undated snapshots (current constituent lists) apply to every quarter
+UNDATED = (0, 0)
+
+
+def quarter_key(as_of) -> Tuple[int, int]:
+    """
+    (year, quarter) of "2025_Q2", "2013_2Q", ["2025_Q2"], (2025, 2) or a date
+    ("31-DEC-2013", Timestamp); None is UNDATED.
+    """
+    if as_of is None:
+        return UNDATED
+    if isinstance(as_of, list):
+        as_of = as_of[0]
+    if isinstance(as_of, tuple):
+        return int(as_of[0]), int(as_of[1])
+    if isinstance(as_of, str):
+        match = re.fullmatch(r"(\d{4})_(?:Q(\d)|(\d)Q)", as_of.strip().upper())
+        if match:
+            return int(match.group(1)), int(match.group(2) or match.group(3))
+    as_of = pd.Timestamp(as_of)
+    return as_of.year, as_of.quarter
+
+
+def previous_quarter(as_of) -> Tuple[int, int]:
+    """(year, quarter) before as_of (any quarter_key format)."""
+    year, quarter = quarter_key(as_of)
+    return (year, quarter - 1) if quarter > 1 else (year - 1, 4)
+
+
+class IndexUniverse:
+    """
+    CUSIP sets of an index universe per as-of quarter, used as a semi-join
+    filter on holdings rows.
+
+    A quarter uses the latest snapshot at or before it; quarters before the
+    first dated snapshot use the first one (the constituent files are current
+    lists, not history). Filters count rows in and out per stage.
+    """
+
+    def __init__(self, name: str, logger: Optional[ETLLogger] = None):
+        self.name = name
+        self.logger = logger or ETLLogger(name="IndexUniverse")
+        self.snapshots: Dict[Tuple[int, int], frozenset] = {}
+        self._metrics: Dict[str, List[int]] = {}
+        self._lock = Lock()
+
+    def add(self, cusips: Iterable[str], as_of=None) -> "IndexUniverse":
+        """
+        Add (or replace) the snapshot of a quarter.
+
+        Args:
+            cusips: Constituent CUSIPs (any case, surrounding spaces ignored).
+            as_of: Quarter of the constituent list (default: UNDATED).
+
+        Returns:
+            self
+        """
+        normalized = pd.Series(list(cusips), dtype="string").dropna().str.strip().str.upper()
+        self.snapshots[quarter_key(as_of)] = frozenset(normalized[normalized != ""])
+        return self
+
+    # ==================== CONSTRUCTION ====================
+
+    @classmethod
+    def from_spy_csv(cls, path: str = os.path.join(RUSSELL_DIR, "SPY.csv"), as_of=None,
+                     name: str = "spy") -> "IndexUniverse":
+        """S&P 500 universe from an SPY holdings CSV (Name, Ticker, CUSIP)."""
+        spy = pd.read_csv(path, encoding="utf-8-sig", dtype=str)
+        return cls(name).add(spy["CUSIP"], as_of)
+
+    @classmethod
+    def from_cusip_mappings(cls, directory: str = os.path.join(RUSSELL_DIR, "cusip_mappings"),
+                            name: str = "russell3000") -> "IndexUniverse":
+        """
+        Universe from the per-quarter constituent mappings written by
+        cusip_resolver.save_mapping (cusip_map_<year>_q<q>.parquet, CUSIP column).
+        """
+        universe = cls(name)
+        for path in sorted(glob.glob(os.path.join(directory, "cusip_map_*_q*.parquet"))):
+            match = re.search(r"cusip_map_(\d{4})_q([1-4])\.parquet$", path)
+            if match:
+                mapping = pd.read_parquet(path, columns=["CUSIP"])
+                universe.add(mapping["CUSIP"], (int(match.group(1)), int(match.group(2))))
+        if not universe.snapshots:
+            raise ValueError(f"No CUSIP mappings in {directory} (see cusip_resolver.save_mapping)")
+        return universe
+
+    @classmethod
+    def from_name(cls, name: str) -> "IndexUniverse":
+        """Built-in universe: "spy" or "russell3000"."""
+        builders = {"spy": cls.from_spy_csv, "russell3000": cls.from_cusip_mappings}
+        if name not in builders:
+            raise ValueError(f"Unknown universe: {name}. Available: {list(builders.keys())}")
+        return builders[name]()
+
+    @classmethod
+    def from_env(cls) -> Optional["IndexUniverse"]:
+        """Universe named by the ETL_UNIVERSE environment variable (unset: None)."""
+        name = os.getenv("ETL_UNIVERSE", "").strip().lower()
+        return cls.from_name(name) if name else None
+
+    # ==================== LOOKUP ====================
+
+    def quarters(self) -> List[Tuple[int, int]]:
+        """Snapshot quarters, oldest first (UNDATED first)."""
+        return sorted(self.snapshots)
+
+    def _snapshot_key(self, as_of) -> Tuple[int, int]:
+        if not self.snapshots:
+            raise ValueError(f"Universe {self.name} has no snapshots")
+        quarters = self.quarters()
+        key = quarter_key(as_of)
+        earlier = [q for q in quarters if q <= key]
+        return earlier[-1] if earlier else quarters[0]
+
+    def cusips(self, as_of=None) -> frozenset:
+        """CUSIP set in effect for a quarter (default: latest snapshot)."""
+        if as_of is None:
+            return self.snapshots[self.quarters()[-1]]
+        return self.snapshots[self._snapshot_key(as_of)]
+
+    def mask(self, cusips: pd.Series, as_of=None, periods: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        Membership of every row's CUSIP in the universe.
+
+        The hash semi-join runs on the distinct values: CUSIPs and periods are
+        factorized, only the distinct CUSIPs are normalized and probed against
+        each snapshot in use, and rows gather their result by code.
+
+        Args:
+            cusips: CUSIP per row.
+            as_of: Quarter of all rows (used when periods is None or missing).
+            periods: Period per row (any quarter_key format), for per-row
+                point-in-time snapshots.
+
+        Returns:
+            Boolean mask aligned with the rows.
+        """
+        codes, uniques = pd.factorize(cusips)
+        normalized = pd.Series(uniques, dtype="string").str.strip().str.upper()
+
+        if periods is None:
+            row_snapshot = np.zeros(len(codes), dtype=np.int64)
+            keys = [self._snapshot_key(as_of) if as_of is not None else self.quarters()[-1]]
+        else:
+            period_codes, period_uniques = pd.factorize(periods)
+            default_key = self._snapshot_key(as_of) if as_of is not None else self.quarters()[-1]
+            period_keys = [self._snapshot_key(p) for p in period_uniques] + [default_key]
+            keys = sorted(set(period_keys))
+            key_index = np.array([keys.index(k) for k in period_keys], dtype=np.int64)
+            row_snapshot = key_index[period_codes]  # code -1 (missing period) -> default_key
+
+        # member[snapshot, distinct cusip]; an extra False column for missing cusips
+        member = np.zeros((len(keys), len(uniques) + 1), dtype=bool)
+        for i, key in enumerate(keys):
+            member[i, :-1] = normalized.isin(self.snapshots[key]).to_numpy(dtype=bool, na_value=False)
+        return member[row_snapshot, codes]
+
+    # ==================== FILTERING ====================
+
+    def filter(self, df: pd.DataFrame, stage: str, as_of=None, period_col: Optional[str] = None,
+               cusip_col: str = "cusip") -> pd.DataFrame:
+        """
+        Keep the rows whose CUSIP is in the universe and record the reduction.
+
+        Args:
+            df: Rows to filter.
+            stage: Metrics key (e.g. "extract", "manipulation").
+            as_of: Quarter of the rows (see mask).
+            period_col: Per-row period column (see mask).
+            cusip_col: CUSIP column.
+
+        Returns:
+            Filtered DataFrame.
+        """
+        if cusip_col not in df.columns:
+            self.logger.warning(f"Universe {self.name}: no {cusip_col} column, rows kept")
+            return df
+
+        periods = df[period_col] if period_col and period_col in df.columns else None
+        filtered = df[self.mask(df[cusip_col], as_of=as_of, periods=periods)]
+        self.record(stage, len(df), len(filtered))
+        return filtered
+
+    def filter_any(self, df: pd.DataFrame, stage: str, as_ofs: Sequence, cusip_col: str = "cusip") -> pd.DataFrame:
+        """
+        Keep the rows whose CUSIP is in the universe at any of the quarters.
+
+        A superset of the point-in-time filter of each quarter, for stages
+        that do not know the exact period of every row yet.
+
+        Args:
+            df: Rows to filter.
+            stage: Metrics key.
+            as_ofs: Quarters whose snapshots are united.
+            cusip_col: CUSIP column.
+
+        Returns:
+            Filtered DataFrame.
+        """
+        if cusip_col not in df.columns:
+            self.logger.warning(f"Universe {self.name}: no {cusip_col} column, rows kept")
+            return df
+
+        keep = np.zeros(len(df), dtype=bool)
+        for as_of in as_ofs:
+            keep |= self.mask(df[cusip_col], as_of=as_of)
+        filtered = df[keep]
+        self.record(stage, len(df), len(filtered))
+        return filtered
+
+    def record(self, stage: str, rows_in: int, rows_out: int) -> None:
+        """Add rows in/out of one filter call to a stage (thread-safe)."""
+        with self._lock:
+            totals = self._metrics.setdefault(stage, [0, 0])
+            totals[0] += rows_in
+            totals[1] += rows_out
+
+    def metrics(self) -> pd.DataFrame:
+        """Rows in/out and reduction per stage."""
+        with self._lock:
+            rows = [(self.name, stage, rows_in, rows_out) for stage, (rows_in, rows_out) in self._metrics.items()]
+        metrics = pd.DataFrame(rows, columns=["universe", "stage", "rows_in", "rows_out"])
+        metrics["reduction"] = 1 - metrics["rows_out"] / metrics["rows_in"].where(metrics["rows_in"] > 0)
+        return metrics
+
+    def log_metrics(self) -> None:
+        """Log the row reduction of every stage."""
+        for row in self.metrics().itertuples():
+            self.logger.info(
+                f"Universe {row.universe} [{row.stage}]: {row.rows_in} → {row.rows_out} rows "
+                f"({row.reduction:.1%} removed)"
+            )
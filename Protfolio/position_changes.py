@@ -0,0 +1,358 @@
+"""
+Quarter-over-quarter 13F position changes and turnover for all funds at once.
+
+Each quarter's holdings are a QuarterHoldings: fund x CUSIP CSR matrices of
+shares and value that share one sparsity pattern (the filed positions).
+For two quarters aligned on the union of their funds and CUSIPs:
+
+    status = held_prev + 2 * held_curr          (1 exited, 2 new, 3 held in both)
+    delta  = shares_curr - shares_prev          (on the union pattern of status)
+
+All matrices are canonical CSR, so a quarter's entries are exactly the
+status entries that have its bit set, in the same order. Values are placed
+on the union pattern with boolean masks. Unlike sparse "-", this keeps
+positions whose delta is zero, which are needed to tell unchanged positions
+from exits and entries. Per-fund aggregates use np.bincount over the row
+index, with no per-fund Python loops.
+
+Position changes are measured in shares (value also moves with the price).
+Traded value is |delta shares| times the position's price (value / shares),
+taken from the current quarter, or from the previous one for exits. Per fund:
+
+    turnover = min(bought, sold) / mean(total value prev, total value curr)
+
+Changes are written under <output_dir>/deltas/quarter=<YYYY_Qn>/ and
+<output_dir>/turnover/quarter=<YYYY_Qn>/ as Parquet, so a quarter can be
+rewritten or read back on its own.
+"""
+import os
+import shutil
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import scipy.sparse as sp
+
+QuarterSpec = Union[str, Tuple[int, int]]
+
+STATUS_EXITED, STATUS_NEW, STATUS_HELD = 1, 2, 3
+CHANGE_TYPES = np.array(["unchanged", "new", "exited", "increased", "decreased"], dtype=object)
+
+
+def quarter_label(quarter: QuarterSpec) -> str:
+    """"2024_Q1" for "2024_Q1", "2024_q1" or (2024, 1)."""
+    if isinstance(quarter, str):
+        year, q = quarter.upper().split("_Q")
+    else:
+        year, q = quarter
+    return f"{int(year)}_Q{int(q)}"
+
+
+class QuarterHoldings:
+    """
+    Shares and value of every (fund, CUSIP) position of one quarter.
+    """
+
+    def __init__(
+        self,
+        quarter: QuarterSpec,
+        funds: np.ndarray,
+        cusips: np.ndarray,
+        shares: sp.csr_matrix,
+        value: sp.csr_matrix,
+    ):
+        """
+        Args:
+            quarter: Report quarter.
+            funds: Fund ids (CIK) of the rows.
+            cusips: CUSIPs of the columns.
+            shares, value: Canonical CSR matrices with the same sparsity
+                pattern (one entry per filed position, zeros included).
+        """
+        self.quarter = quarter_label(quarter)
+        self.funds = funds
+        self.cusips = cusips
+        self.shares = shares
+        self.value = value
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        quarter: Optional[QuarterSpec] = None,
+        fund_col: str = "cik",
+        cusip_col: str = "cusip",
+        shares_col: str = "sshprnamt",
+        value_col: str = "value",
+    ) -> "QuarterHoldings":
+        """
+        Build from holdings rows of one quarter; line items of the same
+        (fund, CUSIP) are summed.
+
+        Args:
+            df: Holdings, e.g. DAL.read_holdings_df(quarters=["2025_Q2"]), or
+                DAL.read_edges batches with shares_col="total_shares" and
+                value_col="total_value".
+            quarter: Report quarter (default: from df's year/quarter columns).
+            fund_col, cusip_col, shares_col, value_col: Column names.
+
+        Returns:
+            QuarterHoldings of the quarter.
+        """
+        if quarter is None:
+            periods = df[["year", "quarter"]].drop_duplicates()
+            if len(periods) != 1:
+                raise ValueError(f"Expected holdings of one quarter, got {len(periods)}")
+            quarter = tuple(periods.iloc[0])
+
+        df = df.dropna(subset=[fund_col, cusip_col])
+        fund_codes, funds = pd.factorize(df[fund_col].astype(str), sort=True)
+        cusip_codes, cusips = pd.factorize(df[cusip_col].astype(str), sort=True)
+        shape = (len(funds), len(cusips))
+
+        def matrix(column: str) -> sp.csr_matrix:
+            data = pd.to_numeric(df[column], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+            M = sp.coo_matrix((data, (fund_codes, cusip_codes)), shape=shape).tocsr()
+            M.sum_duplicates()
+            return M
+
+        return cls(quarter, funds.to_numpy(dtype=object), cusips.to_numpy(dtype=object), matrix(shares_col), matrix(value_col))
+
+    def aligned(self, funds: pd.Index, cusips: pd.Index) -> Tuple[sp.csr_matrix, sp.csr_matrix]:
+        """Shares and value re-indexed to larger fund / CUSIP universes (canonical CSR)."""
+        rows = funds.get_indexer(self.funds)
+        cols = cusips.get_indexer(self.cusips)
+        shape = (len(funds), len(cusips))
+
+        coo = self.shares.tocoo()
+        row, col = rows[coo.row], cols[coo.col]
+        shares = sp.csr_matrix((coo.data, (row, col)), shape=shape)
+        value = sp.csr_matrix((self.value.tocoo().data, (row, col)), shape=shape)
+        shares.sort_indices()
+        value.sort_indices()
+        return shares, value
+
+
+def _pattern(M: sp.csr_matrix) -> sp.csr_matrix:
+    """Same sparsity pattern as M with all entries 1 (explicit zeros kept)."""
+    return sp.csr_matrix((np.ones(M.nnz, dtype=np.int8), M.indices, M.indptr), shape=M.shape)
+
+
+def position_changes(
+    prev: QuarterHoldings,
+    curr: QuarterHoldings,
+    filers_only: bool = True,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Position deltas and per-fund turnover between two quarters.
+
+    Args:
+        prev: Earlier quarter.
+        curr: Later quarter.
+        filers_only: Only compare funds that filed in both quarters (a
+            missing filing would otherwise look like a full exit or entry).
+
+    Returns:
+        (deltas, turnover):
+            deltas: one row per changed position (fund, cusip, change,
+                shares/value in both quarters, delta shares, traded value).
+            turnover: one row per fund (position counts by change type,
+                bought, sold, total values and turnover ratio).
+    """
+    funds = pd.Index(prev.funds).union(pd.Index(curr.funds))
+    cusips = pd.Index(prev.cusips).union(pd.Index(curr.cusips))
+    shares_prev, value_prev = prev.aligned(funds, cusips)
+    shares_curr, value_curr = curr.aligned(funds, cusips)
+
+    if filers_only:
+        filed = np.isin(funds, prev.funds) & np.isin(funds, curr.funds)
+        shares_prev, value_prev, shares_curr, value_curr = (
+            _keep_rows(M, filed) for M in (shares_prev, value_prev, shares_curr, value_curr)
+        )
+
+    status = (_pattern(shares_prev) + 2 * _pattern(shares_curr)).tocsr()
+    status.sort_indices()
+
+    # union entries in canonical order; each matrix fills the entries whose bit is set
+    code = status.data
+    in_prev, in_curr = (code & STATUS_EXITED) > 0, (code & STATUS_NEW) > 0
+    s_prev, v_prev, s_curr, v_curr = (np.zeros(len(code)) for _ in range(4))
+    s_prev[in_prev], v_prev[in_prev] = shares_prev.data, value_prev.data
+    s_curr[in_curr], v_curr[in_curr] = shares_curr.data, value_curr.data
+    d_shares = s_curr - s_prev
+
+    change = np.zeros(len(code), dtype=np.int8)
+    change[code == STATUS_NEW] = 1
+    change[code == STATUS_EXITED] = 2
+    change[(code == STATUS_HELD) & (d_shares > 0)] = 3
+    change[(code == STATUS_HELD) & (d_shares < 0)] = 4
+
+    price = np.divide(v_curr, s_curr, out=np.zeros(len(code)), where=s_curr > 0)
+    exit_price = np.divide(v_prev, s_prev, out=np.zeros(len(code)), where=s_prev > 0)
+    price = np.where(in_curr, price, exit_price)
+    traded = np.abs(d_shares) * price
+
+    row = np.repeat(np.arange(status.shape[0]), np.diff(status.indptr))
+    changed = change > 0
+    deltas = pd.DataFrame({
+        "fund": funds.to_numpy(dtype=object)[row[changed]],
+        "cusip": cusips.to_numpy(dtype=object)[status.indices[changed]],
+        "change": CHANGE_TYPES[change[changed]],
+        "shares_prev": s_prev[changed],
+        "shares_curr": s_curr[changed],
+        "delta_shares": d_shares[changed],
+        "value_prev": v_prev[changed],
+        "value_curr": v_curr[changed],
+        "traded_value": traded[changed],
+    })
+    deltas.insert(0, "prev_quarter", prev.quarter)
+    deltas.insert(0, "quarter", curr.quarter)
+
+    n_funds = len(funds)
+    buys = np.isin(change, (1, 3))
+    counts = {
+        f"n_{name}": np.bincount(row[change == i], minlength=n_funds)
+        for i, name in enumerate(CHANGE_TYPES) if i > 0
+    }
+    bought = np.bincount(row[buys], weights=traded[buys], minlength=n_funds)
+    sold = np.bincount(row[~buys & changed], weights=traded[~buys & changed], minlength=n_funds)
+    total_prev = np.asarray(value_prev.sum(axis=1)).ravel()
+    total_curr = np.asarray(value_curr.sum(axis=1)).ravel()
+    average = (total_prev + total_curr) / 2
+
+    turnover = pd.DataFrame({
+        "fund": funds.to_numpy(dtype=object),
+        "n_positions_prev": np.diff(shares_prev.indptr),
+        "n_positions_curr": np.diff(shares_curr.indptr),
+        **counts,
+        "bought_value": bought,
+        "sold_value": sold,
+        "total_value_prev": total_prev,
+        "total_value_curr": total_curr,
+        "turnover": np.divide(np.minimum(bought, sold), average, out=np.full(n_funds, np.nan), where=average > 0),
+    })
+    turnover = turnover[(turnover["n_positions_prev"] > 0) | (turnover["n_positions_curr"] > 0)]
+    turnover.insert(0, "prev_quarter", prev.quarter)
+    turnover.insert(0, "quarter", curr.quarter)
+    return deltas, turnover.reset_index(drop=True)
+
+
+def _keep_rows(M: sp.csr_matrix, mask: np.ndarray) -> sp.csr_matrix:
+    """M with the entries of rows outside mask removed (explicit zeros kept)."""
+    keep = np.repeat(mask, np.diff(M.indptr))
+    indptr = np.concatenate([[0], np.cumsum(np.where(mask, np.diff(M.indptr), 0))])
+    return sp.csr_matrix((M.data[keep], M.indices[keep], indptr), shape=M.shape)
+
+
+class PositionChangeStore:
+    """
+    Position deltas and turnover partitioned by quarter (hive-style Parquet).
+    """
+
+    COMPRESSION = "zstd"
+    TABLES = ("deltas", "turnover")
+
+    def __init__(self, output_dir: str = os.path.join("13f_outputs", "position_changes")):
+        """
+        Args:
+            output_dir: Root directory of the deltas/ and turnover/ datasets.
+        """
+        self.output_dir = output_dir
+
+    def _partition(self, table: str, quarter: str) -> str:
+        return os.path.join(self.output_dir, table, f"quarter={quarter}")
+
+    def quarters(self) -> List[str]:
+        """Quarters with stored deltas."""
+        root = os.path.join(self.output_dir, "deltas")
+        if not os.path.isdir(root):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(root) if name.startswith("quarter="))
+
+    def write(self, quarter: QuarterSpec, deltas: pd.DataFrame, turnover: pd.DataFrame) -> None:
+        """
+        Replace the partitions of a quarter.
+
+        An empty frame removes the table's partition, so a quarter recomputed
+        without changes does not keep the rows of an earlier run.
+
+        Args:
+            quarter: Quarter of deltas / turnover (the later quarter).
+            deltas, turnover: Output of position_changes().
+        """
+        quarter = quarter_label(quarter)
+        for table, frame in zip(self.TABLES, (deltas, turnover)):
+            partition = self._partition(table, quarter)
+            if frame.empty:
+                shutil.rmtree(partition, ignore_errors=True)
+                continue
+            tmp_partition = partition + ".tmp"
+            shutil.rmtree(tmp_partition, ignore_errors=True)
+            os.makedirs(tmp_partition)
+            pq.write_table(
+                pa.Table.from_pandas(frame.drop(columns="quarter", errors="ignore"), preserve_index=False),
+                os.path.join(tmp_partition, "part-0.parquet"),
+                compression=self.COMPRESSION,
+            )
+            shutil.rmtree(partition, ignore_errors=True)
+            os.replace(tmp_partition, partition)
+
+    def read(
+        self,
+        table: str = "deltas",
+        quarters: Optional[Iterable[QuarterSpec]] = None,
+        funds: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read stored changes; only the requested quarter partitions are opened.
+
+        Args:
+            table: "deltas" or "turnover".
+            quarters: Quarters to read (default: all).
+            funds: Restrict to these funds.
+        """
+        if table not in self.TABLES:
+            raise ValueError(f"Unknown table: {table}. Available: {list(self.TABLES)}")
+        filters = []
+        if quarters is not None:
+            filters.append(("quarter", "in", [quarter_label(q) for q in quarters]))
+        if funds is not None:
+            filters.append(("fund", "in", [str(f) for f in funds]))
+
+        root = os.path.join(self.output_dir, table)
+        if not os.path.isdir(root) or not any(name.startswith("quarter=") for name in os.listdir(root)):
+            return pd.DataFrame()
+        frame = pd.read_parquet(root, filters=filters or None)
+        frame["quarter"] = frame["quarter"].astype(str)
+        return frame
+
+
+def run_position_changes(
+    holdings: Iterable[QuarterHoldings],
+    store: Optional[PositionChangeStore] = None,
+    filers_only: bool = True,
+) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Changes between every pair of consecutive quarters, as each quarter arrives.
+
+    Only the previous quarter's matrices are kept in memory, so quarters can
+    be streamed from the DAL one at a time.
+
+    Args:
+        holdings: QuarterHoldings in report order.
+        store: Where to persist each quarter's deltas and turnover (optional).
+        filers_only: See position_changes().
+
+    Yields:
+        (deltas, turnover) of each quarter after the first.
+    """
+    prev = None
+    for curr in holdings:
+        if prev is not None:
+            deltas, turnover = position_changes(prev, curr, filers_only=filers_only)
+            if store is not None:
+                store.write(curr.quarter, deltas, turnover)
+            yield deltas, turnover
+        prev = curr
@@ -0,0 +1,328 @@
+"""
+Issuer name -> CUSIP resolution for index constituent lists.
+
+CUSIP_CHOOSE_BY_INDEX.ipynb matched every Russell 3000 row against every
+unique 13F nameofissuer with a Python substring test (O(constituents x
+issuers)) and picked the issuer with the highest holding count. IssuerIndex
+does the same match with a positional inverted index:
+
+    - issuer names are normalized once (lowercase, punctuation removed,
+      common suffixes abbreviated as 13F filers write them, "the" dropped);
+    - each normalized name keeps its most held CUSIP and that CUSIP's holding
+      count. Names are ordered alphabetically, so ties resolve like the
+      notebook's idxmax;
+    - a token maps to the sorted keys issuer * MAX_TOKENS + position, so the
+      issuers containing a query phrase are the intersection of the shifted
+      posting lists of its tokens (phrase match on whole tokens, instead of
+      raw substrings that also match inside other words).
+
+The query of a constituent is the first n_words tokens of its normalized
+name (3, as in the notebook). Resolved mappings are stored per quarter with
+save_mapping() / load_mapping().
+"""
+import os
+import re
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Maximum tokens per issuer name kept in the index
+MAX_TOKENS = 64
+
+# Long forms -> the abbreviations used in 13F nameofissuer
+ABBREVIATIONS = {
+    "company": "co",
+    "companies": "cos",
+    "corporation": "corp",
+    "incorporated": "inc",
+    "limited": "ltd",
+    "holdings": "hldgs",
+    "holding": "hldg",
+    "group": "grp",
+    "international": "intl",
+}
+# "s" is the possessive split off by filers ("MCDONALD S CORP")
+STOP_TOKENS = {"the", "and", "s"}
+
+DEFAULT_MAPPING_DIR = "cusip_mappings"
+
+
+def _normalize_tokens(tokens: list) -> str:
+    tokens = [ABBREVIATIONS.get(t, t) for t in tokens if t not in STOP_TOKENS]
+    # join runs of initials ("w r berkley" -> "wr berkley", "p g e" -> "pge")
+    # and a leading initial ("o reilly" -> "oreilly")
+    joined, previous_initial = [], False
+    for token in tokens:
+        if previous_initial and len(token) == 1:
+            joined[-1] += token
+        else:
+            joined.append(token)
+        previous_initial = len(token) == 1
+    if len(joined) > 1 and len(joined[0]) == 1:
+        joined[:2] = [joined[0] + joined[1]]
+    return " ".join(joined)
+
+
+def normalize_names(names: Sequence) -> pd.Series:
+    """
+    Normalized, space-separated tokens of every name.
+
+    Lowercase; possessives, apostrophes and the "&"/"+" connectors removed
+    ("AT&T" and "AT+T" -> "att"); other punctuation splits tokens; long forms
+    abbreviated (ABBREVIATIONS); STOP_TOKENS dropped; initials joined.
+    """
+    names = pd.Series(names, dtype="string").fillna("").str.lower()
+    names = names.str.replace(r"['’]s\b", "", regex=True)
+    names = names.str.replace(r"['’&+]", "", regex=True)
+    names = names.str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip()
+    return names.str.split().map(_normalize_tokens).astype(object)
+
+
+class IssuerIndex:
+    """
+    Positional token index over the issuer names of one quarter.
+    """
+
+    def __init__(self, issuers: pd.DataFrame):
+        """
+        Args:
+            issuers: Columns name (normalized issuer name), cusip and count;
+                one row per name (see from_holdings).
+        """
+        self.issuers = issuers.sort_values("name", kind="stable").reset_index(drop=True)
+        self.counts = self.issuers["count"].to_numpy()
+
+        tokens = self.issuers["name"].str.split().explode()
+        tokens = tokens[tokens.notna()]
+        issuer_ids = tokens.index.to_numpy()
+        positions = tokens.groupby(level=0).cumcount().to_numpy()
+        keep = positions < MAX_TOKENS
+
+        token_ids, vocabulary = pd.factorize(tokens.to_numpy()[keep])
+        keys = issuer_ids[keep].astype(np.int64) * MAX_TOKENS + positions[keep]
+        order = np.lexsort((keys, token_ids))
+
+        self.vocabulary: Dict[str, int] = {token: i for i, token in enumerate(vocabulary)}
+        self._keys = keys[order]
+        self._offsets = np.searchsorted(token_ids[order], np.arange(len(vocabulary) + 1))
+
+    @classmethod
+    def from_holdings(
+        cls,
+        holdings: pd.DataFrame,
+        name_col: str = "nameofissuer",
+        cusip_col: str = "cusip",
+        count_col: Optional[str] = None,
+    ) -> "IssuerIndex":
+        """
+        Build from holdings rows of one quarter.
+
+        Args:
+            holdings: Holdings (one row per line item), or pre-aggregated
+                (name, cusip) rows with a count column.
+            name_col, cusip_col: Column names.
+            count_col: Holding count column of pre-aggregated rows (default:
+                count the rows).
+
+        Returns:
+            IssuerIndex over the normalized issuer names.
+        """
+        pairs = holdings[[name_col, cusip_col] + ([count_col] if count_col else [])].dropna(subset=[name_col, cusip_col])
+        if count_col is None:
+            pairs = pairs.groupby([name_col, cusip_col], sort=False).size().rename("count").reset_index()
+        else:
+            pairs = pairs.rename(columns={count_col: "count"})
+
+        # count per (normalized name, cusip); keep each name's most held cusip
+        pairs = pd.DataFrame({
+            "name": normalize_names(pairs[name_col]).to_numpy(),
+            "cusip": pairs[cusip_col].astype(str).to_numpy(),
+            "count": pairs["count"].to_numpy(),
+        })
+        pairs = pairs[pairs["name"] != ""]
+        pairs = pairs.groupby(["name", "cusip"], sort=False)["count"].sum().reset_index()
+        top = pairs.sort_values(["name", "count", "cusip"], ascending=[True, False, True], kind="stable")
+        return cls(top.drop_duplicates("name").reset_index(drop=True))
+
+    def __len__(self) -> int:
+        return len(self.issuers)
+
+    def _postings(self, token: str) -> Optional[np.ndarray]:
+        token_id = self.vocabulary.get(token)
+        if token_id is None:
+            return None
+        return self._keys[self._offsets[token_id] : self._offsets[token_id + 1]]
+
+    def match(self, phrase: str) -> np.ndarray:
+        """Issuer rows whose normalized name contains the token phrase."""
+        tokens = phrase.split()
+        if not tokens:
+            return np.array([], dtype=np.int64)
+
+        postings = []
+        for shift, token in enumerate(tokens):
+            keys = self._postings(token)
+            if keys is None:
+                return np.array([], dtype=np.int64)
+            postings.append((len(keys), shift, keys))
+
+        # intersect starting from the rarest token; keys are aligned to the phrase start
+        postings.sort(key=lambda p: p[0])
+        _, shift, keys = postings[0]
+        found = keys - shift
+        for _, shift, keys in postings[1:]:
+            found = np.intersect1d(found, keys - shift, assume_unique=True)
+            if not len(found):
+                break
+        return np.unique(found // MAX_TOKENS)
+
+    def resolve(self, names: Sequence, n_words: int = 3, min_words: int = 2) -> pd.DataFrame:
+        """
+        Resolve many constituent names at once.
+
+        Args:
+            names: Constituent names (any case / punctuation).
+            n_words: Leading tokens of the normalized name used as the query.
+            min_words: Without a match the query is shortened one token at a
+                time down to this many tokens (filers truncate and abbreviate
+                the tail: "GENERAL ELECTRIC" for "General Electric Co"). Set
+                to n_words to disable.
+
+        Returns:
+            One row per name: query (the one that matched), cusip, matched
+            issuer (normalized), holding count and number of matching
+            issuers; cusip is None when no query matched.
+        """
+        names = normalize_names(names)
+        unique_names = pd.unique(names)
+
+        resolved = {}
+        for name in unique_names:
+            tokens = name.split()[:n_words]
+            resolved[name] = (" ".join(tokens), None, None, 0, 0)
+            for length in range(len(tokens), min(min_words, len(tokens)) - 1, -1):
+                query = " ".join(tokens[:length])
+                rows = self.match(query)
+                if len(rows):
+                    # first maximum in name order, like idxmax over the name-sorted table
+                    best = rows[np.argmax(self.counts[rows])]
+                    issuer = self.issuers.loc[best]
+                    resolved[name] = (query, issuer["cusip"], issuer["name"], int(issuer["count"]), len(rows))
+                    break
+
+        return pd.DataFrame(
+            [resolved[name] for name in names],
+            columns=["query", "cusip", "matched_issuer", "holding_count", "n_matches"],
+        )
+
+
+def load_constituents(path: str) -> pd.DataFrame:
+    """
+    Index constituent list (HOLDINGS, TICKER, SECTOR) from an iShares-style CSV.
+    """
+    constituents = pd.read_csv(path, encoding="utf-8-sig")
+    constituents.columns = ["HOLDINGS", "TICKER", "SECTOR"][: len(constituents.columns)]
+    constituents = constituents[constituents["HOLDINGS"].astype(str).str.lower() != "holdings"]
+    return constituents.dropna(subset=["HOLDINGS"]).reset_index(drop=True)
+
+
+def resolve_constituents(
+    constituents: pd.DataFrame,
+    index: IssuerIndex,
+    n_words: int = 3,
+    name_col: str = "HOLDINGS",
+) -> pd.DataFrame:
+    """Constituents with CUSIP, MATCHED_ISSUER and HOLDING_COUNT columns added."""
+    resolved = index.resolve(constituents[name_col], n_words=n_words)
+    result = constituents.reset_index(drop=True).copy()
+    result["CUSIP"] = resolved["cusip"].to_numpy()
+    result["MATCHED_ISSUER"] = resolved["matched_issuer"].to_numpy()
+    result["HOLDING_COUNT"] = resolved["holding_count"].to_numpy()
+    return result
+
+
+# ==================== PERSISTENCE ====================
+
+def _mapping_path(quarter: str, directory: str) -> str:
+    year, q = str(quarter).upper().split("_Q")
+    return os.path.join(directory, f"cusip_map_{int(year)}_q{int(q)}.parquet")
+
+
+def save_mapping(mapping: pd.DataFrame, quarter: str, directory: str = DEFAULT_MAPPING_DIR) -> str:
+    """
+    Store the resolved constituent mapping of a quarter (replacing it).
+
+    Args:
+        mapping: Output of resolve_constituents().
+        quarter: Holdings quarter the mapping was resolved against, e.g. "2025_Q2".
+        directory: Mapping directory.
+
+    Returns:
+        Path of the written file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = _mapping_path(quarter, directory)
+    mapping.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_mapping(quarter: str, directory: str = DEFAULT_MAPPING_DIR) -> pd.DataFrame:
+    """Resolved mapping of a quarter (see save_mapping)."""
+    return pd.read_parquet(_mapping_path(quarter, directory))
+
+
+def mapped_quarters(directory: str = DEFAULT_MAPPING_DIR) -> list:
+    """Quarters ("2025_Q2") with a stored mapping, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        match = re.fullmatch(r"cusip_map_(\d{4})_q([1-4])\.parquet", name)
+        if match:
+            found.append((int(match.group(1)), int(match.group(2))))
+    return [f"{year}_Q{q}" for year, q in sorted(found)]
+
+
+if __name__ == "__main__":
+    # Accuracy against SPY's (name, CUSIP) list, where SPY names stand in for
+    # 13F issuer names, and speed on ~30k issuer names (a full quarter has ~22k
+    # CUSIPs) padded with synthetic names
+    here = os.path.dirname(os.path.abspath(__file__))
+    spy = pd.read_csv(os.path.join(here, "SPY.csv"), encoding="utf-8-sig")
+    russell = load_constituents(os.path.join(here, "Holdings_details_Russell_3000_ETF.csv"))
+
+    rng = np.random.default_rng(0)
+    words = np.array(["alpha", "beta", "capital", "energy", "first", "global", "health", "national",
+                      "pacific", "resources", "systems", "trust", "united", "ventures", "west"])
+    suffixes = np.array(["inc", "corp", "co", "ltd", "plc", "lp", "com", "cl a", "new"])
+    n_synthetic = 30000
+    synthetic = pd.DataFrame({
+        "nameofissuer": [
+            " ".join(rng.choice(words, size=rng.integers(1, 4))) + f" {i} " + rng.choice(suffixes)
+            for i in range(n_synthetic)
+        ],
+        "cusip": [f"X{i:08d}" for i in range(n_synthetic)],
+        "count": rng.integers(1, 500, n_synthetic),
+    })
+    issuers = pd.concat([
+        spy.rename(columns={"Name": "nameofissuer", "CUSIP": "cusip"}).assign(count=1000)[["nameofissuer", "cusip", "count"]],
+        synthetic,
+    ], ignore_index=True)
+
+    start = time.perf_counter()
+    index = IssuerIndex.from_holdings(issuers, count_col="count")
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    mapping = resolve_constituents(russell, index)
+    resolve_seconds = time.perf_counter() - start
+
+    truth = russell.merge(spy, left_on="TICKER", right_on="Ticker")
+    check = truth.merge(mapping[["TICKER", "CUSIP"]], on="TICKER", suffixes=("_truth", "_found"))
+    accuracy = (check["CUSIP_truth"].str.lower() == check["CUSIP_found"].str.lower()).mean()
+    print(f"index: {len(index)} issuer names in {build_seconds:.3f}s")
+    print(f"resolved {len(mapping)} constituents in {resolve_seconds:.3f}s "
+          f"({mapping['CUSIP'].notna().sum()} with a CUSIP)")
+    print(f"SPY check: {accuracy:.2%} of {len(check)} constituents resolved to the SPY CUSIP")
@@ -0,0 +1,328 @@
+"""
+Versioned, memory-mapped bundle of the trained artifacts.
+
+A bundle root holds immutable version directories and a pointer to the
+published one:
+
+    CURRENT                 name of the published version directory
+    v<UTC timestamp>/       one written bundle, never modified afterwards
+
+Layout of a version directory:
+
+    manifest.json           schema version, training cutoff, per-file sha256,
+                            shapes, dtypes and fund feature columns
+    stock_emb.npy           float32 stock embeddings (stock code order)
+    fund_emb.npy            float32 fund embeddings (fund code order)
+    fund_features.npy       float64 fund topology features
+    fund_feature_ids.npy    fund ids of the fund_features rows
+    funds.npy, stocks.npy   ids in code order, fixed-width bytes ('S<n>')
+    model.txt               LightGBM model in its text format
+
+Arrays are opened with np.load(mmap_mode="r"), so opening a bundle reads
+only the manifest, components are mapped on first access and processes
+scoring from the same bundle share the page cache instead of each holding
+an unpickled copy. Every write goes to a new version directory (the manifest
+last) and is published by atomically replacing CURRENT, so files another
+process has mapped are never overwritten and readers see either the old or
+the new version, never a mix. Old versions are only deleted by an explicit
+prune(). A directory without a manifest is not a bundle.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_VERSION = 1
+MANIFEST = "manifest.json"
+MODEL_FILE = "model.txt"
+CURRENT = "CURRENT"
+
+
+def _sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_ids(ids: Sequence) -> np.ndarray:
+    """Ids as a fixed-width byte string array (mmap-able, no pickling)."""
+    return np.array([str(i) for i in ids], dtype=np.bytes_)
+
+
+def decode_ids(encoded: np.ndarray) -> np.ndarray:
+    """Object array of str ids from encode_ids()."""
+    return np.char.decode(encoded, "utf-8").astype(object)
+
+
+class ArtifactBundle:
+    """
+    Lazily loaded view of one bundle version (see write()).
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Bundle root (opens its CURRENT version) or a version
+                directory.
+
+        Raises:
+            FileNotFoundError: No manifest in path.
+            ValueError: Unsupported schema version.
+        """
+        self.root, self.path = self._resolve(path)
+        self.version = os.path.basename(os.path.normpath(self.path))
+        with open(os.path.join(self.path, MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("schema") != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported artifact schema {self.manifest.get('schema')} (expected {SCHEMA_VERSION})")
+
+    @staticmethod
+    def _resolve(path: str):
+        """(bundle root, version directory) of a root or version path."""
+        pointer = os.path.join(path, CURRENT)
+        if os.path.exists(pointer):
+            with open(pointer, encoding="utf-8") as f:
+                return path, os.path.join(path, f.read().strip())
+        parent = os.path.dirname(os.path.normpath(path))
+        if os.path.exists(os.path.join(parent, CURRENT)):
+            return parent, path
+        # directory written before versioning: the bundle is the directory itself
+        return path, path
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Whether path is a bundle root with a published version (or a version directory)."""
+        return os.path.exists(os.path.join(path, CURRENT)) or os.path.exists(os.path.join(path, MANIFEST))
+
+    # ==================== WRITE ====================
+
+    @classmethod
+    def write(
+        cls,
+        path: str,
+        stock_emb: np.ndarray,
+        fund_emb: np.ndarray,
+        fund_features: pd.DataFrame,
+        funds: Sequence,
+        stocks: Sequence,
+        cutoff=None,
+        model=None,
+    ) -> "ArtifactBundle":
+        """
+        Write a new bundle version and publish it.
+
+        Args:
+            path: Bundle root (created if missing).
+            stock_emb, fund_emb: Embeddings in stock / fund code order.
+            fund_features: Numeric fund features indexed by fund id.
+            funds, stocks: Ids in code order.
+            cutoff: Last holding date used for training.
+            model: LightGBM Booster (optional, see write_model()).
+
+        Returns:
+            The written bundle.
+        """
+        version_path = cls._new_version(path)
+
+        arrays = {
+            "stock_emb": np.ascontiguousarray(stock_emb, dtype=np.float32),
+            "fund_emb": np.ascontiguousarray(fund_emb, dtype=np.float32),
+            "fund_features": fund_features.to_numpy(dtype=np.float64),
+            "fund_feature_ids": encode_ids(fund_features.index),
+            "funds": encode_ids(funds),
+            "stocks": encode_ids(stocks),
+        }
+        components = {}
+        for name, array in arrays.items():
+            file_name = f"{name}.npy"
+            np.save(os.path.join(version_path, file_name), array)
+            components[name] = {
+                "file": file_name,
+                "sha256": _sha256(os.path.join(version_path, file_name)),
+                "shape": list(array.shape),
+                "dtype": array.dtype.str,
+            }
+
+        manifest = {
+            "schema": SCHEMA_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "cutoff": None if cutoff is None else pd.Timestamp(cutoff).date().isoformat(),
+            "fund_feature_columns": {str(c): str(t) for c, t in fund_features.dtypes.items()},
+            "fund_feature_index_name": fund_features.index.name,
+            "components": components,
+        }
+        if model is not None:
+            manifest["components"]["model"] = cls._save_model(version_path, model)
+        cls._write_manifest(version_path, manifest)
+        return cls._publish(path, version_path)
+
+    def write_model(self, model) -> "ArtifactBundle":
+        """
+        Publish a new version with this bundle's arrays and a LightGBM Booster.
+
+        The arrays are hard-linked into the new version (copied where links
+        are not supported); this version is left unchanged.
+
+        Args:
+            model: LightGBM Booster, stored in its text format.
+
+        Returns:
+            The new bundle version.
+        """
+        version_path = self._new_version(self.root)
+        manifest = json.loads(json.dumps(self.manifest))
+        manifest["created"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        for name, component in self.manifest["components"].items():
+            if name == "model":
+                continue
+            source, target = os.path.join(self.path, component["file"]), os.path.join(version_path, component["file"])
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+        manifest["components"]["model"] = self._save_model(version_path, model)
+        self._write_manifest(version_path, manifest)
+        return self._publish(self.root, version_path)
+
+    @staticmethod
+    def _save_model(version_path: str, model) -> dict:
+        file_path = os.path.join(version_path, MODEL_FILE)
+        model.save_model(file_path)
+        return {"file": MODEL_FILE, "sha256": _sha256(file_path)}
+
+    @staticmethod
+    def _new_version(root: str) -> str:
+        """Create an empty version directory under root."""
+        os.makedirs(root, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("v%Y%m%dT%H%M%S%fZ")
+        version_path, n = os.path.join(root, stamp), 0
+        while os.path.exists(version_path):
+            n += 1
+            version_path = os.path.join(root, f"{stamp}-{n}")
+        os.makedirs(version_path)
+        return version_path
+
+    @staticmethod
+    def _write_manifest(path: str, manifest: dict) -> None:
+        tmp_path = os.path.join(path, MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(path, MANIFEST))
+
+    @classmethod
+    def _publish(cls, root: str, version_path: str) -> "ArtifactBundle":
+        """Point CURRENT at a written version (older versions are kept, see prune())."""
+        tmp_path = os.path.join(root, CURRENT + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(os.path.basename(version_path))
+        os.replace(tmp_path, os.path.join(root, CURRENT))
+        return cls(root)
+
+    @classmethod
+    def prune(cls, root: str, keep: int = 3, min_age: float = 24 * 3600) -> List[str]:
+        """
+        Delete old versions that readers can no longer be using.
+
+        Components load lazily from their version directory, so a reader that
+        opened a version keeps needing it after newer ones are published. A
+        version is only deleted when it is not among the newest keep, is not
+        CURRENT and was superseded at least min_age seconds ago.
+
+        Args:
+            root: Bundle root.
+            keep: Newest versions always kept (at least 1).
+            min_age: Seconds since a newer version was written.
+
+        Returns:
+            Deleted version names.
+        """
+        versions = cls.versions(root)
+        with open(os.path.join(root, CURRENT), encoding="utf-8") as f:
+            current = f.read().strip()
+        now = time.time()
+
+        deleted = []
+        for old, newer in zip(versions[:-max(keep, 1)], versions[1:]):
+            superseded = os.path.getmtime(os.path.join(root, newer))
+            if old != current and now - superseded >= min_age:
+                shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+                deleted.append(old)
+        return deleted
+
+    @staticmethod
+    def versions(root: str) -> list:
+        """Complete version directories (with a manifest) under a bundle root, oldest first."""
+        if not os.path.isdir(root):
+            return []
+        return sorted(
+            name for name in os.listdir(root)
+            if name.startswith("v") and os.path.exists(os.path.join(root, name, MANIFEST))
+        )
+
+    # ==================== LAZY COMPONENTS ====================
+
+    @property
+    def cutoff(self) -> Optional[pd.Timestamp]:
+        cutoff = self.manifest.get("cutoff")
+        return None if cutoff is None else pd.Timestamp(cutoff)
+
+    def _array(self, name: str) -> np.ndarray:
+        component = self.manifest["components"][name]
+        return np.load(os.path.join(self.path, component["file"]), mmap_mode="r")
+
+    @cached_property
+    def stock_emb(self) -> np.ndarray:
+        return self._array("stock_emb")
+
+    @cached_property
+    def fund_emb(self) -> np.ndarray:
+        return self._array("fund_emb")
+
+    @cached_property
+    def funds(self) -> np.ndarray:
+        return decode_ids(self._array("funds"))
+
+    @cached_property
+    def stocks(self) -> np.ndarray:
+        return decode_ids(self._array("stocks"))
+
+    @cached_property
+    def fund_features(self) -> pd.DataFrame:
+        columns: Dict[str, str] = self.manifest["fund_feature_columns"]
+        index = pd.Index(decode_ids(self._array("fund_feature_ids")), name=self.manifest.get("fund_feature_index_name"))
+        frame = pd.DataFrame(self._array("fund_features"), index=index, columns=list(columns), copy=False)
+        return frame.astype(columns, copy=False)
+
+    @cached_property
+    def model(self):
+        """LightGBM Booster (None when the bundle has no model)."""
+        if "model" not in self.manifest["components"]:
+            return None
+        import lightgbm as lgb
+
+        return lgb.Booster(model_file=os.path.join(self.path, self.manifest["components"]["model"]["file"]))
+
+    # ==================== INTEGRITY ====================
+
+    def verify(self) -> None:
+        """
+        Check every component against its manifest hash.
+
+        Raises:
+            ValueError: A component is missing or its hash does not match.
+        """
+        for name, component in self.manifest["components"].items():
+            file_path = os.path.join(self.path, component["file"])
+            if not os.path.exists(file_path):
+                raise ValueError(f"Artifact component {name} is missing: {file_path}")
+            if _sha256(file_path) != component["sha256"]:
+                raise ValueError(f"Artifact component {name} does not match its manifest hash")
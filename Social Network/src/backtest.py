@@ -0,0 +1,272 @@
+"""
+Rolling-window backtest over quarterly cutoffs.
+
+For every cutoff quarter the notebook's pipeline is rerun out of sample:
+
+    1. graph + fund features from all holdings up to the end of the quarter
+       (GraphSnapshotEngine);
+    2. GraphSAGE embeddings on that graph (sage_training);
+    3. LightGBM on the cutoff quarter's holdings vs. hard negatives;
+    4. evaluation on the next quarter: AUC on its holdings vs. hard negatives
+       and precision@k of the exhaustive top-k recommendations.
+
+Step 1 runs in the parent: cutoffs are visited in date order, so the
+snapshot engine only appends each quarter's holdings, and every snapshot is
+written to an on-disk feature cache keyed by the cutoff and a hash of the
+holdings it was built from. Steps 2-4 run for all cutoffs in parallel worker
+processes that read their snapshot from the cache, so a rerun (e.g. with
+other model settings) skips the graph work entirely.
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import torch
+from sklearn.metrics import roc_auc_score
+
+from bipartite_graph import BipartiteGraph
+from graph_snapshots import GraphSnapshotEngine
+from hard_negatives import hard_negatives
+from link_features import LinkFeatureBuilder
+from portfolio_scorer import PortfolioScorer
+from sage_training import embed, node_features, train_sage
+
+LGB_PARAMS = {
+    'objective': 'binary',
+    'metric': 'auc',
+    'learning_rate': 0.01,
+    'num_leaves': 31,
+    'verbose': -1
+}
+
+
+def quarter_calendar(data: pd.DataFrame, quarter_col: str = "QUARTER", time_col: str = "PERIOD_DATE") -> pd.DataFrame:
+    """Quarters of data in date order, with their first and last holding dates."""
+    calendar = data.groupby(quarter_col)[time_col].agg(start="min", end="max")
+    return calendar.sort_values("end")
+
+
+class FeatureCache:
+    """
+    Per-cutoff graph and fund features on disk, shared by the worker processes.
+
+    Entries are keyed by the cutoff date and a fingerprint of the holdings
+    dated up to it, so changed input data never hits a stale entry.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def fingerprint(cls, holdings: pd.DataFrame, top_k: Optional[int]) -> str:
+        digest = hashlib.sha256(f"v{cls.VERSION}:top_k={top_k}:{len(holdings)}".encode())
+        digest.update(pd.util.hash_pandas_object(holdings, index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:16]
+
+    def entry(self, cutoff: pd.Timestamp, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{cutoff.date().isoformat()}_{fingerprint}")
+
+    def contains(self, entry: str) -> bool:
+        return os.path.exists(os.path.join(entry, "fund_features.parquet"))
+
+    def store(self, entry: str, graph: BipartiteGraph, fund_features: pd.DataFrame) -> None:
+        os.makedirs(entry, exist_ok=True)
+        graph.save(os.path.join(entry, "graph.npz"))
+        # fund_features.parquet is written last and marks a complete entry
+        fund_features.to_parquet(os.path.join(entry, "fund_features.parquet"))
+
+    @staticmethod
+    def load(entry: str) -> Tuple[BipartiteGraph, pd.DataFrame]:
+        graph = BipartiteGraph.load(os.path.join(entry, "graph.npz"))
+        return graph, pd.read_parquet(os.path.join(entry, "fund_features.parquet"))
+
+
+# ==================== PER-CUTOFF RUN (worker process) ====================
+
+def _holdings_matrix(graph: BipartiteGraph, holdings: pd.DataFrame) -> sp.csr_matrix:
+    """Fund x stock matrix of holdings whose fund and stock are in the graph."""
+    funds = pd.Index(graph.funds).get_indexer(holdings["CIK"])
+    stocks = pd.Index(graph.stocks).get_indexer(holdings["CUSIP"])
+    seen = (funds >= 0) & (stocks >= 0)
+    H = sp.csr_matrix(
+        (np.ones(seen.sum(), dtype=np.int32), (funds[seen], stocks[seen])),
+        shape=(len(graph.funds), len(graph.stocks)),
+    )
+    H.data[:] = 1
+    return H
+
+
+def _labelled_pairs(H: sp.csr_matrix, stock_emb: np.ndarray, negatives_per_fund: int, rng: np.random.Generator):
+    """Holdings of H as positives plus as many hard negatives (sampled uniformly from the candidates)."""
+    neg_funds, neg_stocks = hard_negatives(stock_emb, H, k=negatives_per_fund, workers=1)
+    H = H.tocoo()
+    if len(neg_funds) > H.nnz:
+        keep = np.sort(rng.choice(len(neg_funds), size=H.nnz, replace=False))
+        neg_funds, neg_stocks = neg_funds[keep], neg_stocks[keep]
+
+    funds = np.concatenate([H.row, neg_funds]).astype(np.int64)
+    stocks = np.concatenate([H.col, neg_stocks]).astype(np.int64)
+    labels = np.concatenate([np.ones(H.nnz), np.zeros(len(neg_funds))])
+    return funds, stocks, labels
+
+
+def _run_cutoff(task: dict) -> dict:
+    """Embeddings, LightGBM and next-quarter evaluation of one cutoff."""
+    timings = {}
+    start = time.perf_counter()
+    torch.set_num_threads(task["threads"])
+    rng = np.random.default_rng(task["seed"])
+
+    graph, fund_features = FeatureCache.load(task["entry"])
+    timings["load_s"] = time.perf_counter() - start
+
+    step = time.perf_counter()
+    x = node_features(graph, seed=task["seed"])
+    model, history = train_sage(graph, x, threads=task["threads"], seed=task["seed"], verbose=False, **task["sage_kwargs"])
+    emb = embed(model, graph, x)
+    fund_emb, stock_emb = emb[: len(graph.funds)], emb[len(graph.funds) :]
+    timings["embedding_s"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    builder = LinkFeatureBuilder(fund_emb, stock_emb, fund_features, graph.funds)
+    f, s, y = _labelled_pairs(_holdings_matrix(graph, task["train_holdings"]), stock_emb, task["negatives_per_fund"], rng)
+    params = dict(task["lgb_params"], num_threads=task["threads"], seed=task["seed"])
+    bst = lgb.train(params, lgb.Dataset(builder.build(f, s), label=y), num_boost_round=task["num_boost_round"])
+    timings["lightgbm_s"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    H_test = _holdings_matrix(graph, task["test_holdings"])
+    f, s, y = _labelled_pairs(H_test, stock_emb, task["negatives_per_fund"], rng)
+    auc = roc_auc_score(y, bst.predict(builder.build(f, s))) if 0 < y.sum() < len(y) else np.nan
+
+    k = task["k"]
+    eval_funds = np.flatnonzero(np.diff(H_test.indptr) > 0)
+    if task["max_eval_funds"] and len(eval_funds) > task["max_eval_funds"]:
+        eval_funds = np.sort(rng.choice(eval_funds, size=task["max_eval_funds"], replace=False))
+    scorer = PortfolioScorer(bst, fund_emb, stock_emb, fund_features, graph.funds, graph.stocks)
+    top, _ = scorer.top_k_codes(eval_funds, k)
+    test_funds, test_stocks = H_test.nonzero()
+    held_keys = test_funds.astype(np.int64) * len(graph.stocks) + test_stocks
+    hits = np.isin(eval_funds[:, None] * len(graph.stocks) + top, held_keys)
+    timings["evaluation_s"] = time.perf_counter() - step
+    timings["total_s"] = time.perf_counter() - start
+
+    return {
+        "cutoff_quarter": task["cutoff_quarter"],
+        "test_quarter": task["test_quarter"],
+        "cutoff": task["cutoff"],
+        "funds": len(graph.funds),
+        "stocks": len(graph.stocks),
+        "edges": graph.number_of_edges(),
+        "test_positives": int(H_test.nnz),
+        "sage_epochs": len(history),
+        "auc": auc,
+        f"precision@{k}": hits.mean() if len(hits) else np.nan,
+        "eval_funds": len(eval_funds),
+        **timings,
+    }
+
+
+# ==================== HARNESS ====================
+
+def run_backtest(
+    data: pd.DataFrame,
+    cutoff_quarters: Sequence[str],
+    k: int = 10,
+    workers: Optional[int] = None,
+    cache_dir: str = os.path.join("artifacts", "backtest_cache"),
+    top_k: Optional[int] = None,
+    sage_kwargs: Optional[dict] = None,
+    lgb_params: Optional[dict] = None,
+    num_boost_round: int = 100,
+    negatives_per_fund: int = 50,
+    max_eval_funds: Optional[int] = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Backtest every cutoff quarter against the quarter after it.
+
+    Args:
+        data: Holdings with CIK, CUSIP, VALUE, SSHPRNAMT, PERIOD_DATE and QUARTER.
+        cutoff_quarters: Training cutoffs as QUARTER labels (e.g. "Q2_2018");
+            each needs a following quarter in data.
+        k: Recommendations per fund for precision@k.
+        workers: Processes running cutoffs in parallel (default: os.cpu_count());
+            torch/LightGBM threads are split evenly between them.
+        cache_dir: Feature cache directory (shared by runs and workers).
+        top_k: Projection pruning of the snapshot engine.
+        sage_kwargs: Extra train_sage() arguments (e.g. epochs, batch_size).
+        lgb_params: LightGBM parameters (default: the notebook's LGB_PARAMS).
+        num_boost_round: LightGBM rounds.
+        negatives_per_fund: Hard negatives sampled per fund (before balancing).
+        max_eval_funds: Evaluate precision@k on a random subset of funds.
+        seed: Seed of embeddings, sampling and LightGBM.
+
+    Returns:
+        Metrics table, one row per cutoff: AUC, precision@k, sizes and wall
+        times per stage (features_s is the snapshot build, 0 on a cache hit).
+    """
+    data = data.sort_values("PERIOD_DATE", kind="stable")
+    calendar = quarter_calendar(data)
+    quarters = list(calendar.index)
+    cache = FeatureCache(cache_dir)
+    columns = ["CIK", "CUSIP", "VALUE", "SSHPRNAMT", "PERIOD_DATE"]
+
+    # snapshots in date order, incrementally, for the cache misses
+    plan = []
+    engine = GraphSnapshotEngine(top_k=top_k)
+    for quarter in sorted(cutoff_quarters, key=quarters.index):
+        position = quarters.index(quarter)
+        if position + 1 >= len(quarters):
+            raise ValueError(f"Cutoff {quarter} has no following quarter to evaluate on")
+        cutoff = calendar.loc[quarter, "end"]
+        entry = cache.entry(cutoff, cache.fingerprint(data.loc[data["PERIOD_DATE"] <= cutoff, columns], top_k))
+
+        start = time.perf_counter()
+        hit = cache.contains(entry)
+        if not hit:
+            snapshot = engine.advance_to(data, cutoff)
+            cache.store(entry, snapshot.graph, snapshot.fund_features)
+        plan.append((quarter, quarters[position + 1], cutoff, entry, hit, time.perf_counter() - start))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(plan)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    tasks = [
+        {
+            "cutoff_quarter": quarter,
+            "test_quarter": test_quarter,
+            "cutoff": cutoff,
+            "entry": entry,
+            "train_holdings": data.loc[data["QUARTER"] == quarter, ["CIK", "CUSIP"]],
+            "test_holdings": data.loc[data["QUARTER"] == test_quarter, ["CIK", "CUSIP"]],
+            "k": k,
+            "threads": threads,
+            "seed": seed,
+            "sage_kwargs": sage_kwargs or {},
+            "lgb_params": lgb_params or LGB_PARAMS,
+            "num_boost_round": num_boost_round,
+            "negatives_per_fund": negatives_per_fund,
+            "max_eval_funds": max_eval_funds,
+        }
+        for quarter, test_quarter, cutoff, entry, _, _ in plan
+    ]
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results: List[Dict] = list(pool.map(_run_cutoff, tasks))
+    else:
+        results = [_run_cutoff(task) for task in tasks]
+
+    metrics = pd.DataFrame(results)
+    metrics.insert(metrics.columns.get_loc("load_s"), "feature_cache_hit", [hit for *_, hit, _ in plan])
+    metrics.insert(metrics.columns.get_loc("load_s"), "features_s", [seconds for *_, seconds in plan])
+    return metrics
@@ -0,0 +1,384 @@
+"""
+Sparse fund x stock bipartite graph.
+
+Replaces the networkx construction in network-pipeline.ipynb: holdings are
+integer-coded with pd.factorize and stored as CSR matrices, so building the
+graph and projecting it onto funds are vectorized sparse operations instead
+of per-row / per-pair Python loops.
+"""
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class BipartiteGraph:
+    """
+    Fund x stock bipartite graph stored as CSR matrices.
+
+    Rows are funds and columns are stocks, both in first-appearance order of
+    the input frame (the same order as df['CIK'].unique()). All matrices share
+    the sparsity pattern of the adjacency matrix B:
+        B       1 for every (fund, stock) edge
+        value   VALUE of the edge
+        amount  SSHPRNAMT of the edge
+        time    PERIOD_DATE of the edge, as int64 seconds since epoch
+
+    Duplicate (fund, stock) rows keep the attributes of the last row, like
+    repeated nx.Graph.add_edge calls did.
+    """
+
+    # Dense entries per row block of blocked products (~128 MB of int32).
+    PROJECTION_BLOCK_ENTRIES = 1 << 25
+
+    def __init__(
+        self,
+        funds: np.ndarray,
+        stocks: np.ndarray,
+        B: sp.csr_matrix,
+        value: sp.csr_matrix,
+        amount: sp.csr_matrix,
+        time: sp.csr_matrix,
+    ):
+        self.funds = funds
+        self.stocks = stocks
+        self.B = B
+        self.value = value
+        self.amount = amount
+        self.time = time
+        self._fund_index: Optional[dict] = None
+        self._stock_index: Optional[dict] = None
+        self._B_csc: Optional[sp.csc_matrix] = None
+
+    # ==================== CONSTRUCTION ====================
+
+    @classmethod
+    def empty(cls) -> "BipartiteGraph":
+        """Graph without nodes, the starting point of extend()."""
+        B = sp.csr_matrix((0, 0), dtype=np.int32)
+        return cls(
+            np.array([], dtype=object),
+            np.array([], dtype=object),
+            B,
+            value=sp.csr_matrix((0, 0), dtype=np.float64),
+            amount=sp.csr_matrix((0, 0), dtype=np.float64),
+            time=sp.csr_matrix((0, 0), dtype=np.int64),
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **columns) -> "BipartiteGraph":
+        """
+        Build the graph from a holdings frame.
+
+        Args:
+            df: Holdings with one row per (fund, stock) filing line.
+            **columns: Column names, see extend().
+
+        Returns:
+            BipartiteGraph over all funds and stocks in df.
+        """
+        graph, _, _ = cls.empty().extend(df, **columns)
+        return graph
+
+    def extend(
+        self,
+        df: pd.DataFrame,
+        fund_col: str = "CIK",
+        stock_col: str = "CUSIP",
+        value_col: str = "VALUE",
+        amount_col: str = "SSHPRNAMT",
+        time_col: str = "PERIOD_DATE",
+    ) -> Tuple["BipartiteGraph", sp.csr_matrix, sp.csr_matrix]:
+        """
+        Add holdings that come after the ones already in the graph.
+
+        New funds and stocks get the next codes, so node order stays the
+        first-appearance order of the concatenated input. Rows of df override
+        the attributes of existing edges (last row wins). The graph itself is
+        not modified.
+
+        Args:
+            df: Holdings to add.
+            fund_col, stock_col: Node id columns.
+            value_col, amount_col, time_col: Edge attribute columns.
+
+        Returns:
+            (graph, delta_B, delta_T): the extended graph, the adjacency of the
+            edges that did not exist before, and time' - time, both in the
+            shape of the extended graph.
+        """
+        funds, fund_codes = self._extend_ids(self.funds, df[fund_col])
+        stocks, stock_codes = self._extend_ids(self.stocks, df[stock_col])
+        shape = (len(funds), len(stocks))
+
+        # last row wins for duplicate edges
+        pair = fund_codes * shape[1] + stock_codes
+        keep = ~pd.Series(pair).duplicated(keep="last").to_numpy()
+        rows, cols, keys = fund_codes[keep], stock_codes[keep], pair[keep]
+
+        seconds = pd.to_datetime(df[time_col]).to_numpy()[keep].astype("datetime64[s]").astype(np.int64)
+        attributes = {
+            "value": df[value_col].to_numpy(dtype=np.float64)[keep],
+            "amount": df[amount_col].to_numpy(dtype=np.float64)[keep],
+            "time": seconds,
+        }
+
+        old_rows, old_cols = self.edge_arrays()
+        old_keys = old_rows * shape[1] + old_cols
+        kept_old = ~np.isin(old_keys, keys)
+        added = ~np.isin(keys, old_keys)
+
+        all_rows = np.concatenate([old_rows[kept_old], rows])
+        all_cols = np.concatenate([old_cols[kept_old], cols])
+        B = sp.csr_matrix((np.ones(len(all_rows), dtype=np.int32), (all_rows, all_cols)), shape=shape)
+        matrices = {
+            name: sp.csr_matrix(
+                (np.concatenate([getattr(self, name).data[kept_old], data]), (all_rows, all_cols)),
+                shape=shape,
+            )
+            for name, data in attributes.items()
+        }
+        for matrix in [B, *matrices.values()]:
+            matrix.sort_indices()
+
+        delta_B = sp.csr_matrix(
+            (np.ones(added.sum(), dtype=np.int32), (rows[added], cols[added])), shape=shape
+        )
+        delta_T = matrices["time"] - self.padded(self.time, shape)
+        delta_T.eliminate_zeros()
+
+        return BipartiteGraph(funds, stocks, B, **matrices), delta_B, delta_T
+
+    @staticmethod
+    def _extend_ids(ids: np.ndarray, values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Codes of values in ids, appending unseen values in first-appearance order."""
+        codes = pd.Index(ids).get_indexer(values).astype(np.int64)
+        unseen = codes < 0
+        if unseen.any():
+            new_codes, new_ids = pd.factorize(values.to_numpy()[unseen], sort=False)
+            codes[unseen] = len(ids) + new_codes
+            ids = np.concatenate([ids, np.asarray(new_ids, dtype=object)])
+        return ids, codes
+
+    def save(self, path: str) -> None:
+        """Write the graph to a .npz file (ids as fixed-width strings, no pickling)."""
+        arrays = {
+            "funds": np.array([str(f) for f in self.funds], dtype=np.str_),
+            "stocks": np.array([str(s) for s in self.stocks], dtype=np.str_),
+            "indptr": self.B.indptr,
+            "indices": self.B.indices,
+        }
+        for name in ("value", "amount", "time"):
+            arrays[name] = getattr(self, name).data
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "BipartiteGraph":
+        """Read a graph written by save()."""
+        with np.load(path) as stored:
+            funds = stored["funds"].astype(object)
+            stocks = stored["stocks"].astype(object)
+            shape = (len(funds), len(stocks))
+            indptr, indices = stored["indptr"], stored["indices"]
+
+            def matrix(data: np.ndarray) -> sp.csr_matrix:
+                return sp.csr_matrix((data, indices, indptr), shape=shape)
+
+            B = matrix(np.ones(len(indices), dtype=np.int32))
+            return cls(
+                funds,
+                stocks,
+                B,
+                value=matrix(stored["value"]),
+                amount=matrix(stored["amount"]),
+                time=matrix(stored["time"]),
+            )
+
+    @staticmethod
+    def padded(matrix: sp.csr_matrix, shape: Tuple[int, int]) -> sp.csr_matrix:
+        """CSR matrix padded with empty trailing rows/columns to shape (data is shared)."""
+        indptr = np.concatenate(
+            [matrix.indptr, np.full(shape[0] - matrix.shape[0], matrix.indptr[-1], dtype=matrix.indptr.dtype)]
+        )
+        return sp.csr_matrix((matrix.data, matrix.indices, indptr), shape=shape)
+
+    # ==================== PROJECTION ====================
+
+    def project(self, top_k: Optional[int] = None) -> sp.csr_matrix:
+        """
+        Weighted fund-fund projection P = B * B^T without self loops.
+
+        P[i, j] is the number of stocks held by both fund i and fund j, the
+        'weight' of bipartite.weighted_projected_graph.
+
+        Args:
+            top_k: Keep only the top_k heaviest neighbors of every fund (ties
+                broken arbitrarily). The product is then computed in row
+                blocks, so the full projection is never materialized. The
+                result stays symmetric: an edge is kept when it is in the
+                top_k of either endpoint.
+
+        Returns:
+            Symmetric n_funds x n_funds CSR matrix of shared-stock counts.
+        """
+        if top_k is None:
+            P = (self.B @ self.B.T).tocsr()
+            P.setdiag(0)
+        else:
+            BT = self.B.T.tocsc()
+            P = self._top_k_blocks(lambda start, stop: (self.B[start:stop] @ BT).toarray(), len(self.funds), top_k)
+
+        P.eliminate_zeros()
+        P.sort_indices()
+        return P
+
+    @classmethod
+    def prune_top_k(cls, P: sp.csr_matrix, top_k: int) -> sp.csr_matrix:
+        """Apply the top_k pruning of project() to an existing projection."""
+        P = cls._top_k_blocks(lambda start, stop: P[start:stop].toarray(), P.shape[0], top_k)
+        P.eliminate_zeros()
+        P.sort_indices()
+        return P
+
+    @classmethod
+    def _top_k_blocks(cls, dense_rows: Callable[[int, int], np.ndarray], n_funds: int, k: int) -> sp.csr_matrix:
+        """
+        Keep the k heaviest off-diagonal entries of every row, one dense row
+        block at a time, and symmetrize the result.
+
+        Args:
+            dense_rows: Returns rows [start, stop) of the projection as a dense array.
+            n_funds: Number of rows/columns.
+            k: Entries kept per row.
+        """
+        k = min(k, max(n_funds - 1, 1))
+        block = max(1, cls.PROJECTION_BLOCK_ENTRIES // max(n_funds, 1))
+
+        rows, cols, weights = [], [], []
+        for start in range(0, n_funds, block):
+            stop = min(start + block, n_funds)
+            dense = dense_rows(start, stop)
+            local = np.arange(stop - start)
+            dense[local, start + local] = 0
+
+            top = np.argpartition(dense, dense.shape[1] - k, axis=1)[:, -k:]
+            top_weights = np.take_along_axis(dense, top, axis=1)
+            keep = top_weights > 0
+            rows.append(np.broadcast_to((start + local)[:, None], top.shape)[keep])
+            cols.append(top[keep])
+            weights.append(top_weights[keep])
+
+        P = sp.csr_matrix(
+            (np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_funds, n_funds),
+        )
+        return P.maximum(P.T).tocsr()
+
+    # ==================== TEMPORAL DIRECTION ====================
+
+    def lead_lag_edges(
+        self, P: sp.csr_matrix, S: Optional[sp.csr_matrix] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Orient every fund-fund edge of a projection from the earlier to the later holder.
+
+        For an edge (u, v) the average holding time of their shared stocks is
+        compared; averages are over the same stocks, so comparing the sums
+        S[u, v] and S[v, u] of S = T * B^T is equivalent. Ties point from the
+        later fund to the earlier one (in fund order), as the networkx loop did.
+        Edge set, orientation and weights match that loop; node order does
+        not (codes follow fund order, not edge insertion order), so consumers
+        key results by fund id rather than by position.
+
+        Args:
+            P: Symmetric projection from project().
+            S: Precomputed T * B^T (e.g. maintained by GraphSnapshotEngine);
+                computed in row blocks when omitted.
+
+        Returns:
+            (source, target, weight) arrays of fund codes, in upper-triangle
+            (u < v) order of P.
+        """
+        upper = sp.triu(P, k=1).tocoo()
+        u, v = upper.row.astype(np.int64), upper.col.astype(np.int64)
+
+        rows, cols = np.concatenate([u, v]), np.concatenate([v, u])
+        if S is None:
+            sums = self._time_sums(rows, cols)
+        else:
+            sums = np.asarray(S[rows, cols]).ravel()
+        forward = sums[: len(u)] < sums[len(u) :]
+
+        source = np.where(forward, u, v)
+        target = np.where(forward, v, u)
+        return source, target, upper.data
+
+    def direct(self, P: sp.csr_matrix) -> sp.csr_matrix:
+        """Directed lead/lag adjacency (see lead_lag_edges) as a CSR matrix."""
+        source, target, weight = self.lead_lag_edges(P)
+        return sp.csr_matrix((weight, (source, target)), shape=P.shape)
+
+    def _time_sums(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Gather (T * B^T)[rows, cols] by dense row blocks."""
+        n_funds = len(self.funds)
+        BT = self.B.T.tocsc()
+        block = max(1, self.PROJECTION_BLOCK_ENTRIES // max(2 * n_funds, 1))
+
+        order = np.argsort(rows, kind="stable")
+        bounds = np.searchsorted(rows[order], np.arange(0, n_funds + block, block))
+
+        sums = np.zeros(len(rows), dtype=np.int64)
+        for b, start in enumerate(range(0, n_funds, block)):
+            pairs = order[bounds[b] : bounds[b + 1]]
+            if not len(pairs):
+                continue
+            dense = (self.time[start : start + block] @ BT).toarray()
+            sums[pairs] = dense[rows[pairs] - start, cols[pairs]]
+        return sums
+
+    # ==================== NETWORKX-COMPATIBLE ACCESSORS ====================
+
+    @property
+    def fund_index(self) -> dict:
+        if self._fund_index is None:
+            self._fund_index = {f: i for i, f in enumerate(self.funds)}
+        return self._fund_index
+
+    @property
+    def stock_index(self) -> dict:
+        if self._stock_index is None:
+            self._stock_index = {s: i for i, s in enumerate(self.stocks)}
+        return self._stock_index
+
+    def number_of_nodes(self) -> int:
+        return len(self.funds) + len(self.stocks)
+
+    def number_of_edges(self) -> int:
+        return self.B.nnz
+
+    def edge_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(fund_codes, stock_codes) of every edge, in CSR order."""
+        rows = np.repeat(np.arange(len(self.funds)), np.diff(self.B.indptr))
+        return rows, self.B.indices.copy()
+
+    def edges(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (fund, stock) id pairs."""
+        rows, cols = self.edge_arrays()
+        return zip(self.funds[rows], self.stocks[cols])
+
+    def neighbors(self, node) -> List:
+        """Stocks held by a fund, or funds holding a stock."""
+        if node in self.fund_index:
+            i = self.fund_index[node]
+            return list(self.stocks[self.B.indices[self.B.indptr[i] : self.B.indptr[i + 1]]])
+        if node in self.stock_index:
+            if self._B_csc is None:
+                self._B_csc = self.B.tocsc()
+                self._B_csc.sort_indices()
+            j = self.stock_index[node]
+            return list(self.funds[self._B_csc.indices[self._B_csc.indptr[j] : self._B_csc.indptr[j + 1]]])
+        raise KeyError(f"Node {node} is not in the graph")
+
+    def __contains__(self, node) -> bool:
+        return node in self.fund_index or node in self.stock_index
@@ -0,0 +1,337 @@
+"""
+Sparse centralities for the directed fund graph.
+
+NumPy/SciPy replacements for the networkx calls used to build fund_features
+(same definitions and defaults as networkx):
+    degree      (in + out degree) / (n - 1)
+    pagerank    weighted PageRank, power iteration
+    hub/authority   weighted HITS, power iteration on A^T A
+    closeness   (n - 1) / sum of BFS distances on the largest connected
+                component, estimated from sampled pivots (Eppstein-Wang)
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components, shortest_path
+
+CENTRALITY_COLUMNS = ["degree", "pagerank", "hub", "authority", "closeness"]
+
+# Pivots per process pool task.
+PIVOT_CHUNK = 64
+
+
+# ==================== DEGREE / PAGERANK / HITS ====================
+
+def degree(A: sp.csr_matrix) -> np.ndarray:
+    """Unweighted (in + out) degree centrality, as nx.degree_centrality."""
+    n = A.shape[0]
+    if n <= 1:
+        return np.ones(n)
+    counts = np.diff(A.indptr) + np.bincount(A.indices, minlength=n)
+    return counts / (n - 1)
+
+
+def pagerank(
+    A: sp.csr_matrix,
+    alpha: float = 0.85,
+    tol: float = 1e-6,
+    max_iter: int = 100,
+    nstart: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Weighted PageRank by sparse power iteration (nx.pagerank semantics).
+
+    Dangling nodes redistribute their rank uniformly; iteration stops when
+    the L1 change drops below n * tol.
+
+    Args:
+        A: Weighted adjacency, A[i, j] = weight of edge i -> j.
+        alpha: Damping factor.
+        tol: Convergence tolerance.
+        max_iter: Maximum number of iterations.
+        nstart: Starting vector (e.g. the previous snapshot's ranks).
+
+    Returns:
+        PageRank vector summing to 1.
+    """
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0)
+
+    out_weight = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    M = sp.diags(inverse) @ A
+
+    x = np.full(n, 1.0 / n) if nstart is None else np.asarray(nstart, dtype=float) / np.sum(nstart)
+    for _ in range(max_iter):
+        previous = x
+        x = alpha * (M.T @ x + x[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(x - previous).sum() < n * tol:
+            return x
+    raise RuntimeError(f"PageRank did not converge in {max_iter} iterations")
+
+
+def hits(
+    A: sp.csr_matrix,
+    tol: float = 1e-8,
+    max_iter: int = 1000,
+    nstart: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted HITS by power iteration on A^T A (nx.hits semantics).
+
+    Authorities are the principal right singular vector of A and hubs are
+    A * authorities, both normalized to sum to 1.
+
+    Args:
+        A: Weighted adjacency, A[i, j] = weight of edge i -> j.
+        tol: Convergence tolerance on the L1 change of the authority vector.
+        max_iter: Maximum number of iterations.
+        nstart: Starting authority vector.
+
+    Returns:
+        (hubs, authorities)
+    """
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+
+    A = A.astype(float)
+    AT = A.T.tocsr()
+    a = np.ones(n) if nstart is None else np.abs(np.asarray(nstart, dtype=float))
+    a /= a.sum() or 1.0
+    for _ in range(max_iter):
+        previous = a
+        a = AT @ (A @ a)
+        total = a.sum()
+        if total == 0:
+            break
+        a /= total
+        if np.abs(a - previous).sum() < n * tol:
+            break
+    else:
+        raise RuntimeError(f"HITS did not converge in {max_iter} iterations")
+
+    h = A @ a
+    return h / (h.sum() or 1.0), a / (a.sum() or 1.0)
+
+
+# ==================== CLOSENESS ====================
+
+_pool_matrix: Optional[sp.csr_matrix] = None
+
+
+def _init_worker(matrix: sp.csr_matrix) -> None:
+    global _pool_matrix
+    _pool_matrix = matrix
+
+
+def _pivot_distances(pivots: np.ndarray, matrix: Optional[sp.csr_matrix] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum of BFS distances from the pivots to every node, and each pivot's eccentricity."""
+    matrix = _pool_matrix if matrix is None else matrix
+    dist = shortest_path(matrix, method="D", directed=False, unweighted=True, indices=pivots)
+    return dist.sum(axis=0), dist.max(axis=1)
+
+
+def approximate_closeness(
+    A: sp.csr_matrix,
+    epsilon: float = 0.05,
+    delta: float = 0.05,
+    n_pivots: Optional[int] = None,
+    workers: Optional[int] = None,
+    seed: int = 0,
+) -> Tuple[np.ndarray, float]:
+    """
+    Closeness centrality of a connected undirected graph from sampled BFS pivots.
+
+    The average distance a(v) of every node is estimated from k random
+    pivots as n / (k (n - 1)) * sum_p d(p, v). By Hoeffding's inequality and
+    a union bound over the n nodes, with probability >= 1 - delta every
+    estimate is within
+
+        bound = D * n / (n - 1) * sqrt(ln(2n / delta) / (2k))
+
+    of the true average distance, where D <= 2 * min eccentricity of the
+    pivots bounds the diameter. When k >= n all nodes are pivots and the
+    result is exact (bound 0).
+
+    Args:
+        A: Symmetric adjacency of a connected graph.
+        epsilon: Target error as a fraction of the diameter; sets
+            k = ln(2n / delta) / (2 epsilon^2) when n_pivots is not given.
+        delta: Failure probability of the bound.
+        n_pivots: Number of pivots (overrides epsilon).
+        workers: Processes for the BFS runs (default: os.cpu_count()).
+        seed: Pivot sampling seed.
+
+    Returns:
+        (closeness, bound on the average-distance error)
+    """
+    n = A.shape[0]
+    if n <= 1:
+        return np.zeros(n), 0.0
+
+    k = n_pivots or math.ceil(math.log(2 * n / delta) / (2 * epsilon ** 2))
+    exact = k >= n
+    pivots = np.arange(n) if exact else np.random.default_rng(seed).choice(n, size=k, replace=False)
+
+    chunks = [pivots[i : i + PIVOT_CHUNK] for i in range(0, len(pivots), PIVOT_CHUNK)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(A,)) as pool:
+            results = list(pool.map(_pivot_distances, chunks))
+    else:
+        results = [_pivot_distances(chunk, A) for chunk in chunks]
+
+    distance_sums = np.sum([r[0] for r in results], axis=0)
+    eccentricity = np.concatenate([r[1] for r in results])
+
+    if exact:
+        return (n - 1) / distance_sums, 0.0
+
+    average_distance = n * distance_sums / (len(pivots) * (n - 1))
+    bound = 2 * eccentricity.min() * n / (n - 1) * math.sqrt(math.log(2 * n / delta) / (2 * len(pivots)))
+    return 1.0 / average_distance, bound
+
+
+# ==================== FUND FEATURES ====================
+
+def fund_centralities(
+    A: sp.csr_matrix,
+    nodes: list,
+    warm_start: Optional[Dict[str, dict]] = None,
+    tol: float = 1e-6,
+    closeness_epsilon: float = 0.05,
+    closeness_delta: float = 0.05,
+    workers: Optional[int] = None,
+) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """
+    degree, pagerank, hub, authority and closeness of every fund.
+
+    Args:
+        A: Weighted adjacency of the directed lead/lag fund graph.
+        nodes: Fund ids in the row order of A.
+        warm_start: {"pagerank": {fund: score}, "authorities": {fund: score}}
+            from a previous snapshot.
+        tol: PageRank tolerance (HITS uses tol / 100).
+        closeness_epsilon, closeness_delta: See approximate_closeness.
+        workers: Processes for closeness.
+
+    Returns:
+        (features indexed by fund, {"pagerank", "authorities": dicts for the
+        next warm start, "closeness_error_bound": float})
+    """
+    A = A.astype(float)
+    warm_start = warm_start or {}
+
+    pr = pagerank(A, tol=tol, nstart=_seed(nodes, warm_start.get("pagerank")))
+    hub, authority = hits(A, tol=tol / 100, nstart=_seed(nodes, warm_start.get("authorities")))
+
+    # closeness on the largest (weakly) connected component, 0 elsewhere
+    closeness = np.zeros(len(nodes))
+    bound = 0.0
+    if nodes:
+        _, labels = connected_components(A, directed=True, connection="weak")
+        component = np.flatnonzero(labels == np.bincount(labels).argmax())
+        undirected = (A + A.T)[component][:, component].tocsr()
+        closeness[component], bound = approximate_closeness(
+            undirected, epsilon=closeness_epsilon, delta=closeness_delta, workers=workers
+        )
+
+    features = pd.DataFrame(
+        {
+            "degree": degree(A),
+            "pagerank": pr,
+            "hub": hub,
+            "authority": authority,
+            "closeness": closeness,
+        },
+        index=pd.Index(nodes, name="fund"),
+    )
+    state = {
+        "pagerank": dict(zip(nodes, pr)),
+        "authorities": dict(zip(nodes, authority)),
+        "closeness_error_bound": bound,
+    }
+    return features, state
+
+
+def _seed(nodes: list, previous: Optional[dict]) -> Optional[np.ndarray]:
+    """Previous scores in node order; new nodes start at the previous mean."""
+    if not previous:
+        return None
+    fill = float(np.mean(list(previous.values())))
+    seed = np.array([previous.get(n, fill) for n in nodes], dtype=float)
+    return seed if seed.sum() > 0 else None
+
+
+# ==================== ACCURACY ====================
+
+def accuracy_report(G_fund: nx.DiGraph, features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare features with the exact networkx values.
+
+    Returns:
+        One row per column with the max absolute and relative error.
+    """
+    largest_cc = max(nx.connected_components(G_fund.to_undirected()), key=len)
+    hubs, authorities = nx.hits(G_fund)
+    exact = pd.DataFrame(
+        {
+            "degree": nx.degree_centrality(G_fund),
+            "pagerank": nx.pagerank(G_fund),
+            "hub": hubs,
+            "authority": authorities,
+            "closeness": nx.closeness_centrality(G_fund.to_undirected().subgraph(largest_cc)),
+        }
+    ).reindex(features.index).fillna(0)
+
+    abs_error = (features[CENTRALITY_COLUMNS] - exact[CENTRALITY_COLUMNS]).abs()
+    scale = exact[CENTRALITY_COLUMNS].abs().replace(0, np.nan)
+    return pd.DataFrame(
+        {
+            "max_abs_error": abs_error.max(),
+            "max_rel_error": (abs_error / scale).max().fillna(0),
+        }
+    )
+
+
+if __name__ == "__main__":
+    # Accuracy against networkx on the sample quarters shipped with the notebook
+    from graph_snapshots import GraphSnapshotEngine
+
+    frames = []
+    for q in range(1, 5):
+        frame = pd.read_csv(f"short_Infotable_Q{q}_2018_A.csv")
+        frames.append(frame)
+    data = pd.concat(frames, ignore_index=True)[["CIK", "CUSIP", "VALUE", "SSHPRNAMT", "PERIOD_DATE"]]
+    data["PERIOD_DATE"] = pd.to_datetime(data["PERIOD_DATE"])
+    data = data.dropna(subset=["CIK", "CUSIP", "VALUE"])
+    data["CIK"] = data["CIK"].astype(str)
+    data["CUSIP"] = data["CUSIP"].astype(str)
+    data = data.sort_values(by="PERIOD_DATE")
+
+    engine = GraphSnapshotEngine()
+    for cutoff in np.sort(data["PERIOD_DATE"].unique()):
+        snapshot = engine.advance_to(data, cutoff)
+        G_fund = snapshot.G_fund
+        if G_fund.number_of_nodes() < 3:
+            continue
+        print(f"\n{pd.Timestamp(cutoff).date()}: {G_fund.number_of_nodes()} funds, {G_fund.number_of_edges()} edges")
+        print(accuracy_report(G_fund, snapshot.fund_features).to_string())
+
+        # sampled closeness (half the nodes as pivots) against exact
+        G_cc = G_fund.to_undirected().subgraph(max(nx.connected_components(G_fund.to_undirected()), key=len))
+        n = G_cc.number_of_nodes()
+        A = nx.to_scipy_sparse_array(G_cc, format="csr")
+        sampled, bound = approximate_closeness(A, n_pivots=max(1, n // 2), workers=1)
+        exact = np.array(list(nx.closeness_centrality(G_cc).values()))
+        error = np.abs(1 / sampled - 1 / exact).max()
+        print(f"closeness with {max(1, n // 2)} pivots: max avg-distance error {error:.3f} (bound {bound:.3f})")
@@ -0,0 +1,149 @@
+"""
+Per-fund, per-quarter store of fund graph features.
+
+GraphSnapshotEngine computes degree, PageRank, HITS, closeness and community
+for every cutoff, but the notebook only kept one pickled DataFrame for the
+training cutoff, so every consumer rebuilt the graph. FundFeatureStore keeps
+one zstd-compressed Parquet file per quarter:
+
+    fund_features_<year>_q<quarter>.parquet     rows (cik, year, quarter,
+                                                cutoff, features), sorted by cik
+
+Writing a quarter replaces its file, so the snapshot engine can publish each
+quarter as it is built. Reads are point-in-time: every fund gets its latest
+row at or before the as_of quarter. Only the files up to as_of are opened and
+a cik filter is pushed down to the Parquet row groups. write() returns the
+same rows in the layout of the ETL fund_graph_features table (keyed by cik,
+year, quarter), so they can be published with DAL.write_fund_features.
+"""
+import glob
+import os
+import re
+from typing import List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+FILE_PREFIX = "fund_features"
+COMPRESSION = "zstd"
+KEY_COLUMNS = ["cik", "year", "quarter"]
+
+QuarterSpec = Union[str, Tuple[int, int], pd.Timestamp]
+
+
+def parse_quarter(quarter: QuarterSpec) -> Tuple[int, int]:
+    """Accept "2018_Q2", (2018, 2) or a date (its calendar quarter)."""
+    if isinstance(quarter, str) and "_Q" in quarter.upper():
+        year, q = quarter.upper().split("_Q")
+        return int(year), int(q)
+    if isinstance(quarter, tuple):
+        year, q = quarter
+        return int(year), int(q)
+    quarter = pd.Timestamp(quarter)
+    return quarter.year, quarter.quarter
+
+
+def feature_records(fund_features: pd.DataFrame, cutoff, quarter: Optional[QuarterSpec] = None) -> pd.DataFrame:
+    """
+    Snapshot features as table rows (cik, year, quarter, cutoff, features),
+    sorted by cik; the layout of the ETL fund_graph_features table.
+
+    Args:
+        fund_features: Features indexed by fund id (GraphSnapshot.fund_features).
+        cutoff: Snapshot cutoff date.
+        quarter: Quarter of the rows (default: the cutoff's quarter).
+    """
+    year, q = parse_quarter(quarter if quarter is not None else cutoff)
+    records = fund_features.reset_index(drop=True).astype("float64")
+    if "community" in records.columns:
+        records["community"] = records["community"].fillna(-1).astype("int64")
+    records.insert(0, "cik", fund_features.index.astype(str))
+    records.insert(1, "year", year)
+    records.insert(2, "quarter", q)
+    records.insert(3, "cutoff", pd.Timestamp(cutoff))
+    return records.sort_values("cik", kind="stable", ignore_index=True)
+
+
+class FundFeatureStore:
+    """
+    Local columnar fund feature store (see module docstring).
+    """
+
+    def __init__(self, path: str = os.path.join("artifacts", "feature_store")):
+        """
+        Args:
+            path: Store directory (created if missing).
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, year: int, quarter: int) -> str:
+        return os.path.join(self.path, f"{FILE_PREFIX}_{year}_q{quarter}.parquet")
+
+    def quarters(self) -> List[Tuple[int, int]]:
+        """Stored (year, quarter) pairs, oldest first."""
+        found = []
+        for file_path in glob.glob(os.path.join(self.path, f"{FILE_PREFIX}_*_q*.parquet")):
+            match = re.search(r"_(\d{4})_q([1-4])\.parquet$", file_path)
+            if match:
+                found.append((int(match.group(1)), int(match.group(2))))
+        return sorted(found)
+
+    # ==================== WRITE ====================
+
+    def write(self, fund_features: pd.DataFrame, cutoff, quarter: Optional[QuarterSpec] = None) -> pd.DataFrame:
+        """
+        Store the fund features of one snapshot, replacing its quarter.
+
+        Args:
+            fund_features: Features indexed by fund id (GraphSnapshot.fund_features).
+            cutoff: Snapshot cutoff date.
+            quarter: Quarter to store under (default: the cutoff's quarter).
+
+        Returns:
+            The stored rows (cik, year, quarter, cutoff, features).
+        """
+        records = feature_records(fund_features, cutoff, quarter)
+
+        file_path = self._file(*parse_quarter(quarter if quarter is not None else cutoff))
+        tmp_path = file_path + ".tmp"
+        pq.write_table(pa.Table.from_pandas(records, preserve_index=False), tmp_path, compression=COMPRESSION)
+        os.replace(tmp_path, file_path)
+        return records
+
+    # ==================== POINT-IN-TIME READS ====================
+
+    def read(
+        self,
+        as_of: Optional[QuarterSpec] = None,
+        ciks: Optional[Sequence[str]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Latest features of every fund at or before a quarter.
+
+        Args:
+            as_of: Quarter ("2018_Q2", (2018, 2) or a cutoff date; default:
+                latest stored).
+            ciks: Funds to read (default: all).
+            columns: Feature columns (default: all stored).
+
+        Returns:
+            Features indexed by fund id (like GraphSnapshot.fund_features),
+            with the year and quarter each row was computed for.
+        """
+        limit = parse_quarter(as_of) if as_of is not None else None
+        files = [self._file(*p) for p in self.quarters() if limit is None or p <= limit]
+        read_columns = None if columns is None else KEY_COLUMNS + [c for c in columns if c not in KEY_COLUMNS]
+        if not files:
+            return pd.DataFrame(columns=[c for c in (read_columns or KEY_COLUMNS) if c != "cik"],
+                                index=pd.Index([], name="fund"))
+
+        filters = None if ciks is None else [("cik", "in", [str(c) for c in ciks])]
+        frame = pq.ParquetDataset(files, filters=filters).read(columns=read_columns).to_pandas()
+
+        frame = frame.sort_values(KEY_COLUMNS, kind="stable").drop_duplicates("cik", keep="last")
+        frame = frame.drop(columns="cutoff", errors="ignore").set_index("cik")
+        frame.index.name = "fund"
+        return frame
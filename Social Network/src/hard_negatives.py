@@ -0,0 +1,101 @@
+"""
+Hard-negative stocks for fund-stock link evaluation.
+
+A fund's hard negatives are the stocks it does not hold that are most similar
+to what it does hold: the top-k stocks by mean cosine similarity to its held
+stocks. Since the mean of cosine similarities is the dot product with the
+mean normalized embedding,
+
+    score(f, j) = (1/|H_f|) * sum_{h in H_f} cos(e_h, e_j) = m_f . e_j / |e_j|,
+    m_f = (1/|H_f|) * sum_{h in H_f} e_h / |e_h|
+
+the scores of a block of funds are one (funds x d) @ (d x stocks) product,
+and the stock x stock similarity matrix is never built.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+# Dense scores per fund block (~64 MB of float32).
+BLOCK_ENTRIES = 1 << 24
+
+
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalized float32 rows; zero rows stay zero (as in cosine_similarity)."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return embeddings / norms
+
+
+def hard_negatives(
+    stock_emb: np.ndarray,
+    holdings: sp.spmatrix,
+    k: int = 50,
+    candidates: Optional[np.ndarray] = None,
+    exclude: Optional[sp.spmatrix] = None,
+    block_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k most similar non-held stocks of every fund.
+
+    Args:
+        stock_emb: Stock embeddings (n_stocks x d).
+        holdings: Fund x stock matrix of the held stocks the similarity is
+            averaged over (any nonzero counts once); funds without holdings
+            get no negatives.
+        k: Negatives per fund.
+        candidates: Boolean mask of stocks that may be sampled (default: all).
+        exclude: Fund x stock matrix of stocks never sampled for the fund
+            (default: holdings).
+        block_size: Funds per block (default: BLOCK_ENTRIES / n_stocks).
+        workers: Threads scoring blocks in parallel (default: os.cpu_count()).
+
+    Returns:
+        (fund_idx, stock_idx) of the negatives, by fund and then by
+        decreasing similarity.
+    """
+    normalized = normalize_rows(stock_emb)
+    n_funds, n_stocks = holdings.shape
+
+    H = sp.csr_matrix(holdings, dtype=np.float32, copy=True)
+    H.eliminate_zeros()
+    H.data[:] = 1
+    counts = np.asarray(H.sum(axis=1)).ravel()
+    H = (sp.diags(1 / np.maximum(counts, 1)) @ H).tocsr()  # row means
+
+    exclude = H if exclude is None else sp.csr_matrix(exclude)
+    allowed = np.ones(n_stocks, dtype=bool) if candidates is None else np.asarray(candidates, dtype=bool)
+    k = min(k, int(allowed.sum()))
+    if k <= 0 or n_funds == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    block_size = block_size or max(1, BLOCK_ENTRIES // max(n_stocks, 1))
+
+    def score_block(start: int) -> Tuple[np.ndarray, np.ndarray]:
+        stop = min(start + block_size, n_funds)
+        scores = (H[start:stop] @ normalized) @ normalized.T
+        scores[:, ~allowed] = -np.inf
+
+        held = exclude[start:stop].tocoo()
+        scores[held.row, held.col] = -np.inf
+
+        top = np.argpartition(scores, n_stocks - k, axis=1)[:, n_stocks - k :]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        keep = np.isfinite(top_scores) & (counts[start:stop] > 0)[:, None]
+        rows = np.broadcast_to(np.arange(start, stop)[:, None], top.shape)
+        return rows[keep], top[keep]
+
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        blocks = list(pool.map(score_block, range(0, n_funds, block_size)))
+    return (
+        np.concatenate([rows for rows, _ in blocks]).astype(np.int64),
+        np.concatenate([cols for _, cols in blocks]).astype(np.int64),
+    )
@@ -0,0 +1,123 @@
+"""
+Fund-stock link feature matrices for the LightGBM model.
+
+A link's features are [fund embedding, stock embedding, fund topology], the
+layout the notebook built row by row with np.concatenate. The fund rows
+(embedding + topology) are aligned to the fund codes once, so a batch of
+links is gathered with fancy indexing into a preallocated float32 matrix.
+"""
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+TOPOLOGY_COLUMNS = ['degree', 'pagerank', 'hub', 'authority', 'closeness', 'community']
+
+
+class LinkFeatureBuilder:
+    """
+    Gathers link features from integer fund and stock codes.
+    """
+
+    DTYPE = np.float32
+
+    def __init__(
+        self,
+        fund_emb: np.ndarray,
+        stock_emb: np.ndarray,
+        fund_features: pd.DataFrame,
+        funds: Sequence,
+        columns: Sequence[str] = TOPOLOGY_COLUMNS,
+    ):
+        """
+        Args:
+            fund_emb: Fund embeddings, one row per fund code.
+            stock_emb: Stock embeddings, one row per stock code.
+            fund_features: Topology features indexed by fund id; funds
+                missing from it (no fund-graph edges) get NaN.
+            funds: Fund ids in code order.
+            columns: Topology columns, in output order.
+        """
+        self.fund_emb = np.ascontiguousarray(fund_emb, dtype=self.DTYPE)
+        self.stock_emb = np.ascontiguousarray(stock_emb, dtype=self.DTYPE)
+        self.columns = list(columns)
+        self.fund_topology = np.ascontiguousarray(
+            fund_features.reindex(pd.Index(funds))[self.columns].to_numpy(dtype=np.float64), dtype=self.DTYPE
+        )
+        if len(self.fund_topology) != len(self.fund_emb):
+            raise ValueError(f"{len(self.fund_emb)} fund embeddings but {len(self.fund_topology)} funds")
+
+        widths = [self.fund_emb.shape[1], self.stock_emb.shape[1], len(self.columns)]
+        self._bounds = np.concatenate([[0], np.cumsum(widths)])
+
+    @property
+    def n_features(self) -> int:
+        return int(self._bounds[-1])
+
+    @property
+    def column_slices(self) -> Tuple[slice, slice, slice]:
+        """Column ranges of the fund embedding, stock embedding and topology blocks."""
+        b = self._bounds
+        return slice(b[0], b[1]), slice(b[1], b[2]), slice(b[2], b[3])
+
+    @property
+    def feature_names(self) -> List[str]:
+        return (
+            [f"fund_emb_{i}" for i in range(self.fund_emb.shape[1])]
+            + [f"stock_emb_{i}" for i in range(self.stock_emb.shape[1])]
+            + self.columns
+        )
+
+    def build(
+        self,
+        fund_idx: np.ndarray,
+        stock_idx: np.ndarray,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Feature matrix of the links (fund_idx[i], stock_idx[i]).
+
+        Args:
+            fund_idx: Fund codes.
+            stock_idx: Stock codes (same length, or a scalar/length-1 array
+                to pair with every fund, and vice versa).
+            out: Preallocated float32 matrix with n_features columns and at
+                least len(links) rows; the first len(links) rows are filled.
+
+        Returns:
+            len(links) x n_features float32 matrix (a view of out when given).
+        """
+        fund_idx, stock_idx = np.broadcast_arrays(np.asarray(fund_idx, dtype=np.int64), np.asarray(stock_idx, dtype=np.int64))
+        fund_idx, stock_idx = np.atleast_1d(fund_idx), np.atleast_1d(stock_idx)
+        n = len(fund_idx)
+        if out is None:
+            out = np.empty((n, self.n_features), dtype=self.DTYPE)
+        out = out[:n]
+
+        fund_cols, stock_cols, topology_cols = self.column_slices
+        np.take(self.fund_emb, fund_idx, axis=0, out=out[:, fund_cols])
+        np.take(self.stock_emb, stock_idx, axis=0, out=out[:, stock_cols])
+        np.take(self.fund_topology, fund_idx, axis=0, out=out[:, topology_cols])
+        return out
+
+    def iter_chunks(
+        self,
+        fund_idx: np.ndarray,
+        stock_idx: np.ndarray,
+        chunk_size: int = 1 << 18,
+    ) -> Iterator[Tuple[slice, np.ndarray]]:
+        """
+        Build the features of a large candidate set chunk by chunk.
+
+        One chunk buffer is allocated and refilled, so the yielded matrix is
+        only valid until the next iteration (copy it to keep it).
+
+        Yields:
+            (slice of the links, chunk feature matrix)
+        """
+        fund_idx, stock_idx = np.broadcast_arrays(np.asarray(fund_idx, dtype=np.int64), np.asarray(stock_idx, dtype=np.int64))
+        fund_idx, stock_idx = np.atleast_1d(fund_idx), np.atleast_1d(stock_idx)
+        buffer = np.empty((min(chunk_size, len(fund_idx)), self.n_features), dtype=self.DTYPE)
+        for start in range(0, len(fund_idx), chunk_size):
+            chunk = slice(start, min(start + chunk_size, len(fund_idx)))
+            yield chunk, self.build(fund_idx[chunk], stock_idx[chunk], out=buffer)
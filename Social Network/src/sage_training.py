@@ -0,0 +1,328 @@
+"""
+Neighbor-sampled mini-batch GraphSAGE training on the fund-stock graph.
+
+The notebook trained GraphSAGE full-batch: every epoch ran both layers over
+the whole graph and scored every holding, which does not fit a full 13F
+quarter in CPU memory. Here the homogeneous graph (funds 0..F-1, stocks
+F..F+S-1) is taken straight from the CSR arrays of BipartiteGraph, each
+mini-batch of holdings is scored against sampled negative stocks, and both
+layers only run on the sampled neighborhood of the batch. Sampling is
+vectorized over the CSR index arrays and runs in the DataLoader workers.
+
+Embeddings are computed layer by layer over node chunks with the full
+neighborhoods, so inference is exact and its memory is bounded by the chunk.
+"""
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import psutil
+import scipy.sparse as sp
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+from torch_geometric.nn import SAGEConv
+
+from bipartite_graph import BipartiteGraph
+
+
+class GraphSAGE(torch.nn.Module):
+    """Two-layer GraphSAGE encoder (mean aggregation)."""
+
+    def __init__(self, in_channels: int, hidden_channels: int, out_channels: int):
+        super().__init__()
+        self.conv1 = SAGEConv(in_channels, hidden_channels)
+        self.conv2 = SAGEConv(hidden_channels, out_channels)
+
+    @property
+    def convs(self) -> List[SAGEConv]:
+        return [self.conv1, self.conv2]
+
+    def forward(self, x: torch.Tensor, edge_index: torch.Tensor) -> torch.Tensor:
+        x = self.conv1(x, edge_index).relu()
+        x = self.conv2(x, edge_index)
+        return x
+
+
+# ==================== GRAPH ====================
+
+def build_edge_index(graph: BipartiteGraph) -> torch.Tensor:
+    """
+    Undirected edge_index of the homogeneous graph (both directions).
+
+    Funds keep their codes 0..F-1 and stocks are shifted to F..F+S-1, so the
+    two node types never share an index.
+    """
+    funds, stocks = graph.edge_arrays()
+    stocks = stocks.astype(np.int64) + len(graph.funds)
+    edge_index = np.stack([np.concatenate([funds, stocks]), np.concatenate([stocks, funds])])
+    return torch.from_numpy(edge_index)
+
+
+def homogeneous_adjacency(graph: BipartiteGraph) -> sp.csr_matrix:
+    """Symmetric CSR adjacency [[0, B], [B^T, 0]] in the node order of build_edge_index."""
+    A = sp.bmat([[None, graph.B], [graph.B.T, None]], format="csr")
+    A.sort_indices()
+    return A
+
+
+def node_features(graph: BipartiteGraph, dim: int = 16, seed: int = 0) -> torch.Tensor:
+    """
+    Input features: node type, log degree, log total value and log total
+    shares (standardized), padded with seeded random columns up to dim.
+    """
+    degree = np.concatenate([np.diff(graph.B.indptr), np.bincount(graph.B.indices, minlength=len(graph.stocks))])
+    value = np.concatenate([np.asarray(graph.value.sum(axis=1)).ravel(), np.asarray(graph.value.sum(axis=0)).ravel()])
+    amount = np.concatenate([np.asarray(graph.amount.sum(axis=1)).ravel(), np.asarray(graph.amount.sum(axis=0)).ravel()])
+    is_fund = np.arange(graph.number_of_nodes()) < len(graph.funds)
+
+    structural = np.column_stack([is_fund, np.log1p(degree), np.log1p(np.abs(value)), np.log1p(np.abs(amount))])
+    structural = (structural - structural.mean(axis=0)) / (structural.std(axis=0) + 1e-9)
+
+    generator = torch.Generator().manual_seed(seed)
+    x = torch.randn(graph.number_of_nodes(), dim, generator=generator)
+    width = min(dim, structural.shape[1])
+    x[:, :width] = torch.from_numpy(structural[:, :width].astype(np.float32))
+    return x
+
+
+# ==================== SAMPLING ====================
+
+class NeighborSampler:
+    """
+    DataLoader collate function turning a batch of holding ids into a sampled
+    subgraph with positive and negative (fund, stock) pairs.
+
+    Every hop samples up to num_neighbors[h] neighbors of the nodes first
+    reached at the previous hop (all of them when the degree is smaller,
+    uniformly with replacement otherwise). Negatives pair each fund of the
+    batch with neg_ratio uniformly drawn stocks.
+    """
+
+    def __init__(
+        self,
+        graph: BipartiteGraph,
+        num_neighbors: Sequence[int] = (10, 5),
+        neg_ratio: int = 1,
+    ):
+        A = homogeneous_adjacency(graph)
+        self.indptr = A.indptr.astype(np.int64)
+        self.indices = A.indices.astype(np.int64)
+        self.fund_codes, stock_codes = graph.edge_arrays()
+        self.stock_nodes = stock_codes.astype(np.int64) + len(graph.funds)
+        self.n_funds = len(graph.funds)
+        self.n_stocks = len(graph.stocks)
+        self.num_neighbors = list(num_neighbors)
+        self.neg_ratio = neg_ratio
+
+    def __call__(self, edge_ids: List[int]) -> Dict[str, torch.Tensor]:
+        edge_ids = np.asarray(edge_ids, dtype=np.int64)
+        src = self.fund_codes[edge_ids]
+        dst = self.stock_nodes[edge_ids]
+        neg = self.n_funds + torch.randint(self.n_stocks, (len(edge_ids) * self.neg_ratio,)).numpy()
+
+        seeds = np.concatenate([src, dst, neg])
+        frontier = seen = np.unique(seeds)
+        targets, sources = [], []
+        for k in self.num_neighbors:
+            target, source = self._sample(frontier, k)
+            targets.append(target)
+            sources.append(source)
+            frontier = np.setdiff1d(np.unique(source), seen, assume_unique=True)
+            seen = np.union1d(seen, frontier)
+
+        # relabel to local ids; seeds come first in the concatenation
+        n_id, local = np.unique(np.concatenate([seeds, *sources, *targets]), return_inverse=True)
+        n_seeds, n_edges = len(seeds), sum(len(s) for s in sources)
+        edge_index = np.stack([local[n_seeds : n_seeds + n_edges], local[n_seeds + n_edges :]])
+
+        n_pos = len(edge_ids)
+        return {
+            "n_id": torch.from_numpy(n_id),
+            "edge_index": torch.from_numpy(edge_index),
+            "src": torch.from_numpy(local[:n_pos]),
+            "dst": torch.from_numpy(local[n_pos : 2 * n_pos]),
+            "neg_src": torch.from_numpy(np.tile(local[:n_pos], self.neg_ratio)),
+            "neg_dst": torch.from_numpy(local[2 * n_pos : n_seeds]),
+        }
+
+    def _sample(self, nodes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(target, sampled neighbor) pairs for up to k neighbors of every node."""
+        start = self.indptr[nodes]
+        degree = self.indptr[nodes + 1] - start
+        count = np.minimum(degree, k)
+
+        owner = np.repeat(np.arange(len(nodes)), count)
+        slot = np.arange(len(owner)) - np.repeat(np.cumsum(count) - count, count)
+        owner_degree = degree[owner]
+        drawn = (torch.rand(len(owner), dtype=torch.float64).numpy() * owner_degree).astype(np.int64)
+        offset = np.where(owner_degree <= k, slot, drawn)
+        return nodes[owner], self.indices[start[owner] + offset]
+
+
+# ==================== TRAINING ====================
+
+def _rss_bytes(process: psutil.Process) -> int:
+    """Resident memory of the process and its DataLoader workers."""
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return rss
+
+
+def train_sage(
+    graph: BipartiteGraph,
+    x: Optional[torch.Tensor] = None,
+    hidden_channels: int = 32,
+    out_channels: int = 8,
+    num_neighbors: Sequence[int] = (10, 5),
+    batch_size: int = 1024,
+    neg_ratio: int = 1,
+    epochs: int = 50,
+    lr: float = 0.01,
+    patience: int = 5,
+    min_delta: float = 1e-4,
+    threads: Optional[int] = None,
+    workers: int = 0,
+    rss_every: int = 50,
+    seed: int = 0,
+    verbose: bool = True,
+) -> Tuple[GraphSAGE, List[Dict[str, float]]]:
+    """
+    Train GraphSAGE for link prediction with neighbor-sampled mini-batches.
+
+    Args:
+        graph: Fund x stock graph to train on.
+        x: Node features in build_edge_index order (default: node_features(graph)).
+        hidden_channels, out_channels: Layer widths.
+        num_neighbors: Neighbors sampled per node at each hop (one per layer).
+        batch_size: Positive holdings per mini-batch.
+        neg_ratio: Negative stocks sampled per positive holding.
+        epochs: Maximum number of epochs.
+        lr: Adam learning rate.
+        patience: Stop after this many epochs without a min_delta improvement
+            of the mean epoch loss.
+        threads: torch intra-op CPU threads (default: torch's default).
+        workers: DataLoader processes doing the sampling (0 = in the main process).
+        rss_every: Sample the peak RSS every this many mini-batches (plus the
+            first one); the sampling time is excluded from seconds/edges_per_s.
+        seed: Seed for initialization, shuffling and sampling.
+        verbose: Print the per-epoch report.
+
+    Returns:
+        (trained model in eval mode, per-epoch history with loss, seconds,
+        edges_per_s and peak_rss_mb)
+    """
+    if threads:
+        torch.set_num_threads(threads)
+    torch.manual_seed(seed)
+    x = node_features(graph, seed=seed) if x is None else x
+
+    sampler = NeighborSampler(graph, num_neighbors, neg_ratio)
+    loader = DataLoader(
+        range(graph.number_of_edges()),
+        batch_size=batch_size,
+        shuffle=True,
+        collate_fn=sampler,
+        num_workers=workers,
+        persistent_workers=workers > 0,
+        generator=torch.Generator().manual_seed(seed),
+    )
+
+    model = GraphSAGE(x.shape[1], hidden_channels, out_channels)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    process = psutil.Process(os.getpid())
+
+    history: List[Dict[str, float]] = []
+    best_loss, stale = float("inf"), 0
+    for epoch in range(epochs):
+        model.train()
+        total_loss, n_scored, peak = 0.0, 0, _rss_bytes(process)
+        sampling_seconds = 0.0
+        start = time.perf_counter()
+
+        for step, batch in enumerate(loader):
+            optimizer.zero_grad()
+            h = model(x[batch["n_id"]], batch["edge_index"])
+            pos = (h[batch["src"]] * h[batch["dst"]]).sum(dim=1)
+            neg = (h[batch["neg_src"]] * h[batch["neg_dst"]]).sum(dim=1)
+            loss = F.binary_cross_entropy_with_logits(
+                torch.cat([pos, neg]), torch.cat([torch.ones_like(pos), torch.zeros_like(neg)])
+            )
+            if step % rss_every == 0:
+                # activations are still alive here, the high-water mark of the step
+                sample_start = time.perf_counter()
+                peak = max(peak, _rss_bytes(process))
+                sampling_seconds += time.perf_counter() - sample_start
+            loss.backward()
+            optimizer.step()
+
+            total_loss += loss.item() * len(batch["src"])
+            n_scored += len(batch["src"])
+
+        seconds = time.perf_counter() - start - sampling_seconds
+        epoch_loss = total_loss / max(n_scored, 1)
+        history.append({
+            "epoch": epoch,
+            "loss": epoch_loss,
+            "seconds": seconds,
+            "edges_per_s": n_scored / seconds if seconds else float("inf"),
+            "peak_rss_mb": peak / 1024 ** 2,
+        })
+        if verbose:
+            print(
+                f"Epoch {epoch:3d}  loss {epoch_loss:.4f}  {history[-1]['edges_per_s']:,.0f} edges/s  "
+                f"peak RSS {history[-1]['peak_rss_mb']:,.0f} MB"
+            )
+
+        if epoch_loss < best_loss - min_delta:
+            best_loss, stale = epoch_loss, 0
+        else:
+            stale += 1
+            if stale >= patience:
+                if verbose:
+                    print(f"Early stopping at epoch {epoch}")
+                break
+
+    model.eval()
+    return model, history
+
+
+# ==================== INFERENCE ====================
+
+@torch.no_grad()
+def embed(
+    model: GraphSAGE,
+    graph: BipartiteGraph,
+    x: torch.Tensor,
+    chunk_size: int = 65536,
+) -> np.ndarray:
+    """
+    Embeddings of every node with full neighborhoods, one layer at a time.
+
+    Args:
+        model: Trained GraphSAGE.
+        graph: Graph to embed (the training graph or a later snapshot).
+        x: Node features in build_edge_index order.
+        chunk_size: Target nodes per step; bounds the edges held at once.
+
+    Returns:
+        (F + S) x out_channels array: funds first, then stocks.
+    """
+    A = homogeneous_adjacency(graph)
+    h = x
+    convs = model.convs
+    for layer, conv in enumerate(convs):
+        out = torch.empty(A.shape[0], conv.out_channels)
+        for start in range(0, A.shape[0], chunk_size):
+            block = A[start : start + chunk_size].tocoo()
+            edge_index = torch.from_numpy(np.stack([block.col, block.row]).astype(np.int64))
+            out[start : start + block.shape[0]] = conv(
+                (h, h[start : start + block.shape[0]]), edge_index, size=(h.shape[0], block.shape[0])
+            )
+        h = out.relu() if layer < len(convs) - 1 else out
+    return h.numpy()
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifact_bundle import ArtifactBundle
+
+lgb = pytest.importorskip("lightgbm")
+
+
+def _write(root, value: float, model=None) -> ArtifactBundle:
+    fund_features = pd.DataFrame({"pagerank": [value, value]}, index=pd.Index(["f1", "f2"], name="fund"))
+    return ArtifactBundle.write(
+        root,
+        stock_emb=np.full((3, 2), value),
+        fund_emb=np.full((2, 2), value),
+        fund_features=fund_features,
+        funds=["f1", "f2"],
+        stocks=["s1", "s2", "s3"],
+        cutoff="2024-12-31",
+        model=model,
+    )
+
+
+def _model():
+    rng = np.random.default_rng(0)
+    return lgb.train({"objective": "binary", "verbose": -1}, lgb.Dataset(rng.random((50, 2)), rng.integers(0, 2, 50)), 2)
+
+
+def test_reader_of_an_old_version_loads_lazily_after_newer_writes(tmp_path):
+    root = str(tmp_path / "bundle")
+    _write(root, 1.0, model=_model())
+    reader = ArtifactBundle(root)  # nothing mapped yet
+
+    for value in (2.0, 3.0, 4.0):
+        _write(root, value)
+    ArtifactBundle(root).write_model(_model())
+
+    assert reader.stock_emb.sum() == 6.0
+    assert reader.fund_features["pagerank"].tolist() == [1.0, 1.0]
+    assert reader.model is not None
+    reader.verify()
+    assert ArtifactBundle(root).stock_emb.sum() == 24.0
+
+
+def test_old_mapping_is_not_overwritten(tmp_path):
+    root = str(tmp_path / "bundle")
+    stock_emb = _write(root, 1.0).stock_emb
+    _write(root, 2.0)
+    assert stock_emb.sum() == 6.0
+
+
+def test_prune_keeps_current_newest_and_recently_superseded(tmp_path):
+    root = str(tmp_path / "bundle")
+    for value in (1.0, 2.0, 3.0):
+        _write(root, value)
+    versions = ArtifactBundle.versions(root)
+
+    assert ArtifactBundle.prune(root, keep=1, min_age=3600) == []
+    assert ArtifactBundle.prune(root, keep=1, min_age=0) == versions[:2]
+    assert ArtifactBundle.versions(root) == versions[2:]
+    assert ArtifactBundle(root).version == versions[2]
+
+
+def test_legacy_directory_opens(tmp_path):
+    root = str(tmp_path / "bundle")
+    version = _write(root, 1.0)
+    os.remove(os.path.join(root, "CURRENT"))
+    assert ArtifactBundle(version.path).stock_emb.sum() == 6.0